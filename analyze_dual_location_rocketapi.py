@@ -4,6 +4,7 @@ Dual Location Analysis: San Jose + Hayward followers for influencers from influe
 Using the proven rocketapi library approach
 """
 
+import os
 import time
 import csv
 from datetime import datetime
@@ -383,8 +384,12 @@ HAYWARD_KEYWORDS = [
     "hayward shoreline", "sulphur creek", "downtown hayward", "mission blvd hayward"
 ]
 
-# Initialize API
+# Initialize API (ROCKETAPI_BASE_URL points it at a local stand-in, e.g. manage.py run_fake_rocketapi).
+# Not Django's ROCKET_API_BASE_URL: that one is for the RapidAPI instagram-scraper
+# host, a different provider and dialect from this rocketapi.io client.
 api = InstagramAPI(token=API_TOKEN)
+if os.environ.get("ROCKETAPI_BASE_URL"):
+    api.base_url = os.environ["ROCKETAPI_BASE_URL"].rstrip("/") + "/"
 
 def check_location_match(user_data, zip_codes, keywords, location_ids):
     """Generic function to check if user matches location criteria"""
@@ -0,0 +1,279 @@
+"""
+Buffered ActivityLog writer.
+
+log_activity() queues an ActivityLog row in-process (after the surrounding
+transaction commits) and returns immediately. A background thread flushes
+the queue with bulk_create once ACTIVITY_LOG_BATCH_SIZE rows are waiting
+or ACTIVITY_LOG_FLUSH_SECONDS have passed. Rows that cannot be written -
+database down, or still queued when the process exits and the final flush
+fails - are appended to a JSONL spool file and replayed by the
+flush_activity_spool management command, so no event is lost.
+
+A replay claims each spool file by renaming it to a name of its own, so
+concurrent replays never read the same file. A claimed file that is
+still there SPOOL_CLAIM_TIMEOUT later belongs to a replay that died and
+is claimed again. Lines that cannot be parsed (e.g. one truncated by a
+crash) are moved to quarantine.jsonl for a person to look at.
+
+Set HAIPCLUB_SETTINGS['ACTIVITY_LOG_ASYNC'] = False to write inline
+(useful in tests and one-off scripts).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT_MAX_LENGTH = 255
+SPOOL_CLAIM_TIMEOUT = 600  # seconds
+QUARANTINE_FILE = 'quarantine.jsonl'
+
+
+def _get_setting(name, default):
+    return settings.HAIPCLUB_SETTINGS.get(name, default)
+
+
+def get_spool_dir():
+    return Path(_get_setting('ACTIVITY_LOG_SPOOL_DIR', settings.BASE_DIR / 'logs' / 'activity_spool'))
+
+
+def _serialize(entry):
+    return json.dumps({**entry, 'user_id': str(entry['user_id']), 'created_at': entry['created_at'].isoformat()})
+
+
+def _deserialize(line):
+    entry = json.loads(line)
+    entry['created_at'] = parse_datetime(entry['created_at'])
+    if entry['created_at'] is None:
+        raise ValueError('Missing created_at')
+    return entry
+
+
+def write_entries(entries):
+    """
+    Insert queued entries; returns the ones that could not be written.
+    Tries one bulk_create and falls back to row-by-row so a single bad
+    row (e.g. a deleted user) does not sink the whole batch.
+    """
+    from .models import ActivityLog
+
+    if not entries:
+        return []
+    try:
+        ActivityLog.objects.bulk_create([ActivityLog(**entry) for entry in entries])
+        return []
+    except Exception as e:
+        logger.warning(f"Activity log bulk insert of {len(entries)} rows failed: {str(e)}")
+
+    failed = []
+    for entry in entries:
+        try:
+            ActivityLog.objects.create(**entry)
+        except Exception:
+            failed.append(entry)
+    return failed
+
+
+def spool_entries(entries, spool_dir=None):
+    """Append entries to this process's JSONL spool file"""
+    if not entries:
+        return
+    spool_dir = Path(spool_dir or get_spool_dir())
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    with open(spool_dir / f'activity-{os.getpid()}.jsonl', 'a', encoding='utf-8') as spool:
+        for entry in entries:
+            spool.write(_serialize(entry) + '\n')
+        spool.flush()
+        os.fsync(spool.fileno())
+    logger.error(f"Spooled {len(entries)} activity log rows to {spool_dir}")
+
+
+def _claimable(spool_dir):
+    """Spool files, and claimed files whose replay has stopped"""
+    yield from sorted(spool_dir.glob('activity-*.jsonl'))
+    stale_before = time.time() - SPOOL_CLAIM_TIMEOUT
+    for path in sorted(spool_dir.glob('activity-*.replaying')):
+        try:
+            if path.stat().st_mtime < stale_before:
+                yield path
+        except FileNotFoundError:
+            continue
+
+
+def _claim(path):
+    """Rename a spool file for this replay alone; None if another replay got it first"""
+    claimed = path.with_name(f'activity-{os.getpid()}-{uuid.uuid4().hex[:8]}.replaying')
+    try:
+        path.rename(claimed)
+    except FileNotFoundError:
+        return None
+    # The claim's age counts from now, not from the last spooled write
+    os.utime(claimed)
+    return claimed
+
+
+def _read_spool(path):
+    """(entries, lines that could not be parsed)"""
+    entries, corrupt = [], []
+    with open(path, encoding='utf-8', errors='replace') as spool:
+        for line in spool:
+            if not line.strip():
+                continue
+            try:
+                entries.append(_deserialize(line))
+            except (ValueError, KeyError, TypeError):
+                corrupt.append(line if line.endswith('\n') else line + '\n')
+    return entries, corrupt
+
+
+def _quarantine(lines, spool_dir):
+    with open(spool_dir / QUARANTINE_FILE, 'a', encoding='utf-8') as quarantine:
+        quarantine.writelines(lines)
+        quarantine.flush()
+        os.fsync(quarantine.fileno())
+    logger.error(f"Moved {len(lines)} unreadable activity log spool lines to {spool_dir / QUARANTINE_FILE}")
+
+
+def replay_spool(spool_dir=None):
+    """
+    Write spooled entries to the database; returns (written, still_failing,
+    quarantined).
+    """
+    spool_dir = Path(spool_dir or get_spool_dir())
+    written = failing = quarantined = 0
+    for path in _claimable(spool_dir):
+        # Claim the file first so a live writer appending to it starts a new one
+        claimed = _claim(path)
+        if claimed is None:
+            continue
+        entries, corrupt = _read_spool(claimed)
+        if corrupt:
+            _quarantine(corrupt, spool_dir)
+        try:
+            failed = write_entries(entries)
+        except Exception as e:
+            logger.error(f"Activity log spool replay failed: {str(e)}")
+            failed = entries
+        spool_entries(failed, spool_dir)
+        claimed.unlink()
+        written += len(entries) - len(failed)
+        failing += len(failed)
+        quarantined += len(corrupt)
+    return written, failing, quarantined
+
+
+class ActivityLogWriter:
+    """Background thread that batches ActivityLog inserts"""
+
+    def __init__(self, batch_size=None, flush_interval=None):
+        self.batch_size = batch_size or _get_setting('ACTIVITY_LOG_BATCH_SIZE', 100)
+        self.flush_interval = flush_interval or _get_setting('ACTIVITY_LOG_FLUSH_SECONDS', 2.0)
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Re-create the thread after a fork (threads are not inherited)
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+            self._stopped.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, entry):
+        self._ensure_started()
+        self._queue.put(entry)
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            failed = write_entries(batch)
+        except Exception as e:
+            logger.error(f"Activity log flush failed: {str(e)}")
+            failed = batch
+        spool_entries(failed)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            batch = []
+            while len(batch) < self.batch_size and not self._stopped.is_set():
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch:
+                close_old_connections()
+                self._write(batch)
+        close_old_connections()
+
+    def flush(self):
+        """Synchronously write everything currently queued"""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self, timeout=5.0):
+        """Stop the thread and flush (or spool) whatever is left"""
+        self._stopped.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        if self._pid == os.getpid():
+            self.flush()
+
+
+activity_writer = ActivityLogWriter()
+atexit.register(activity_writer.stop)
+
+
+def log_activity(user, action_type, description, metadata=None, ip_address=None, user_agent=''):
+    """Record an ActivityLog row without blocking the caller on the INSERT"""
+    entry = {
+        'user_id': user.pk,
+        'action_type': action_type,
+        'description': description,
+        'metadata': metadata or {},
+        'ip_address': ip_address,
+        'user_agent': (user_agent or '')[:USER_AGENT_MAX_LENGTH],
+        'created_at': timezone.now(),
+    }
+
+    if not _get_setting('ACTIVITY_LOG_ASYNC', True):
+        from .models import ActivityLog
+        ActivityLog.objects.create(**entry)
+        return
+
+    # The user row may not be committed yet (e.g. signup), so queue after commit
+    transaction.on_commit(lambda: activity_writer.enqueue(entry))
@@ -2,11 +2,16 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
 from django.urls import reverse
+from django.http import StreamingHttpResponse
 from django.utils.safestring import mark_safe
 from .models import (
     User, InfluencerProfile, VenueProfile, Achievement, 
-    Redemption, ActivityLog, SystemSettings
+    Redemption, ActivityLog, SystemSettings, PlatformCounter, VenueDailyStats,
+    LeaderboardEntry, PendingEventBatch
 )
+from .allowances import reset_allowances
+from .settlement import bulk_confirm_redemptions, bulk_refund_redemptions
+from .exports import export_csv
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -76,10 +81,7 @@ class InfluencerProfileAdmin(admin.ModelAdmin):
     qr_code_preview.short_description = "QR Code"
     
     def reset_monthly_allowance(self, request, queryset):
-        count = 0
-        for profile in queryset:
-            profile.reset_monthly_allowance()
-            count += 1
+        count = reset_allowances(queryset, actor=request.user)
         self.message_user(request, f'Reset allowance for {count} influencers.')
     reset_monthly_allowance.short_description = "Reset monthly allowance"
     
@@ -95,9 +97,7 @@ class InfluencerProfileAdmin(admin.ModelAdmin):
     def regenerate_qr_codes(self, request, queryset):
         count = 0
         for profile in queryset:
-            profile.qr_code_token = profile.generate_qr_token()
-            profile.generate_qr_code()
-            profile.save()
+            profile.rotate_qr_code()
             count += 1
         self.message_user(request, f'Regenerated QR codes for {count} influencers.')
     regenerate_qr_codes.short_description = "Regenerate QR codes"
@@ -129,6 +129,17 @@ class VenueProfileAdmin(admin.ModelAdmin):
         })
     )
 
+@admin.register(VenueDailyStats)
+class VenueDailyStatsAdmin(admin.ModelAdmin):
+    """Per-venue daily redemption rollup"""
+    list_display = ('venue', 'date', 'redemption_count', 'total_amount', 'updated_at')
+    list_filter = ('date',)
+    search_fields = ('venue__venue_name',)
+    readonly_fields = ('venue', 'date', 'redemption_count', 'total_amount', 'updated_at')
+    
+    def has_add_permission(self, request):
+        return False
+
 @admin.register(Achievement)
 class AchievementAdmin(admin.ModelAdmin):
     """Achievement and badge management"""
@@ -177,34 +188,44 @@ class RedemptionAdmin(admin.ModelAdmin):
         })
     )
     
-    actions = ['confirm_redemptions', 'refund_redemptions']
+    actions = ['confirm_redemptions', 'refund_redemptions', 'export_redemptions_csv']
     
     def confirm_redemptions(self, request, queryset):
-        count = 0
-        for redemption in queryset.filter(status='pending'):
-            redemption.status = 'confirmed'
-            redemption.save()
-            count += 1
+        count = bulk_confirm_redemptions(queryset)
         self.message_user(request, f'Confirmed {count} redemptions.')
     confirm_redemptions.short_description = "Confirm selected redemptions"
     
     def refund_redemptions(self, request, queryset):
-        count = 0
-        for redemption in queryset.filter(status='confirmed'):
-            # Refund the amount to influencer
-            redemption.influencer.current_balance += redemption.amount
-            redemption.influencer.save()
-            redemption.status = 'refunded'
-            redemption.save()
-            count += 1
+        count = bulk_refund_redemptions(queryset)
         self.message_user(request, f'Refunded {count} redemptions.')
     refund_redemptions.short_description = "Refund selected redemptions"
+    
+    def export_redemptions_csv(self, request, queryset):
+        # Streamed from the database, so "select all" over millions of rows is fine
+        response = StreamingHttpResponse(export_csv('redemptions', queryset), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="redemptions.csv"'
+        return response
+    export_redemptions_csv.short_description = "Export selected redemptions as CSV"
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    """Precomputed leaderboard snapshots (rebuilt by rebuild_leaderboards)"""
+    list_display = ('board', 'period', 'rank', 'influencer', 'score', 'updated_at')
+    list_filter = ('board', 'period')
+    search_fields = ('influencer__instagram_username',)
+    readonly_fields = ('board', 'period', 'rank', 'influencer', 'score', 'updated_at')
+    
+    def has_add_permission(self, request):
+        return False
 
 @admin.register(ActivityLog)
 class ActivityLogAdmin(admin.ModelAdmin):
     """Activity logging and audit trail"""
     list_display = ('user', 'action_type', 'description', 'ip_address', 'created_at')
     list_filter = ('action_type', 'created_at')
+    list_select_related = ('user',)
+    # Skip the unfiltered COUNT(*) over the whole log on every page
+    show_full_result_count = False
     search_fields = ('user__username', 'description', 'ip_address')
     readonly_fields = ('user', 'action_type', 'description', 'metadata', 'ip_address', 'user_agent', 'created_at')
     
@@ -230,6 +251,25 @@ class SystemSettingsAdmin(admin.ModelAdmin):
         })
     )
 
+@admin.register(PlatformCounter)
+class PlatformCounterAdmin(admin.ModelAdmin):
+    """Materialized homepage counters (maintained automatically)"""
+    list_display = ('key', 'value', 'updated_at')
+    readonly_fields = ('key', 'value', 'updated_at')
+    
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(PendingEventBatch)
+class PendingEventBatchAdmin(admin.ModelAdmin):
+    """Redemption events still waiting for a subscriber (retried by process_domain_events)"""
+    list_display = ('handler', 'event_type', 'attempts', 'next_attempt_at', 'created_at', 'last_error')
+    list_filter = ('handler', 'event_type')
+    readonly_fields = ('handler', 'event_type', 'events', 'attempts', 'last_error', 'created_at', 'next_attempt_at')
+    
+    def has_add_permission(self, request):
+        return False
+
 # Admin site customization
 admin.site.site_header = 'hAIpClub Administration'
 admin.site.site_title = 'hAIpClub Admin'
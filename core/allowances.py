@@ -0,0 +1,65 @@
+"""
+Set-based monthly allowance resets.
+
+Balances are reset with one UPDATE per chunk of profiles (walking the
+primary key so each chunk is an index range), and the matching
+balance_reset ActivityLog rows are written with bulk_create.
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import InfluencerProfile, ActivityLog
+
+
+def current_reset_boundary(now=None):
+    """Start of the current local month; profiles reset before it are due"""
+    today = timezone.localdate(now or timezone.now())
+    return timezone.make_aware(datetime(today.year, today.month, 1))
+
+
+def due_for_reset(now=None):
+    return InfluencerProfile.objects.filter(last_allowance_reset__lt=current_reset_boundary(now))
+
+
+def reset_allowances(queryset=None, chunk_size=5000, actor=None, now=None):
+    """
+    Reset current_balance to monthly_allowance for every profile in
+    queryset (default: all profiles due this month). Returns the number
+    of profiles reset.
+    """
+    now = now or timezone.now()
+    queryset = due_for_reset(now) if queryset is None else queryset
+    description = 'Monthly allowance reset' if actor is None else f'Monthly allowance reset by {actor.username}'
+
+    total = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'user_id', 'monthly_allowance')[:chunk_size]
+            )
+            if not chunk:
+                break
+            first_pk, last_pk = chunk[0][0], chunk[-1][0]
+            
+            # A primary key range rather than a long IN (...) list
+            queryset.filter(pk__gte=first_pk, pk__lte=last_pk).update(
+                current_balance=F('monthly_allowance'),
+                last_allowance_reset=now,
+                updated_at=now
+            )
+            ActivityLog.objects.bulk_create([
+                ActivityLog(
+                    user_id=user_id,
+                    action_type='balance_reset',
+                    description=description,
+                    metadata={'monthly_allowance': float(allowance)},
+                    created_at=now
+                )
+                for _, user_id, allowance in chunk
+            ])
+        total += len(chunk)
+    return total
@@ -0,0 +1,58 @@
+"""
+Authentication backends with a cached user lookup.
+
+AuthenticationMiddleware resolves request.user through the login
+backend's get_user(), one query per request. Venue scanner tablets poll
+scan_qr_code and process_redemption all evening, so these backends serve
+the user from the 'sessions' cache instead, for up to USER_CACHE_TTL
+seconds. Venue users are cached with their venue_profile, which
+process_redemption reads on every call.
+
+Saving or deleting a User or VenueProfile drops the cached copy once the
+transaction commits (see the receivers in core.models); the TTL bounds
+staleness for queryset updates, which send no signals. Influencer
+profiles are never cached here: balances must be read fresh.
+"""
+from allauth.account.auth_backends import AuthenticationBackend
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+USER_CACHE_TTL = 300  # seconds
+
+
+def _cache_key(user_id):
+    return f'core:auth_user:{user_id}'
+
+
+def get_cached_user(user_id):
+    """User for a session's user id, from the cache or one query; None if gone"""
+    cache = caches['sessions']
+    key = _cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('venue_profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        cache.set(key, user, USER_CACHE_TTL)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    caches['sessions'].delete(_cache_key(user_id))
+
+
+class CachedUserMixin:
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+class CachedModelBackend(CachedUserMixin, ModelBackend):
+    pass
+
+
+class CachedAuthenticationBackend(CachedUserMixin, AuthenticationBackend):
+    """allauth's backend (username or email login) with the cached lookup"""
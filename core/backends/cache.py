@@ -0,0 +1,69 @@
+"""
+Django cache backends that count hits and misses.
+
+Each class is the Django backend of the same name with lookups recorded
+in core.caching.cache_metrics under the cache's METRICS_NAME (see
+core.caching.cache_config). FileBasedCache also checks for culling less
+often; see there.
+"""
+import threading
+
+from django.core.cache.backends import filebased, locmem, redis
+
+from core.caching import cache_metrics
+
+_MISSING = object()
+
+
+class CacheMetricsMixin:
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.metrics_name = params.get('METRICS_NAME') or params.get('KEY_PREFIX') or 'default'
+
+    def get(self, key, default=None, version=None):
+        # BaseCache.get_many and get_or_set go through here too
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            cache_metrics.record(self.metrics_name, 0, 1)
+            return default
+        cache_metrics.record(self.metrics_name, 1, 0)
+        return value
+
+
+class FileBasedCache(CacheMetricsMixin, filebased.FileBasedCache):
+    """
+    Django's file cache lists the whole directory on every set() to decide
+    whether to cull, so each write costs O(entries) and slows down as the
+    cache grows. Here that check runs on one set() in CULL_CHECK_INTERVAL
+    per process (default: a hundredth of MAX_ENTRIES), so a write costs
+    O(1) amortized. Between checks a directory can exceed MAX_ENTRIES by
+    up to CULL_CHECK_INTERVAL entries per worker process.
+    """
+    _write_counts = {}
+    _write_counts_lock = threading.Lock()
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        options = params.get('OPTIONS', {})
+        self._cull_check_interval = int(options.get('CULL_CHECK_INTERVAL', max(self._max_entries // 100, 1)))
+
+    def _cull(self):
+        # Counted per directory, not per instance: Django builds a cache
+        # instance per thread, and some servers use a thread per request
+        with self._write_counts_lock:
+            count = self._write_counts.get(self._dir, 0) + 1
+            self._write_counts[self._dir] = 0 if count >= self._cull_check_interval else count
+        if count >= self._cull_check_interval:
+            super()._cull()
+
+
+class LocMemCache(CacheMetricsMixin, locmem.LocMemCache):
+    pass
+
+
+class RedisCache(CacheMetricsMixin, redis.RedisCache):
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        cache_metrics.record(self.metrics_name, len(found), len(keys) - len(found))
+        return found
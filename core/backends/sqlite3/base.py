@@ -0,0 +1,17 @@
+"""
+SQLite backend that starts transactions with BEGIN IMMEDIATE.
+
+Django's backend opens atomic blocks with a plain (deferred) BEGIN, which
+takes the write lock only at the first write. A redemption reads the
+profile before writing, so two concurrent ones can both hold read locks
+and then fail to upgrade: SQLite reports "database is locked" straight
+away rather than wait on a deadlock, and busy_timeout never comes into
+play. Taking the write lock at BEGIN makes writers queue on busy_timeout
+instead. (Django 5.1 offers this as OPTIONS['transaction_mode'].)
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
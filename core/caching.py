@@ -0,0 +1,126 @@
+"""
+Cache configuration and hit/miss metrics.
+
+settings.CACHES comes from cache_config(). Besides 'default' there is one
+named cache per kind of data, each with its own timeout, size limit and
+key prefix:
+
+    profiles      Instagram profile data from RocketAPI (core.services,
+                  core.instagram_lookup)
+    sessions      session data (SESSION_CACHE_ALIAS)
+    leaderboard   rendered leaderboards (core.leaderboard)
+    fragments     {% cache ... using="fragments" %} template fragments
+
+The backend is chosen with environment variables:
+
+    CACHE_BACKEND      file (default), locmem or redis
+    CACHE_DIR          root directory for the file backend (default
+                       <BASE_DIR>/cache, one subdirectory per cache)
+    CACHE_URL          redis://... for the redis backend
+    CACHE_VERSION      key version for every cache (default 1)
+    CACHE_VERSION_<NAME>   key version for one cache, e.g.
+                       CACHE_VERSION_LEADERBOARD
+
+The file backend needs no external service and, unlike Django's default
+per-process LocMemCache, is shared by every worker on the host and
+survives restarts. That also matters for invalidation: version tokens
+such as the one in core.system_settings only reach other workers through
+a shared cache. Bump a cache's version when a deploy changes the shape of
+what it stores (pickled model instances, for one); old entries are then
+ignored rather than unpickled.
+
+Django's file backend lists the cache directory on every write to decide
+whether to cull. With 50,000 sessions that alone would cost more than the
+request, so core.backends.cache only runs the check on one write in a
+hundred. On a host with many workers, or once sessions run into the
+hundreds of thousands, move to CACHE_BACKEND=redis. Its writes are O(1)
+and it evicts by itself.
+
+Every backend counts hits and misses per cache (core.backends.cache).
+The counts are per process, like core.profiling, and are served to staff
+at dashboard/admin/caches/.
+
+This module is imported by settings.py, so it must not import anything
+that needs configured settings at import time.
+"""
+import os
+import threading
+from pathlib import Path
+
+# name: (TIMEOUT seconds, MAX_ENTRIES)
+NAMED_CACHES = {
+    'default': (300, 5000),
+    'profiles': (3600, 10000),
+    'sessions': (1209600, 50000),  # SESSION_COOKIE_AGE
+    'leaderboard': (300, 100),
+    'fragments': (600, 2000),
+}
+
+BACKENDS = {
+    'file': 'core.backends.cache.FileBasedCache',
+    'locmem': 'core.backends.cache.LocMemCache',
+    'redis': 'core.backends.cache.RedisCache',
+}
+
+
+def cache_config(base_dir, environ=None):
+    """Settings dict for CACHES"""
+    environ = os.environ if environ is None else environ
+    backend = environ.get('CACHE_BACKEND', 'file').lower()
+    if backend not in BACKENDS:
+        raise ValueError(f'Unsupported CACHE_BACKEND {backend!r}; use {", ".join(BACKENDS)}')
+    cache_dir = Path(environ.get('CACHE_DIR', Path(base_dir) / 'cache'))
+    version = int(environ.get('CACHE_VERSION', '1'))
+
+    caches = {}
+    for name, (timeout, max_entries) in NAMED_CACHES.items():
+        if backend == 'file':
+            location = str(cache_dir / name)
+        elif backend == 'redis':
+            location = environ.get('CACHE_URL', 'redis://localhost:6379/0')
+        else:
+            location = name
+        caches[name] = {
+            'BACKEND': BACKENDS[backend],
+            'LOCATION': location,
+            'TIMEOUT': timeout,
+            'KEY_PREFIX': f'haipclub:{name}',
+            'VERSION': int(environ.get(f'CACHE_VERSION_{name.upper()}', version)),
+            'METRICS_NAME': name,
+            'OPTIONS': {} if backend == 'redis' else {'MAX_ENTRIES': max_entries},
+        }
+    return caches
+
+
+class CacheMetrics:
+    """Hit and miss counts per named cache, for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, name, hits, misses):
+        with self._lock:
+            counts = self._counts.setdefault(name, [0, 0])
+            counts[0] += hits
+            counts[1] += misses
+
+    def snapshot(self):
+        with self._lock:
+            counts = {name: list(pair) for name, pair in self._counts.items()}
+        stats = {}
+        for name, (hits, misses) in sorted(counts.items()):
+            lookups = hits + misses
+            stats[name] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / lookups, 3) if lookups else None,
+            }
+        return {'pid': os.getpid(), 'caches': stats}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+cache_metrics = CacheMetrics()
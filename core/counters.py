@@ -0,0 +1,51 @@
+"""
+Platform counters for the public homepage.
+
+PlatformCounter rows are maintained incrementally by the signup, tier-change
+and redemption paths (see core.models), so reading them is a single query.
+That read is additionally cached for a short TTL; the reconcile_counters
+management command recomputes every counter from the source tables to
+correct any drift.
+"""
+from django.core.cache import cache
+
+from .models import InfluencerProfile, VenueProfile, Redemption, PlatformCounter
+
+PLATFORM_COUNTERS_CACHE_KEY = 'core:platform_counters'
+PLATFORM_COUNTERS_CACHE_TTL = 60  # seconds
+
+
+def get_platform_counters():
+    """Return {counter key: value} with at most one cheap query"""
+    counters = cache.get(PLATFORM_COUNTERS_CACHE_KEY)
+    if counters is None:
+        counters = {key: 0 for key, _ in PlatformCounter.COUNTER_KEYS}
+        counters.update(PlatformCounter.objects.values_list('key', 'value'))
+        cache.set(PLATFORM_COUNTERS_CACHE_KEY, counters, PLATFORM_COUNTERS_CACHE_TTL)
+    return counters
+
+
+def compute_platform_counters():
+    """Count every counter from the source tables (slow path)"""
+    return {
+        'total_influencers': InfluencerProfile.objects.count(),
+        'total_venues': VenueProfile.objects.count(),
+        'total_redemptions': Redemption.objects.filter(status='confirmed').count(),
+        'elite_members': InfluencerProfile.objects.filter(tier='elite').count(),
+    }
+
+
+def reconcile_platform_counters():
+    """
+    Overwrite the materialized counters with freshly computed values.
+    Returns {key: (old value, new value)} for counters that drifted.
+    """
+    actual = compute_platform_counters()
+    stored = dict(PlatformCounter.objects.values_list('key', 'value'))
+    drift = {}
+    for key, value in actual.items():
+        if stored.get(key) != value:
+            drift[key] = (stored.get(key), value)
+            PlatformCounter.objects.update_or_create(key=key, defaults={'value': value})
+    cache.delete(PLATFORM_COUNTERS_CACHE_KEY)
+    return drift
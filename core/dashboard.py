@@ -0,0 +1,59 @@
+"""
+Influencer dashboard data.
+
+Besides the profile (loaded once per request with the user), the
+dashboard shows the last confirmed redemptions with their venue names and
+the latest achievements. Those two lists are fetched with one query each
+(venues joined in, so the template does no per-row lookups) and cached per
+influencer under a key that includes profile.updated_at. Redemptions,
+refunds, XP and tier changes all write the profile - directly or through
+core.subscribers - so any of them moves the key and the next page view
+rebuilds the lists. DASHBOARD_CACHE_TTL bounds staleness for the rare
+change that does not touch the profile.
+"""
+from django.core.cache import cache
+
+from .tiering import TIER_ORDER, get_tier_thresholds
+
+DASHBOARD_CACHE_TTL = 300  # seconds
+RECENT_ITEMS = 5
+
+
+def _cache_key(profile):
+    return f'core:dashboard:{profile.pk}:{profile.updated_at.timestamp()}'
+
+
+def get_recent_activity(profile):
+    """{'recent_redemptions': [...], 'recent_achievements': [...]}, cached"""
+    key = _cache_key(profile)
+    activity = cache.get(key)
+    if activity is None:
+        activity = {
+            'recent_redemptions': list(
+                profile.redemptions.filter(status='confirmed').select_related('venue').order_by('-created_at')[:RECENT_ITEMS]
+            ),
+            'recent_achievements': list(profile.achievements.order_by('-earned_at')[:RECENT_ITEMS]),
+        }
+        cache.set(key, activity, DASHBOARD_CACHE_TTL)
+    return activity
+
+
+def get_tier_progress(profile):
+    """(XP needed for the next tier or None at the top, progress percentage)"""
+    if profile.tier == TIER_ORDER[-1]:
+        return None, 100
+    next_tier = TIER_ORDER[TIER_ORDER.index(profile.tier) + 1]
+    next_tier_xp = get_tier_thresholds()[next_tier]
+    progress_percentage = (profile.xp_points / next_tier_xp) * 100 if next_tier_xp > 0 else 0
+    return next_tier_xp, min(progress_percentage, 100)
+
+
+def get_dashboard_context(profile):
+    next_tier_xp, progress_percentage = get_tier_progress(profile)
+    return {
+        'profile': profile,
+        **get_recent_activity(profile),
+        'next_tier_xp': next_tier_xp,
+        'progress_percentage': progress_percentage,
+        'tier_color': profile.get_tier_color(),
+    }
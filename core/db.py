@@ -0,0 +1,95 @@
+"""
+Database configuration.
+
+settings.DATABASES comes from database_config(), driven by environment
+variables:
+
+    DB_ENGINE          sqlite (default) or postgresql
+    DB_NAME            database name, or the SQLite file path
+    DB_USER / DB_PASSWORD / DB_HOST / DB_PORT / DB_SSLMODE   (PostgreSQL)
+    DB_CONN_MAX_AGE    seconds to keep a connection open (default 60)
+    DB_PGBOUNCER       set to 1 behind PgBouncer in transaction pooling mode
+
+Connections are persistent (CONN_MAX_AGE) with health checks, so a request
+no longer pays for a new connection. On PostgreSQL, QuerySet.iterator()
+streams through a server-side cursor, which the CSV exports rely on. That
+is disabled behind PgBouncer's transaction pooling, where such cursors
+cannot survive.
+
+SQLite connections wait up to OPTIONS['timeout'] seconds for the write
+lock, so concurrent redemptions queue instead of failing with "database
+is locked" (which needs core.backends.sqlite3; see there). On connect they
+get SQLITE_PRAGMAS: WAL, so readers no longer block the writer, and
+synchronous=NORMAL, which is safe with WAL and avoids an fsync per commit.
+
+This module is imported by settings.py, so it must not import anything
+that needs configured settings at import time.
+"""
+import os
+from pathlib import Path
+
+SQLITE_PRAGMAS = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('foreign_keys', 'ON'),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', '-20000'),  # KiB
+]
+
+
+def _env_flag(environ, name):
+    return environ.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def database_config(base_dir, environ=None):
+    """Settings dict for DATABASES['default']"""
+    environ = os.environ if environ is None else environ
+    engine = environ.get('DB_ENGINE', 'sqlite').lower()
+    conn_max_age = int(environ.get('DB_CONN_MAX_AGE', '60'))
+
+    if engine in ('postgres', 'postgresql'):
+        options = {
+            'connect_timeout': 5,
+            'application_name': 'haipclub',
+        }
+        if environ.get('DB_SSLMODE'):
+            options['sslmode'] = environ['DB_SSLMODE']
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': environ.get('DB_NAME', 'haipclub'),
+            'USER': environ.get('DB_USER', ''),
+            'PASSWORD': environ.get('DB_PASSWORD', ''),
+            'HOST': environ.get('DB_HOST', 'localhost'),
+            'PORT': environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': _env_flag(environ, 'DB_PGBOUNCER'),
+            'OPTIONS': options,
+        }
+
+    if engine != 'sqlite':
+        raise ValueError(f'Unsupported DB_ENGINE {engine!r}; use sqlite or postgresql')
+    return {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': Path(environ.get('DB_NAME', Path(base_dir) / 'db.sqlite3')),
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+    }
+
+
+def get_sqlite_pragmas():
+    from django.conf import settings
+
+    return settings.HAIPCLUB_SETTINGS.get('SQLITE_PRAGMAS', SQLITE_PRAGMAS)
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created receiver that tunes every new SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in get_sqlite_pragmas():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
@@ -0,0 +1,196 @@
+"""
+Domain events.
+
+Code that changes a redemption's state publishes an event instead of
+performing the knock-on updates itself. Each subscriber receives the whole
+batch published together, so bulk operations can be handled with
+set-based queries.
+
+Events are durable. publish_many() writes one PendingEventBatch row per
+subscriber in the publishing transaction, so the events exist exactly
+when the redemption does. After the commit the rows are handled, in
+order, on a background thread (HAIPCLUB_SETTINGS['DOMAIN_EVENTS_ASYNC'])
+or inline. A subscriber's updates and the deletion of its row commit
+together, so a batch is applied once, whichever process gets to it. A
+row whose handler fails is kept with the error and retried with backoff.
+The rows left by a restart are handled the same way. The
+process_domain_events command handles both (run it from cron).
+
+Subscribers register with @subscribe(EventType) (see core.subscribers).
+"""
+import atexit
+import logging
+import os
+import uuid
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+_REDEMPTION_EVENT_FIELDS = ['redemption_id', 'influencer_id', 'venue_id', 'amount', 'created_at']
+
+RedemptionConfirmed = namedtuple('RedemptionConfirmed', _REDEMPTION_EVENT_FIELDS)
+RedemptionRefunded = namedtuple('RedemptionRefunded', _REDEMPTION_EVENT_FIELDS)
+
+EVENT_TYPES = {event_type.__name__: event_type for event_type in (RedemptionConfirmed, RedemptionRefunded)}
+
+# Retries back off from DOMAIN_EVENTS_RETRY_SECONDS, doubling up to this
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+def redemption_event(event_type, redemption):
+    return event_type(
+        redemption.pk, redemption.influencer_id, redemption.venue_id, redemption.amount, redemption.created_at
+    )
+
+
+def encode_event(event):
+    return [str(event.redemption_id), event.influencer_id, event.venue_id, str(event.amount), event.created_at.isoformat()]
+
+
+def decode_event(event_type, values):
+    redemption_id, influencer_id, venue_id, amount, created_at = values
+    return EVENT_TYPES[event_type](
+        uuid.UUID(redemption_id), influencer_id, venue_id, Decimal(amount), parse_datetime(created_at)
+    )
+
+
+_subscribers = defaultdict(list)
+_handlers = {}
+_executor = None
+_executor_pid = None
+
+
+def handler_name(handler):
+    return f'{handler.__module__}.{handler.__qualname__}'
+
+
+def subscribe(*event_types):
+    """Register a handler called with a list of events of the given types"""
+    def decorator(handler):
+        for event_type in event_types:
+            _subscribers[event_type].append(handler)
+        _handlers[handler_name(handler)] = handler
+        return handler
+    return decorator
+
+
+def _retry_delay(attempts):
+    base = timedelta(seconds=settings.HAIPCLUB_SETTINGS.get('DOMAIN_EVENTS_RETRY_SECONDS', 60))
+    return min(base * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+
+
+def publish(event):
+    publish_many([event])
+
+
+def publish_many(events):
+    """
+    Record events for their subscribers in the current transaction and
+    handle them once it commits
+    """
+    from .models import PendingEventBatch
+
+    by_type = defaultdict(list)
+    for event in events:
+        by_type[type(event)].append(event)
+
+    # Not picked up by process_domain_events until this process has had
+    # its chance, unless the handler fails first
+    retry_at = timezone.now() + _retry_delay(1)
+    rows = [
+        PendingEventBatch(
+            handler=handler_name(handler),
+            event_type=event_type.__name__,
+            events=[encode_event(event) for event in batch],
+            next_attempt_at=retry_at,
+        )
+        for event_type, batch in by_type.items()
+        for handler in _subscribers[event_type]
+    ]
+    if rows:
+        batch_ids = [row.pk for row in PendingEventBatch.objects.bulk_create(rows)]
+        transaction.on_commit(lambda: _schedule(batch_ids))
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='domain-events')
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _schedule(batch_ids):
+    if settings.HAIPCLUB_SETTINGS.get('DOMAIN_EVENTS_ASYNC', False):
+        _get_executor().submit(_dispatch_in_worker, batch_ids)
+    else:
+        dispatch(batch_ids)
+
+
+def _dispatch_in_worker(batch_ids):
+    close_old_connections()
+    try:
+        dispatch(batch_ids)
+    finally:
+        close_old_connections()
+
+
+def _handle(batch_id):
+    """Run one outbox row's handler; True unless it failed"""
+    from .models import PendingEventBatch
+
+    try:
+        with transaction.atomic():
+            # Whoever deletes the row applied it; a second process finds nothing
+            row = PendingEventBatch.objects.select_for_update().filter(pk=batch_id).first()
+            if row is None:
+                return True
+            handler = _handlers.get(row.handler)
+            if handler is None:
+                raise LookupError(f'No subscriber named {row.handler}')
+            handler([decode_event(row.event_type, values) for values in row.events])
+            row.delete()
+        return True
+    except Exception as e:
+        logger.exception(f"Event handler failed for pending event batch {batch_id}: {str(e)}")
+        attempts = (PendingEventBatch.objects.filter(pk=batch_id).values_list('attempts', flat=True).first() or 0) + 1
+        PendingEventBatch.objects.filter(pk=batch_id).update(
+            attempts=F('attempts') + 1,
+            last_error=str(e),
+            next_attempt_at=timezone.now() + _retry_delay(attempts)
+        )
+        return False
+
+
+def dispatch(batch_ids):
+    """Handle outbox rows in order; returns (handled, failed)"""
+    handled = failed = 0
+    for batch_id in batch_ids:
+        if _handle(batch_id):
+            handled += 1
+        else:
+            failed += 1
+    return handled, failed
+
+
+def dispatch_due(now=None):
+    """Handle every outbox row whose next attempt is due; returns (handled, failed)"""
+    from .models import PendingEventBatch
+
+    due = PendingEventBatch.objects.filter(next_attempt_at__lte=now or timezone.now()).order_by('pk')
+    return dispatch(list(due.values_list('pk', flat=True)))
+
+
+@atexit.register
+def _drain_executor():
+    if _executor is not None and _executor_pid == os.getpid():
+        _executor.shutdown(wait=True)
@@ -0,0 +1,186 @@
+"""
+CSV exports of redemptions and venue settlements.
+
+Exports are generators of CSV text, so they run in constant memory
+however many rows match: the rows come from QuerySet.iterator() in
+chunks of EXPORT_CHUNK_SIZE (a server-side cursor on PostgreSQL, fetchmany
+on SQLite) as value tuples, never as model instances, and each chunk is
+written out before the next is fetched. The views hand them to a
+StreamingHttpResponse; export_redemptions writes them to a .csv.gz file.
+
+Two reports, both for an optional venue, local date range and status:
+
+    redemptions  one row per redemption
+    settlement   one row per venue and local day with confirmed, refunded
+                 and pending counts and amounts (grouped in the database),
+                 a subtotal row after each venue and a grand total at the
+                 end. What a venue is owed is its confirmed amount.
+
+Redemption rows are ordered by venue and then newest first, the order of
+the (venue, -created_at, -id) index, so they are read without a sort.
+
+Venue names, Instagram usernames and notes are typed in by users. A cell
+starting with =, +, -, @ (or a tab or carriage return) is prefixed with
+an apostrophe so a spreadsheet shows it as text instead of running it as
+a formula.
+
+Behind PgBouncer server-side cursors are disabled (see core.db), and the
+driver then buffers the whole result client-side; run large exports
+against a direct connection there.
+"""
+import csv
+import io
+from decimal import Decimal
+from itertools import islice
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Redemption
+from .venue_stats import local_day_bounds
+
+EXPORT_CHUNK_SIZE = 2000
+
+REDEMPTION_COLUMNS = [
+    'redemption_id', 'created_at', 'confirmed_at', 'venue_id', 'venue',
+    'influencer', 'amount', 'status', 'notes',
+]
+SETTLEMENT_STATUSES = ['confirmed', 'refunded', 'pending']
+SETTLEMENT_METRICS = [
+    f'{status}_{column}' for status in SETTLEMENT_STATUSES for column in ('count', 'amount')
+]
+SETTLEMENT_COLUMNS = ['venue_id', 'venue', 'date'] + SETTLEMENT_METRICS
+CENT = Decimal('0.01')
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def parse_date_range(start, end):
+    """
+    (start, end) dates from YYYY-MM-DD strings, either of which may be
+    empty; ValueError if one is malformed or end is before start.
+    """
+    dates = []
+    for value in (start, end):
+        date = parse_date(value) if value else None
+        if value and date is None:
+            raise ValueError(f'Invalid date {value!r}, expected YYYY-MM-DD')
+        dates.append(date)
+    if dates[0] and dates[1] and dates[1] < dates[0]:
+        raise ValueError('The end date is before the start date')
+    return tuple(dates)
+
+
+def text_cell(value):
+    """A user-entered value made safe to open in a spreadsheet"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def redemptions_for_export(venue=None, start=None, end=None, status=None):
+    """Redemptions for a venue (or all), local dates start..end inclusive, and status"""
+    queryset = Redemption.objects.all()
+    if venue is not None:
+        queryset = queryset.filter(venue=venue)
+    if start:
+        queryset = queryset.filter(created_at__gte=local_day_bounds(start)[0])
+    if end:
+        queryset = queryset.filter(created_at__lt=local_day_bounds(end)[1])
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset
+
+
+def redemption_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """CSV rows (REDEMPTION_COLUMNS) for every redemption in queryset"""
+    rows = queryset.order_by('venue_id', '-created_at', '-id').values_list(
+        'id', 'created_at', 'confirmed_at', 'venue_id', 'venue__venue_name',
+        'influencer__instagram_username', 'amount', 'status', 'notes'
+    )
+    # Looked up once: timezone.localtime() resolves it again for every value
+    tz = timezone.get_current_timezone()
+    for pk, created_at, confirmed_at, venue_id, venue, influencer, amount, status, notes in rows.iterator(chunk_size):
+        yield [
+            pk,
+            created_at.astimezone(tz).isoformat(),
+            confirmed_at.astimezone(tz).isoformat() if confirmed_at else '',
+            venue_id, text_cell(venue), text_cell(influencer), amount, status, text_cell(notes),
+        ]
+
+
+def _money(values):
+    # Amounts to the cent; SQLite hands sums back as e.g. Decimal('43.5')
+    return [
+        Decimal(value).quantize(CENT) if metric.endswith('_amount') else value
+        for metric, value in zip(SETTLEMENT_METRICS, values)
+    ]
+
+
+def settlement_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    CSV rows (SETTLEMENT_COLUMNS): each venue-day in queryset, a 'total'
+    row after each venue's days and a final 'TOTAL' row for everything.
+    """
+    aggregates = {}
+    for status in SETTLEMENT_STATUSES:
+        aggregates[f'{status}_count'] = Count('id', filter=Q(status=status))
+        aggregates[f'{status}_amount'] = Sum('amount', filter=Q(status=status))
+    days = queryset.annotate(day=TruncDate('created_at')).values(
+        'venue_id', 'venue__venue_name', 'day'
+    ).annotate(**aggregates).order_by('venue_id', 'day')
+
+    metrics = SETTLEMENT_METRICS
+    grand_totals = [0] * len(metrics)
+    venue_totals = None
+    current_venue = current_name = None
+    for day in days.iterator(chunk_size):
+        values = [day[metric] or 0 for metric in metrics]
+        if day['venue_id'] != current_venue:
+            if current_venue is not None:
+                yield [current_venue, current_name, 'total'] + _money(venue_totals)
+            current_venue, current_name = day['venue_id'], text_cell(day['venue__venue_name'])
+            venue_totals = [0] * len(metrics)
+        venue_totals = [total + value for total, value in zip(venue_totals, values)]
+        grand_totals = [total + value for total, value in zip(grand_totals, values)]
+        yield [day['venue_id'], current_name, day['day'].isoformat()] + _money(values)
+
+    if current_venue is not None:
+        yield [current_venue, current_name, 'total'] + _money(venue_totals)
+    yield ['', 'TOTAL', ''] + _money(grand_totals)
+
+
+REPORTS = {
+    'redemptions': (REDEMPTION_COLUMNS, redemption_rows),
+    'settlement': (SETTLEMENT_COLUMNS, settlement_rows),
+}
+
+
+def csv_chunks(columns, rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """CSV text for a header and rows, yielded chunk_size rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        if len(batch) < chunk_size:
+            return
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def export_csv(report, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """CSV text chunks for a REPORTS name over a Redemption queryset"""
+    columns, rows = REPORTS[report]
+    return csv_chunks(columns, rows(queryset, chunk_size), chunk_size)
+
+
+def export_filename(report, venue=None, start=None, end=None):
+    parts = [report, f'venue-{venue.pk}' if venue is not None else 'all-venues']
+    if start or end:
+        parts.append(f'{start or "start"}-to-{end or "now"}')
+    return '_'.join(parts) + '.csv'
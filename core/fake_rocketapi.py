@@ -0,0 +1,302 @@
+"""
+Local stand-in for RocketAPI, for offline integration and load tests.
+
+FakeRocketAPI serves a follower fixture (see core.follower_fixtures) over
+HTTP in the two dialects the code base speaks:
+
+InstagramService:
+
+    GET /info?username_or_id_or_url=...          {"data": {"user": profile}}
+    GET /followers?...&count=25[&max_id=CURSOR]  {"data": {"users": [...], "next_max_id": CURSOR | null}}
+    GET /posts?...&count=12[&max_id=CURSOR]      {"data": {"items": [...], "next_max_id": ..., "more_available": ...}}
+
+the rocketapi client used by analyze_dual_location_rocketapi.py, with its
+{"status": "done", "response": {...}} envelope:
+
+    POST /instagram/user/get_info                {"username": ...}
+    POST /instagram/user/get_followers           {"id": ..., "count": ..., "max_id": ...}
+    POST /instagram/user/get_media               {"id": ..., "count": ..., "max_id": ...}
+
+The dialects live side by side at the same root. Each client has its own
+base URL variable, because in production they talk to different
+providers: ROCKET_API_BASE_URL (settings, the RapidAPI instagram-scraper
+host) for InstagramService and ROCKETAPI_BASE_URL (rocketapi.io) for the
+script. Point both at the fake server to test either.
+
+Any username resolves: the fixture's own profile, or a copy renamed to
+the username asked for, so lookups of many different users can be load
+tested against one fixture. Cursors are opaque, like the real ones.
+
+Behaviour that matters under load is configurable: fixed latency plus
+jitter; a per-key rate limit (token bucket; excess requests get 429 with
+Retry-After); and injected failures - 5xx responses, requests that hang
+past the client timeout, and malformed JSON. GET /_stats returns request
+counts per endpoint and status.
+
+run_fake_rocketapi serves it from the command line; tests and benchmarks
+use it as a context manager.
+"""
+import base64
+import binascii
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PAGE_SIZE = 25
+ERROR_STATUSES = [500, 502, 503]
+
+
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(f'offset:{offset}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Offset for a cursor from encode_cursor(); ValueError if it is not one"""
+    if not cursor:
+        return 0
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(f'Invalid cursor {cursor!r}')
+    prefix, _, offset = decoded.partition(':')
+    if prefix != 'offset' or not offset.isdigit():
+        raise ValueError(f'Invalid cursor {cursor!r}')
+    return int(offset)
+
+
+class BadRequest(Exception):
+    pass
+
+
+class TokenBucket:
+    """`rate` requests per second per key, with bursts of up to `rate`"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key):
+        """0 if the request may proceed, else seconds until it could"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._buckets[key] = (tokens - 1, now)
+            return 0
+
+
+class FakeRocketAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == '/_stats':
+            self._send(200, self.server.api.stats())
+            return
+        routes = {
+            '/info': self._info,
+            '/followers': self._followers,
+            '/posts': self._posts,
+        }
+        self._handle(url.path, routes, lambda body: {'status': 'ok', 'data': body}, params)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            data = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send(400, {'status': 'error', 'message': 'Request body is not JSON'})
+            return
+        routes = {
+            '/instagram/user/get_info': lambda params: {'data': self._info(params)},
+            '/instagram/user/get_followers': self._followers,
+            '/instagram/user/get_media': self._posts,
+        }
+        params = {
+            'username_or_id_or_url': data.get('username') or data.get('id'),
+            'count': data.get('count'),
+            'max_id': data.get('max_id'),
+        }
+        envelope = lambda body: {
+            'status': 'done',
+            'response': {'status_code': 200, 'content_type': 'application/json', 'body': body},
+        }
+        self._handle(url.path.rstrip('/'), routes, envelope, params)
+
+    def _handle(self, path, routes, wrap, params):
+        api = self.server.api
+        route = routes.get(path)
+        if route is None:
+            api.count(path, 404)
+            self._send(404, {'status': 'error', 'message': f'Unknown endpoint {path}'})
+            return
+
+        key = self.headers.get('X-RapidAPI-Key') or self.headers.get('Authorization') or self.client_address[0]
+        retry_after = api.rate_limiter.take(key) if api.rate_limiter else 0
+        if retry_after:
+            api.count(path, 429)
+            self._send(429, {'message': 'Too many requests'}, {'Retry-After': str(max(1, round(retry_after)))})
+            return
+
+        api.delay()
+        failure = api.pick_failure()
+        if failure == 'hang':
+            api.count(path, 'hang')
+            time.sleep(api.hang_seconds)
+            self.close_connection = True
+            return
+        if failure == 'error':
+            status = api.random.choice(ERROR_STATUSES)
+            api.count(path, status)
+            self._send(status, {'status': 'error', 'message': 'Injected failure'})
+            return
+        if failure == 'malformed':
+            api.count(path, 'malformed')
+            self._send_raw(200, b'{"status": "ok", "data": {"users": [')
+            return
+
+        try:
+            body = route(params)
+        except BadRequest as e:
+            api.count(path, 400)
+            self._send(400, {'status': 'error', 'message': str(e)})
+            return
+        api.count(path, 200)
+        self._send(200, wrap(body))
+
+    def _info(self, params):
+        return {'user': self.server.api.profile_for(params.get('username_or_id_or_url') or '')}
+
+    def _page(self, items, params, default_count):
+        try:
+            start = decode_cursor(params.get('max_id'))
+            count = int(params.get('count') or default_count)
+        except ValueError as e:
+            raise BadRequest(str(e))
+        end = start + min(max(count, 1), self.server.api.page_size)
+        return items[start:end], encode_cursor(end) if end < len(items) else None
+
+    def _followers(self, params):
+        users, next_max_id = self._page(self.server.api.fixture['followers'], params, DEFAULT_PAGE_SIZE)
+        return {'users': users, 'next_max_id': next_max_id, 'big_list': next_max_id is not None}
+
+    def _posts(self, params):
+        items, next_max_id = self._page(self.server.api.fixture['posts'], params, 12)
+        return {'items': items, 'next_max_id': next_max_id, 'more_available': next_max_id is not None}
+
+    def _send(self, status, body, headers=None):
+        self._send_raw(status, json.dumps(body).encode('utf-8'), headers)
+
+    def _send_raw(self, status, content, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeRocketAPI:
+    """Threaded HTTP server for one fixture; use as a context manager"""
+
+    def __init__(self, fixture, host='127.0.0.1', port=0, page_size=DEFAULT_PAGE_SIZE,
+                 latency_ms=0, jitter_ms=0, rate_limit=None, error_rate=0.0,
+                 hang_rate=0.0, malformed_rate=0.0, hang_seconds=35, seed=None):
+        self.fixture = fixture
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.malformed_rate = malformed_rate
+        self.hang_seconds = hang_seconds
+        self.random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._counts = Counter()
+
+        self.httpd = ThreadingHTTPServer((host, port), FakeRocketAPIHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.api = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def profile_for(self, username_or_id):
+        """The fixture profile, renamed to any username other than its own"""
+        profile = dict(self.fixture['profile'])
+        if username_or_id and username_or_id not in (profile.get('username'), profile.get('id'), str(profile.get('pk'))):
+            pk = 9_000_000_000 + zlib.crc32(username_or_id.encode())
+            profile.update(username=username_or_id, pk=pk, id=str(pk))
+        profile.setdefault('edge_followed_by', {'count': profile.get('follower_count', 0)})
+        profile.setdefault('edge_follow', {'count': profile.get('following_count', 0)})
+        profile.setdefault('edge_owner_to_timeline_media', {'count': profile.get('media_count', 0)})
+        return profile
+
+    def delay(self):
+        if self.latency_ms or self.jitter_ms:
+            with self._random_lock:
+                jitter = self.random.uniform(0, self.jitter_ms)
+            time.sleep((self.latency_ms + jitter) / 1000)
+
+    def pick_failure(self):
+        """None, or which failure to inject into this response"""
+        with self._random_lock:
+            roll = self.random.random()
+        for failure, rate in (('error', self.error_rate), ('hang', self.hang_rate), ('malformed', self.malformed_rate)):
+            if roll < rate:
+                return failure
+            roll -= rate
+        return None
+
+    def count(self, path, outcome):
+        with self._stats_lock:
+            self._counts[(path, str(outcome))] += 1
+
+    def stats(self):
+        """{endpoint: {status or failure: requests}}"""
+        with self._stats_lock:
+            counts = dict(self._counts)
+        stats = {}
+        for (path, outcome), requests in sorted(counts.items()):
+            stats.setdefault(path, {})[outcome] = requests
+        return stats
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fake-rocketapi', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,166 @@
+"""
+Follower fixtures for benchmarking the follower-analysis engine offline.
+
+A fixture is a JSON file shaped like the RocketAPI responses that
+InstagramService.analyze_comprehensive_followers consumes:
+
+    {
+        "profile": {...},               # /info "user" object
+        "followers": [{...}, ...],      # /followers "users" objects, in page order
+        "posts": [{...}, ...]           # /posts "items"
+    }
+
+Responses recorded from the live API can be saved in this shape. For
+everything else, synthetic_fixture() generates followers with a realistic
+mix: mostly ordinary accounts whose names and bios carry the signals the
+engine looks for (first names, Bay Area places, ZIP codes) at plausible
+rates, plus bot-like accounts (no picture, digit-heavy usernames, far
+more following than followers) and low-activity lurkers.
+"""
+import json
+import random
+
+from .services import InstagramService
+
+FIRST_NAMES = [
+    'john', 'mike', 'david', 'chris', 'alex', 'ryan', 'kevin', 'jason', 'daniel', 'james',
+    'sarah', 'jennifer', 'lisa', 'michelle', 'emily', 'ashley', 'emma', 'olivia', 'sophia', 'mia',
+    # Names the indicator lists do not know about
+    'priya', 'wei', 'carlos', 'nguyen', 'jordan', 'taylor', 'sam', 'maya', 'diego', 'hana',
+    'arjun', 'lucia', 'kenji', 'fatima', 'omar', 'zoe', 'leo', 'ava', 'noah', 'ines',
+]
+LAST_NAMES = [
+    'smith', 'garcia', 'nguyen', 'chen', 'patel', 'kim', 'lopez', 'johnson', 'lee', 'martinez',
+    'wong', 'singh', 'brown', 'tran', 'davis', 'rodriguez', 'park', 'shah', 'miller', 'wilson',
+]
+BIO_FRAGMENTS = [
+    'coffee addict', 'dog mom', 'foodie', 'travel', 'photography', 'runner', 'yoga',
+    'product designer', 'software engineer', 'nurse', 'student', 'ux', 'music lover',
+    'living my best life', 'dm for collabs', 'plant parent', 'hiking', 'brunch enthusiast',
+    'she/her', 'he/him', 'they/them', 'sf giants fan', 'warriors', '49ers', 'vegan',
+]
+BOT_USERNAME_PARTS = ['user', 'insta', 'follow', 'real', 'official', 'account', 'gram', 'x']
+
+
+def _place_mentions(rng, criteria):
+    """A Bay Area keyword or ZIP code from the engine's own criteria"""
+    city = rng.choice(list(criteria.values()))
+    if rng.random() < 0.2:
+        return rng.choice(city['zip_codes'])
+    return rng.choice(city['keywords'])
+
+
+def _ordinary(rng, pk, criteria):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    username = rng.choice([
+        f'{first}.{last}', f'{first}_{last}', f'{first}{last}{rng.randint(1, 99)}', f'{first}{rng.randint(80, 2005)}',
+    ])
+    bio = []
+    for _ in range(rng.choice([0, 1, 2, 2, 3])):
+        bio.append(rng.choice(BIO_FRAGMENTS))
+    if rng.random() < 0.35:
+        bio.append(_place_mentions(rng, criteria))
+    followers = int(rng.lognormvariate(6, 1.3))
+    return {
+        'pk': pk,
+        'id': str(pk),
+        'username': username,
+        'full_name': f'{first.title()} {last.title()}' if rng.random() < 0.85 else '',
+        'biography': ' | '.join(bio),
+        'profile_pic_url': f'https://cdn.example.com/{pk}.jpg' if rng.random() < 0.93 else '',
+        'is_verified': rng.random() < 0.005,
+        'is_private': rng.random() < 0.3,
+        'follower_count': followers,
+        'following_count': int(followers * rng.uniform(0.3, 2.0)) + rng.randint(0, 300),
+        'media_count': int(rng.lognormvariate(3.5, 1.2)),
+    }
+
+
+def _bot(rng, pk):
+    username = f'{rng.choice(BOT_USERNAME_PARTS)}{rng.randint(10000, 99999999)}'
+    if rng.random() < 0.3:
+        username = f'{username}_{rng.choice(BOT_USERNAME_PARTS)}_{rng.randint(1, 999)}'
+    return {
+        'pk': pk,
+        'id': str(pk),
+        'username': username,
+        'full_name': '' if rng.random() < 0.7 else rng.choice(FIRST_NAMES).title(),
+        'biography': '' if rng.random() < 0.8 else 'follow back',
+        'profile_pic_url': '' if rng.random() < 0.75 else f'https://cdn.example.com/{pk}.jpg',
+        'is_verified': False,
+        'is_private': rng.random() < 0.5,
+        'follower_count': rng.randint(0, 80),
+        'following_count': rng.randint(300, 7500),
+        'media_count': rng.choice([0, 0, 0, 1, 2]),
+    }
+
+
+def _lurker(rng, pk):
+    first = rng.choice(FIRST_NAMES)
+    return {
+        'pk': pk,
+        'id': str(pk),
+        'username': f'{first}_{rng.randint(1, 9999)}',
+        'full_name': first.title() if rng.random() < 0.5 else '',
+        'biography': '',
+        'profile_pic_url': f'https://cdn.example.com/{pk}.jpg' if rng.random() < 0.6 else '',
+        'is_verified': False,
+        'is_private': rng.random() < 0.6,
+        'follower_count': rng.randint(5, 150),
+        'following_count': rng.randint(20, 400),
+        'media_count': rng.randint(0, 5),
+    }
+
+
+def synthetic_fixture(followers=5000, seed=0, username='benchmark_influencer'):
+    """A fixture dict with `followers` generated follower profiles"""
+    rng = random.Random(seed)
+    criteria = InstagramService().city_criteria
+    users = []
+    for n in range(followers):
+        pk = 10_000_000 + n
+        kind = rng.random()
+        if kind < 0.72:
+            users.append(_ordinary(rng, pk, criteria))
+        elif kind < 0.87:
+            users.append(_bot(rng, pk))
+        else:
+            users.append(_lurker(rng, pk))
+
+    profile_pk = 9_000_000 + seed
+    posts = [
+        {
+            'id': f'{profile_pk}_{n}',
+            'like_count': int(rng.lognormvariate(7, 0.6)),
+            'comment_count': int(rng.lognormvariate(3.5, 0.8)),
+            'taken_at': 1_700_000_000 + n * 86400,
+        }
+        for n in range(12)
+    ]
+    return {
+        'profile': {
+            'pk': profile_pk,
+            'id': str(profile_pk),
+            'username': username,
+            'full_name': 'Benchmark Influencer',
+            'biography': 'SF food & nightlife | bay area',
+            'follower_count': max(followers * 4, 1000),
+            'following_count': 812,
+            'media_count': 640,
+            'profile_pic_url': 'https://cdn.example.com/profile.jpg',
+            'is_verified': False,
+            'is_private': False,
+        },
+        'followers': users,
+        'posts': posts,
+    }
+
+
+def save_fixture(fixture, path):
+    with open(path, 'w') as f:
+        json.dump(fixture, f)
+
+
+def load_fixture(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,155 @@
+"""
+Instagram profile previews for the signup forms.
+
+custom.js looks a username up every time typing pauses, so most requests
+repeat a username seen moments ago. Each lookup result is cached in the
+'profiles' cache as the ready-to-send JSON body plus its ETag: an hour
+for profiles that exist, NEGATIVE_CACHE_TTL for ones RocketAPI could not
+return, so typos and half-typed names do not hit the API again on every
+pause.
+
+Cache misses are coalesced per username: concurrent requests in one
+process wait for a single InstagramService.get_profile_info() call, and
+across processes a cache lock lets one caller fetch while the others poll
+the cache for the result.
+
+Uncached lookups are throttled per client address. X-Forwarded-For is
+written by the client as much as by our proxies, so only the entries the
+TRUSTED_PROXY_COUNT proxies appended are believed (see client_address()).
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+from .services import instagram_service
+
+PROFILE_CACHE_TTL = 3600  # seconds
+NEGATIVE_CACHE_TTL = 300
+LOOKUP_LOCK_TTL = 35  # longer than the RocketAPI request timeout
+LOOKUP_POLL_INTERVAL = 0.1
+CLIENT_LOOKUP_INTERVAL = 1  # uncached lookups per client, at most one per second
+
+USERNAME_RE = re.compile(r'^[a-z0-9._]{1,30}$')
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def normalize_username(username):
+    """Lower-cased username without a leading @, or None if it cannot be valid"""
+    username = (username or '').strip().lstrip('@').lower()
+    return username if USERNAME_RE.match(username) else None
+
+
+def _cache_key(username):
+    return f'core:ig_lookup:{username}'
+
+
+def _compact(profile):
+    """The fields the signup form fills in, under the names custom.js uses"""
+    return {
+        'username': profile.get('username', ''),
+        'full_name': profile.get('full_name', ''),
+        'bio': profile.get('biography', ''),
+        'follower_count': profile.get('follower_count', 0),
+        'following_count': profile.get('following_count', 0),
+        'post_count': profile.get('media_count', 0),
+        'engagement_rate': profile.get('engagement_rate', 0),
+        'profile_pic_url': profile.get('profile_pic_url', ''),
+        'is_verified': profile.get('is_verified', False),
+        'is_private': profile.get('is_private', False),
+    }
+
+
+def _build_entry(username, profile):
+    if profile:
+        body = {'success': True, 'data': _compact(profile)}
+    else:
+        body = {'success': False, 'message': f'Could not find Instagram profile @{username}'}
+    content = json.dumps(body, separators=(',', ':')).encode('utf-8')
+    return {
+        'found': bool(profile),
+        'content': content,
+        'etag': '"%s"' % hashlib.sha1(content).hexdigest()[:20],
+    }
+
+
+def client_address(request):
+    """
+    The address the outermost trusted proxy saw the request come from, or
+    REMOTE_ADDR when there are none. Entries to the left of it in
+    X-Forwarded-For are whatever the client sent.
+    """
+    proxies = settings.HAIPCLUB_SETTINGS.get('TRUSTED_PROXY_COUNT', 0)
+    forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    if proxies and len(forwarded) >= proxies:
+        return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+def allow_client_lookup(client_id):
+    """Throttle uncached lookups (which cost a RocketAPI call) per client"""
+    return cache.add(f'core:ig_lookup:client:{client_id}', 1, CLIENT_LOOKUP_INTERVAL)
+
+
+def get_cached_lookup(username):
+    return caches['profiles'].get(_cache_key(username))
+
+
+def _fetch(username):
+    entry = _build_entry(username, instagram_service.get_profile_info(username))
+    caches['profiles'].set(_cache_key(username), entry, PROFILE_CACHE_TTL if entry['found'] else NEGATIVE_CACHE_TTL)
+    return entry
+
+
+def _fetch_once(username):
+    """Fetch unless another process already is; then wait for its result"""
+    lock_key = f'{_cache_key(username)}:lock'
+    if cache.add(lock_key, 1, LOOKUP_LOCK_TTL):
+        try:
+            return _fetch(username)
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + LOOKUP_LOCK_TTL
+    while time.monotonic() < deadline:
+        time.sleep(LOOKUP_POLL_INTERVAL)
+        entry = get_cached_lookup(username)
+        if entry is not None:
+            return entry
+        if cache.get(lock_key) is None:
+            break
+    return _fetch(username)
+
+
+def lookup_profile(username):
+    """
+    Cached lookup entry {'found', 'content', 'etag'} for a normalized
+    username, calling RocketAPI at most once per username at a time.
+    """
+    entry = get_cached_lookup(username)
+    if entry is not None:
+        return entry
+
+    with _inflight_lock:
+        done = _inflight.get(username)
+        leader = done is None
+        if leader:
+            done = _inflight[username] = threading.Event()
+
+    if not leader:
+        done.wait(LOOKUP_LOCK_TTL)
+        entry = get_cached_lookup(username)
+        return entry if entry is not None else _fetch_once(username)
+
+    try:
+        return _fetch_once(username)
+    finally:
+        with _inflight_lock:
+            del _inflight[username]
+        done.set()
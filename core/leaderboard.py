@@ -0,0 +1,168 @@
+"""
+Precomputed leaderboards.
+
+Each board is a short ranked list of LeaderboardEntry rows. add_xp and
+the redemption subscribers merge the affected influencer into the board
+(reading and rewriting at most BOARD_SIZES[board] rows), and the
+rebuild_leaderboards command recomputes every board from scratch to pick
+up anything the incremental path cannot see (deactivated users, refunds,
+members dropping out of a board). Rendering the leaderboard is a single
+query regardless of member count, and its result is kept in the
+'leaderboard' cache until the next board write commits.
+
+A merge reads the board and writes it back, so writers of one board and
+period are serialized on its LeaderboardLock row (SELECT ... FOR UPDATE;
+BEGIN IMMEDIATE does the same job on SQLite, see core.backends.sqlite3).
+The board is read after the lock is taken, so a merge always starts
+from the last committed rewrite rather than overwriting it.
+"""
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import InfluencerProfile, Redemption, LeaderboardEntry, LeaderboardLock
+
+BOARD_SIZES = {
+    'top_xp': 10,
+    'top_spenders': 10,
+    'elite_members': 20,
+}
+
+LEADERBOARDS_CACHE_KEY = 'core:leaderboards'
+
+
+def current_period(date=None):
+    """Period key for monthly boards"""
+    return (date or timezone.localdate()).strftime('%Y-%m')
+
+
+def month_start(date=None):
+    """Aware datetime for local midnight on the first of the month"""
+    date = date or timezone.localdate()
+    return timezone.make_aware(datetime(date.year, date.month, 1))
+
+
+def invalidate_leaderboards():
+    caches['leaderboard'].delete(LEADERBOARDS_CACHE_KEY)
+
+
+def _lock_board(board, period):
+    """Wait for and hold the board's lock until the transaction ends"""
+    LeaderboardLock.objects.bulk_create([LeaderboardLock(board=board, period=period)], ignore_conflicts=True)
+    LeaderboardLock.objects.select_for_update().get(board=board, period=period)
+
+
+def _write_board(board, period, ranked):
+    """Replace a board's rows; the caller holds its lock"""
+    LeaderboardEntry.objects.filter(board=board, period=period).delete()
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(board=board, period=period, rank=rank, influencer_id=influencer_id, score=score)
+        for rank, (influencer_id, score) in enumerate(ranked, start=1)
+    ])
+    transaction.on_commit(invalidate_leaderboards)
+
+
+def _merge(board, period, influencer_id, score):
+    """Move one influencer within a board (score=None removes them)"""
+    size = BOARD_SIZES[board]
+    with transaction.atomic():
+        _lock_board(board, period)
+        scored = dict(
+            LeaderboardEntry.objects.filter(board=board, period=period).values_list('influencer_id', 'score')
+        )
+
+        if score is None:
+            if influencer_id not in scored:
+                return
+            del scored[influencer_id]
+        else:
+            score = Decimal(score)
+            if influencer_id not in scored and len(scored) >= size and score <= min(scored.values()):
+                return
+            if scored.get(influencer_id) == score:
+                return
+            scored[influencer_id] = score
+
+        ranked = sorted(scored.items(), key=lambda item: (-item[1], item[0]))[:size]
+        _write_board(board, period, ranked)
+
+
+def record_xp(profile, old_tier=None):
+    """Update the XP and elite boards after add_xp"""
+    if not profile.user.is_active:
+        return
+    _merge('top_xp', '', profile.pk, profile.xp_points)
+    if profile.tier == 'elite':
+        _merge('elite_members', '', profile.pk, profile.xp_points)
+    elif old_tier == 'elite':
+        _merge('elite_members', '', profile.pk, None)
+
+
+def record_spend(influencer_id, date=None):
+    """Update the monthly spenders board after a confirmed redemption"""
+    date = date or timezone.localdate()
+    monthly_total = Redemption.objects.filter(
+        influencer_id=influencer_id,
+        status='confirmed',
+        created_at__gte=month_start(date)
+    ).aggregate(total=Sum('amount'))['total'] or 0
+    _merge('top_spenders', current_period(date), influencer_id, monthly_total)
+
+
+def rebuild_leaderboards(date=None):
+    """Recompute every board from the source tables"""
+    active = InfluencerProfile.objects.filter(user__is_active=True)
+
+    top_xp = active.order_by('-xp_points', 'pk').values_list('pk', 'xp_points')[:BOARD_SIZES['top_xp']]
+
+    elite = active.filter(tier='elite').order_by('-xp_points', 'pk').values_list(
+        'pk', 'xp_points'
+    )[:BOARD_SIZES['elite_members']]
+
+    spenders = Redemption.objects.filter(
+        status='confirmed',
+        created_at__gte=month_start(date),
+        influencer__user__is_active=True
+    ).values('influencer_id').annotate(total=Sum('amount')).order_by('-total', 'influencer_id')
+
+    boards = [
+        ('top_xp', '', top_xp),
+        ('elite_members', '', elite),
+        ('top_spenders', current_period(date), spenders.values_list('influencer_id', 'total')[:BOARD_SIZES['top_spenders']]),
+    ]
+    for board, period, ranked in boards:
+        # Evaluated under the board's lock, so no merge lands in between
+        with transaction.atomic():
+            _lock_board(board, period)
+            _write_board(board, period, list(ranked))
+
+
+def get_leaderboards():
+    """
+    Return {board: [InfluencerProfile, ...]} in rank order, with
+    leaderboard_rank and leaderboard_score set on each profile.
+    """
+    period = current_period()
+    cached = caches['leaderboard'].get(LEADERBOARDS_CACHE_KEY)
+    # The spenders board is monthly, so a cached copy from last month is stale
+    if cached is not None and cached['period'] == period:
+        return cached['boards']
+
+    entries = LeaderboardEntry.objects.filter(
+        Q(period='') | Q(period=period)
+    ).select_related('influencer__user').order_by('board', 'rank')
+
+    boards = defaultdict(list)
+    for entry in entries:
+        profile = entry.influencer
+        profile.leaderboard_rank = entry.rank
+        profile.leaderboard_score = entry.score
+        boards[entry.board].append(profile)
+    boards = {board: boards.get(board, []) for board in BOARD_SIZES}
+    caches['leaderboard'].set(LEADERBOARDS_CACHE_KEY, {'period': period, 'boards': boards})
+    return boards
@@ -0,0 +1,117 @@
+"""
+Logging building blocks used by settings.LOGGING.
+
+- QueuedWatchedFileHandler: the request thread only puts the record on an
+  in-memory queue; a QueueListener thread formats it and appends it to the
+  log file, so slow disks never add latency to a view. Every worker
+  process appends to the same file, which is why rotation is left to
+  logrotate: a size-based RotatingFileHandler in each worker would rename
+  the file independently and lose lines at rollover. WatchedFileHandler
+  reopens the file once logrotate has moved it away, so no copytruncate
+  or signal is needed.
+- JSONFormatter: one JSON object per line, with any `extra` fields kept.
+- SamplingFilter: passes only a share of a logger's low-level records
+  (e.g. the per-request INFO lines from RocketAPI calls); warnings and
+  errors always pass.
+
+This module is imported while settings are being configured, so it must
+not import anything from Django that needs the app registry.
+"""
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep `rate` (0..1) of the records below `always_level`"""
+
+    def __init__(self, rate=1.0, always_level='WARNING', name=''):
+        super().__init__(name)
+        self.rate = float(rate)
+        self.always_level = logging.getLevelName(always_level) if isinstance(always_level, str) else always_level
+
+    def filter(self, record):
+        if record.levelno >= self.always_level:
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class QueuedWatchedFileHandler(QueueHandler):
+    """WatchedFileHandler whose writes happen on a background listener thread"""
+
+    def __init__(self, filename, encoding='utf-8'):
+        super().__init__(queue.SimpleQueue())
+        # Opened in append mode, so lines from several processes do not
+        # overwrite each other
+        self.target = WatchedFileHandler(filename, encoding=encoding, delay=True)
+        self._listener = None
+        self._pid = None
+        self._start_listener()
+
+    def _start_listener(self):
+        # Threads do not survive a fork, so each worker process starts its own
+        self.queue = queue.SimpleQueue()
+        self._listener = QueueListener(self.queue, self.target)
+        self._listener.start()
+        self._pid = os.getpid()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Resolve the message now (args may change after the call returns) but
+        # leave formatting to the target's formatter on the listener thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
+
+    def close(self):
+        """Drain the queue and close the file (called by logging.shutdown)"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+        self.target.close()
+        super().close()
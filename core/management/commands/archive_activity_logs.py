@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.partitions import (
+    month_floor, add_months, ensure_partitions, table_months,
+    restore_month, list_partitions, archive_month, is_partitioned
+)
+
+class Command(BaseCommand):
+    help = 'Rotate monthly ActivityLog partitions and archive old months to compressed JSONL (run monthly from cron)'
+
+    def add_arguments(self, parser):
+        haipclub_settings = settings.HAIPCLUB_SETTINGS
+        parser.add_argument(
+            '--keep-months',
+            type=int,
+            default=haipclub_settings.get('ACTIVITY_LOG_RETENTION_MONTHS', 12),
+            help='Months of activity to keep in the database; older months are archived and dropped',
+        )
+        parser.add_argument(
+            '--create-ahead',
+            type=int,
+            default=3,
+            help='PostgreSQL only: create partitions this many months ahead',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            help='Directory for the .jsonl.gz archives (defaults to ACTIVITY_LOG_ARCHIVE_DIR)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would happen without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        current_month = month_floor(timezone.now())
+        archive_cutoff = add_months(current_month, -max(options['keep_months'] - 1, 0))
+        dry_run = options['dry_run']
+        
+        if is_partitioned():
+            if dry_run:
+                self.stdout.write(f'Would ensure partitions through {add_months(current_month, options["create_ahead"]):%Y-%m}')
+            else:
+                for month in ensure_partitions(current_month, options['create_ahead']):
+                    self.stdout.write(f'Created partition for {month:%Y-%m}')
+            months = set(list_partitions())
+        else:
+            # SQLite keeps every retained month in the main table, where the
+            # app reads it; per-month tables only exist on the way to an archive
+            for month, table in list_partitions().items():
+                if month < archive_cutoff:
+                    continue
+                if dry_run:
+                    self.stdout.write(f'Would move {table} back into the main table')
+                else:
+                    moved = restore_month(month)
+                    self.stdout.write(f'Moved {moved} rows for {month:%Y-%m} back into the main table')
+            months = set(list_partitions()) | set(table_months())
+        
+        archived = 0
+        for month in sorted(months):
+            if month >= archive_cutoff:
+                continue
+            if dry_run:
+                self.stdout.write(f'Would archive and drop {month:%Y-%m}')
+                continue
+            path, count = archive_month(month, options['archive_dir'])
+            archived += 1
+            self.stdout.write(f'Archived {count} rows for {month:%Y-%m} to {path}')
+        
+        self.stdout.write(self.style.SUCCESS(f'Activity log rotation complete ({archived} months archived).'))
@@ -0,0 +1,131 @@
+import json
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core.caching import cache_config
+from core.fake_rocketapi import FakeRocketAPI
+from core.follower_fixtures import load_fixture, save_fixture, synthetic_fixture
+from core.services import InstagramService
+
+class Command(BaseCommand):
+    help = (
+        'Time the follower-analysis engine (location matching, fake-follower scoring, gender '
+        'inference and full analyze_comprehensive_followers runs against a local fake RocketAPI) '
+        'in followers/sec, and compare with a saved baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixture', help='Follower fixture JSON to use instead of synthetic followers')
+        parser.add_argument('--followers', type=int, default=5000, help='Synthetic followers to generate')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic followers')
+        parser.add_argument('--save-fixture', help='Write the synthetic fixture to this path')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark; the fastest counts')
+        parser.add_argument('--output', help='Write results (with the current commit) to this JSON file')
+        parser.add_argument('--baseline', help='Results file from an earlier run to compare against')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=10.0,
+            help='Percent slowdown against the baseline reported as a regression',
+        )
+
+    def handle(self, *args, **options):
+        if options['fixture']:
+            fixture = load_fixture(options['fixture'])
+        else:
+            fixture = synthetic_fixture(options['followers'], seed=options['seed'])
+            if options['save_fixture']:
+                save_fixture(fixture, options['save_fixture'])
+        followers = fixture['followers']
+        if not followers:
+            raise CommandError('The fixture has no followers')
+
+        service = InstagramService()
+        service.FOLLOWER_PAGE_DELAY = 0
+        benchmarks = [
+            ('location_match', lambda: self._match_locations(service, followers)),
+            ('fake_follower', lambda: [service._is_fake_follower(user) for user in followers]),
+            ('gender', lambda: [service._infer_gender(user) for user in followers]),
+        ]
+
+        results = {}
+        self.stdout.write(f'{len(followers)} followers, best of {options["repeat"]} runs')
+        self.stdout.write(f'{"benchmark":<16} {"followers/sec":>14} {"ms/run":>10}')
+        for name, run in benchmarks:
+            results[name] = self._time(run, len(followers), options['repeat'])
+            self._report(name, results[name], len(followers))
+
+        # Profile lookups go to a private in-memory cache, not the shared one
+        with override_settings(CACHES=cache_config(settings.BASE_DIR, {'CACHE_BACKEND': 'locmem'})):
+            with FakeRocketAPI(fixture) as server:
+                service.BASE_URL = server.url
+                username = fixture['profile']['username']
+
+                def analyze():
+                    result = service.analyze_comprehensive_followers(username, sample_size=len(followers))
+                    if result['status'] != 'success':
+                        raise CommandError(f'Analysis failed: {result.get("message")}')
+
+                results['full_analysis'] = self._time(analyze, len(followers), options['repeat'])
+                self._report('full_analysis', results['full_analysis'], len(followers))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'commit': self._commit(),
+                    'followers': len(followers),
+                    'results': results,
+                }, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+        if options['baseline']:
+            self._compare(results, options['baseline'], options['threshold'])
+
+    def _match_locations(self, service, followers):
+        for user in followers:
+            for criteria in service.city_criteria.values():
+                service._check_location_match(user, criteria['zip_codes'], criteria['keywords'])
+
+    def _time(self, run, count, repeat):
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return round(count / best, 1)
+
+    def _report(self, name, per_second, count):
+        self.stdout.write(f'{name:<16} {per_second:>14,.0f} {count / per_second * 1000:>10.1f}')
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _compare(self, results, path, threshold):
+        with open(path) as f:
+            baseline = json.load(f)
+        self.stdout.write(f'Compared with {baseline.get("commit") or path}:')
+
+        regressions = []
+        for name, per_second in results.items():
+            before = baseline['results'].get(name)
+            if not before:
+                continue
+            change = (per_second - before) / before * 100
+            self.stdout.write(f'{name:<16} {before:>14,.0f} -> {per_second:,.0f} ({change:+.1f}%)')
+            if change < -threshold:
+                regressions.append(name)
+
+        if regressions:
+            raise CommandError(f'Slower than the baseline by more than {threshold}%: {", ".join(regressions)}')
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
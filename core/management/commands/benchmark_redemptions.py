@@ -0,0 +1,148 @@
+import shutil
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+
+from core.db import get_sqlite_pragmas
+from core.models import User, InfluencerProfile, VenueProfile
+from core.redemptions import RedemptionError, redeem
+
+# What SQLite does without core.db's tuning (rollback journal, fsync per commit)
+SQLITE_DEFAULT_PRAGMAS = [
+    ('journal_mode', 'DELETE'),
+    ('synchronous', 'FULL'),
+]
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent redemption throughput on a scratch copy of the configured database. '
+        'Each redemption goes through core.redemptions.redeem(), the code behind process_redemption, '
+        'with event subscribers and activity logging done inline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent worker threads')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run each profile')
+        parser.add_argument('--influencers', type=int, default=50, help='Influencers redeeming in parallel')
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='On SQLite, also run with default pragmas (no WAL, synchronous=FULL) for comparison',
+        )
+
+    def handle(self, *args, **options):
+        profiles = []
+        if connection.vendor == 'sqlite':
+            if options['compare']:
+                profiles.append(('sqlite (default pragmas)', SQLITE_DEFAULT_PRAGMAS))
+            profiles.append(('sqlite (tuned)', get_sqlite_pragmas()))
+        else:
+            profiles.append((connection.vendor, None))
+
+        self.stdout.write(
+            f'{"profile":<26} {"workers":>7} {"ok":>7} {"failed":>7} {"per sec":>9} {"p50 ms":>8} {"p95 ms":>8}'
+        )
+        for label, pragmas in profiles:
+            result = self._run_profile(pragmas, options)
+            self.stdout.write(
+                f'{label:<26} {options["workers"]:>7} {result["ok"]:>7} {result["failed"]:>7} '
+                f'{result["per_second"]:>9.1f} {result["p50"]:>8.1f} {result["p95"]:>8.1f}'
+            )
+
+    def _run_profile(self, pragmas, options):
+        haipclub_settings = settings.HAIPCLUB_SETTINGS
+        saved = {key: haipclub_settings.get(key) for key in ('SQLITE_PRAGMAS', 'DOMAIN_EVENTS_ASYNC', 'ACTIVITY_LOG_ASYNC')}
+        haipclub_settings.update(DOMAIN_EVENTS_ASYNC=False, ACTIVITY_LOG_ASYNC=False)
+        if pragmas is not None:
+            haipclub_settings['SQLITE_PRAGMAS'] = pragmas
+
+        old_name = connection.settings_dict['NAME']
+        # QR images from the seeded profiles, and the SQLite file, go to a
+        # throwaway directory; SQLite gets a file rather than the in-memory
+        # test database so locking behaves as deployed
+        scratch_dir = tempfile.mkdtemp(prefix='haipclub-bench-')
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = f'{scratch_dir}/bench.sqlite3'
+        try:
+            with override_settings(MEDIA_ROOT=scratch_dir):
+                connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                try:
+                    venue, influencers = self._seed(options['influencers'])
+                    return self._hammer(venue, influencers, options['workers'], options['duration'])
+                finally:
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            if connection.vendor == 'sqlite':
+                connection.settings_dict['TEST']['NAME'] = None
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+            haipclub_settings.update(saved)
+
+    def _seed(self, count):
+        venue_user = User.objects.create_user('bench_venue', password=None, role='venue')
+        venue = VenueProfile.objects.get(user=venue_user)
+        venue.venue_name = 'Benchmark Venue'
+        venue.save()
+
+        influencers = []
+        for n in range(count):
+            user = User.objects.create_user(f'bench_influencer_{n}', password=None, role='influencer')
+            # Signup fills in the handle right after the profile is created;
+            # until then the next profile's blank handle would collide
+            InfluencerProfile.objects.filter(user=user).update(
+                instagram_username=f'bench_influencer_{n}',
+                current_balance=Decimal('1000000'),
+            )
+            influencers.append((user.pk, user.influencer_profile.qr_code_token))
+        return venue, influencers
+
+    def _hammer(self, venue, influencers, workers, duration):
+        latencies = []
+        failures = []
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def work(worker):
+            mine, failed = [], 0
+            n = worker
+            try:
+                while time.monotonic() < deadline:
+                    started = time.perf_counter()
+                    user_id, qr_token = influencers[n % len(influencers)]
+                    try:
+                        redeem(venue, user_id, qr_token, Decimal('12.50'))
+                        mine.append((time.perf_counter() - started) * 1000)
+                    except (OperationalError, RedemptionError):
+                        failed += 1
+                    n += workers
+            finally:
+                connection.close()
+                with lock:
+                    latencies.extend(mine)
+                    failures.append(failed)
+
+        threads = [threading.Thread(target=work, args=(worker,)) for worker in range(workers)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        latencies.sort()
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else 0.0
+
+        return {
+            'ok': len(latencies),
+            'failed': sum(failures),
+            'per_second': len(latencies) / elapsed,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+        }
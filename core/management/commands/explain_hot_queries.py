@@ -0,0 +1,132 @@
+import re
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from core.models import (
+    InfluencerProfile, Achievement, Redemption, ActivityLog,
+    VenueDailyStats, LeaderboardEntry, PlatformCounter
+)
+from core.leaderboard import current_period, month_start
+from core.venue_stats import local_day_bounds
+
+# Plan lines that read a whole table rather than an index
+SEQ_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!.*\bINDEX\b)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+def get_hot_queries():
+    """
+    (name, queryset, allow_scan) for the queries behind the dashboards,
+    leaderboard and redemption endpoints. allow_scan marks queries over
+    tables that are small by design.
+    """
+    influencer_id = 0
+    venue_id = 0
+    user_id = uuid.uuid4()
+    day_start, day_end = local_day_bounds(timezone.localdate())
+
+    return [
+        # QR scan / process_redemption
+        ('qr_scan_lookup', InfluencerProfile.objects.filter(
+            user_id=user_id, qr_code_token='haip.token', qr_code_active=True
+        ), False),
+        # InfluencerDashboardView
+        ('influencer_recent_redemptions', Redemption.objects.filter(
+            influencer_id=influencer_id, status='confirmed'
+        ).order_by('-created_at')[:5], False),
+        ('influencer_recent_achievements', Achievement.objects.filter(
+            influencer_id=influencer_id
+        ).order_by('-earned_at')[:5], False),
+        # VenueDashboardView
+        ('venue_recent_redemptions', Redemption.objects.filter(
+            venue_id=venue_id, status='confirmed'
+        ).order_by('-created_at')[:10], False),
+        ('venue_daily_stats', VenueDailyStats.objects.filter(
+            venue_id=venue_id, date=timezone.localdate()
+        ), False),
+        ('venue_day_aggregate', Redemption.objects.filter(
+            venue_id=venue_id, status='confirmed',
+            created_at__gte=day_start, created_at__lt=day_end
+        ), False),
+        # LeaderboardView and rebuild_leaderboards
+        ('leaderboard_read', LeaderboardEntry.objects.filter(
+            Q(period='') | Q(period=current_period())
+        ).order_by('board', 'rank'), True),
+        ('leaderboard_top_xp', InfluencerProfile.objects.order_by('-xp_points', 'pk')[:10], False),
+        ('leaderboard_elite', InfluencerProfile.objects.filter(
+            tier='elite'
+        ).order_by('-xp_points', 'pk')[:20], False),
+        ('leaderboard_monthly_spend', Redemption.objects.filter(
+            influencer_id=influencer_id, status='confirmed', created_at__gte=month_start()
+        ), False),
+        ('leaderboard_month_spenders', Redemption.objects.filter(
+            status='confirmed', created_at__gte=month_start()
+        ).values('influencer_id').annotate(total=Sum('amount')).order_by('-total')[:10], False),
+        # HomeView
+        ('platform_counters', PlatformCounter.objects.all(), True),
+        # Activity history
+        ('user_activity_log', ActivityLog.objects.filter(
+            user_id=user_id
+        ).order_by('-created_at')[:20], False),
+        ('admin_activity_log', ActivityLog.objects.order_by('-created_at')[:100], False),
+    ]
+
+def find_seq_scans(vendor, plan):
+    """Tables read by sequential scan in an EXPLAIN output"""
+    pattern = SEQ_SCAN_PATTERNS.get(vendor)
+    if not pattern:
+        return []
+    return [match.group(1) for line in plan.splitlines() for match in [pattern.search(line)] if match]
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot dashboard, leaderboard and redemption queries and flag sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail-on-seqscan',
+            action='store_true',
+            help='Exit with an error if any query not allowed to scan does a sequential scan (for CI)',
+        )
+        parser.add_argument(
+            '--disable-seqscan',
+            action='store_true',
+            help='PostgreSQL only: SET LOCAL enable_seqscan = off so plans on tiny CI tables still show index usage',
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SEQ_SCAN_PATTERNS:
+            self.stdout.write(self.style.WARNING(f'Sequential scan detection not supported for {vendor}; printing plans only.'))
+
+        flagged = []
+        checked = 0
+        with transaction.atomic():
+            if options['disable_seqscan'] and vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset, allow_scan in get_hot_queries():
+                plan = queryset.explain()
+                scans = find_seq_scans(vendor, plan)
+                checked += 1
+
+                if scans and not allow_scan:
+                    flagged.append(name)
+                    self.stdout.write(self.style.ERROR(f'SEQ SCAN  {name}: {", ".join(scans)}'))
+                elif scans:
+                    self.stdout.write(f'scan ok   {name}: {", ".join(scans)} (small table)')
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'indexed   {name}'))
+
+                if options['verbosity'] >= 2:
+                    for line in plan.splitlines():
+                        self.stdout.write(f'    {line}')
+
+        if flagged and options['fail_on_seqscan']:
+            raise CommandError(f'{len(flagged)} hot queries use sequential scans: {", ".join(flagged)}')
+        self.stdout.write(f'Checked {checked} queries on {vendor}, {len(flagged)} flagged.')
@@ -0,0 +1,43 @@
+import gzip
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import REPORTS, export_csv, export_filename, parse_date_range, redemptions_for_export
+from core.models import Redemption, VenueProfile
+
+class Command(BaseCommand):
+    help = 'Write a redemption or settlement CSV export to a gzip-compressed file, streamed in constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('report', choices=sorted(REPORTS), help='Which export to write')
+        parser.add_argument('--venue', type=int, help='VenueProfile id; all venues when omitted')
+        parser.add_argument('--start', help='First local date to include (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last local date to include (YYYY-MM-DD)')
+        parser.add_argument('--status', choices=[choice for choice, _ in Redemption.STATUS_CHOICES])
+        parser.add_argument('--output', help='File to write (defaults to <report>_<venue>_<dates>.csv.gz here)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched and written per chunk')
+
+    def handle(self, *args, **options):
+        venue = None
+        if options['venue'] is not None:
+            venue = VenueProfile.objects.filter(pk=options['venue']).first()
+            if venue is None:
+                raise CommandError(f'No venue with id {options["venue"]}')
+        try:
+            start, end = parse_date_range(options['start'], options['end'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = options['report']
+        path = options['output'] or export_filename(report, venue, start, end) + '.gz'
+        queryset = redemptions_for_export(venue, start, end, options['status'])
+
+        started = time.perf_counter()
+        with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+            for chunk in export_csv(report, queryset, max(options['chunk_size'], 1)):
+                f.write(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {path} ({os.path.getsize(path) / 1024:,.0f} KiB) in {time.perf_counter() - started:.1f}s.'
+        ))
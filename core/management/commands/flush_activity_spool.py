@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.activity import QUARANTINE_FILE, replay_spool
+
+class Command(BaseCommand):
+    help = 'Write activity log rows spooled to disk by the buffered writer into the database'
+
+    def handle(self, *args, **options):
+        written, failing, quarantined = replay_spool()
+        
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} spooled activity log rows.'))
+        if failing:
+            self.stdout.write(self.style.WARNING(f'{failing} rows could not be written and remain spooled.'))
+        if quarantined:
+            self.stdout.write(self.style.WARNING(f'{quarantined} unreadable lines were moved to {QUARANTINE_FILE}.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.events import dispatch_due
+from core.models import PendingEventBatch
+
+class Command(BaseCommand):
+    help = (
+        'Handle redemption events whose subscriber failed or whose process stopped before handling them '
+        '(run every few minutes from cron)'
+    )
+
+    def handle(self, *args, **options):
+        handled, failed = dispatch_due()
+        
+        self.stdout.write(self.style.SUCCESS(f'Handled {handled} pending event batches.'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} batches failed again and will be retried.'))
+        
+        waiting = PendingEventBatch.objects.filter(attempts__gt=0).count()
+        if waiting:
+            self.stdout.write(self.style.WARNING(f'{waiting} failed batches in total; see the admin for their errors.'))
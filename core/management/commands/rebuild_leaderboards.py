@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.leaderboard import rebuild_leaderboards, get_leaderboards
+
+class Command(BaseCommand):
+    help = 'Recompute all leaderboard snapshots (run periodically, e.g. every 15 minutes from cron)'
+
+    def handle(self, *args, **options):
+        rebuild_leaderboards()
+        
+        for board, profiles in get_leaderboards().items():
+            self.stdout.write(f'{board}: {len(profiles)} entries')
+        self.stdout.write(self.style.SUCCESS('Leaderboards rebuilt.'))
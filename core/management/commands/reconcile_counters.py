@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.counters import reconcile_platform_counters
+from core.venue_stats import rebuild_venue_daily_stats
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized homepage counters and venue daily stats (run periodically, e.g. hourly from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--venue-days',
+            type=int,
+            default=2,
+            help='Rebuild venue daily stats for this many recent days (0 for full history)',
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile_platform_counters()
+        
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Platform counters are up to date.'))
+        else:
+            for key, (old, new) in drift.items():
+                self.stdout.write(f'{key}: {old} -> {new}')
+            self.stdout.write(self.style.SUCCESS(f'Reconciled {len(drift)} platform counters.'))
+        
+        venue_days = options['venue_days']
+        since = timezone.localdate() - timedelta(days=venue_days - 1) if venue_days > 0 else None
+        rows = rebuild_venue_daily_stats(since=since)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} venue daily stats rows.'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.allowances import due_for_reset, reset_allowances
+
+class Command(BaseCommand):
+    help = 'Reset balances for every influencer not yet reset this month (schedule daily, e.g. "5 0 * * *" in cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Profiles reset per UPDATE',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many profiles are due',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f'{due_for_reset().count()} influencers are due for an allowance reset.')
+            return
+        
+        count = reset_allowances(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reset allowance for {count} influencers.'))
@@ -0,0 +1,38 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from core.leaderboard import rebuild_leaderboards
+from core.tiering import get_tier_thresholds, is_promotion, pending_tier_changes, retier
+
+class Command(BaseCommand):
+    help = 'Re-tier every influencer against the current TIER_THRESHOLDS (run after changing them)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the tier changes that would be made',
+        )
+
+    def handle(self, *args, **options):
+        thresholds = get_tier_thresholds()
+        self.stdout.write('Thresholds: ' + ', '.join(f'{tier} >= {xp}' for tier, xp in thresholds.items()))
+
+        if options['dry_run']:
+            changes = pending_tier_changes(thresholds=thresholds)
+        else:
+            changes = retier(thresholds=thresholds)
+
+        for (old_tier, new_tier), count in sorted(Counter(changes.values()).items()):
+            self.stdout.write(f'  {old_tier} -> {new_tier}: {count}')
+
+        promoted = sum(is_promotion(old, new) for old, new in changes.values())
+        demoted = len(changes) - promoted
+        if options['dry_run']:
+            self.stdout.write(f'{promoted} influencers would be promoted and {demoted} demoted.')
+            return
+
+        if changes:
+            rebuild_leaderboards()
+        self.stdout.write(self.style.SUCCESS(f'Promoted {promoted} and demoted {demoted} influencers.'))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+
+from core.fake_rocketapi import DEFAULT_PAGE_SIZE, FakeRocketAPI
+from core.follower_fixtures import load_fixture, synthetic_fixture
+
+class Command(BaseCommand):
+    help = (
+        'Serve a local RocketAPI stand-in (see core/fake_rocketapi.py) with configurable latency, '
+        'rate limiting and error injection, for offline integration and load tests'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--fixture', help='Follower fixture JSON to serve instead of synthetic followers')
+        parser.add_argument('--followers', type=int, default=5000, help='Synthetic followers to serve')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic data and injected failures')
+        parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help='Most followers per page')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Added to every response')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Random extra latency, up to this much')
+        parser.add_argument('--rate-limit', type=float, help='Requests per second per API key; excess get 429')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 5xx')
+        parser.add_argument(
+            '--hang-rate',
+            type=float,
+            default=0.0,
+            help='Share of requests that hang for --hang-seconds without answering',
+        )
+        parser.add_argument('--hang-seconds', type=float, default=35, help='Longer than the 30s client timeout')
+        parser.add_argument('--malformed-rate', type=float, default=0.0, help='Share of requests answered with broken JSON')
+
+    def handle(self, *args, **options):
+        if options['fixture']:
+            fixture = load_fixture(options['fixture'])
+        else:
+            fixture = synthetic_fixture(options['followers'], seed=options['seed'])
+
+        server = FakeRocketAPI(
+            fixture,
+            host=options['host'],
+            port=options['port'],
+            page_size=options['page_size'],
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            rate_limit=options['rate_limit'],
+            error_rate=options['error_rate'],
+            hang_rate=options['hang_rate'],
+            malformed_rate=options['malformed_rate'],
+            hang_seconds=options['hang_seconds'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Fake RocketAPI serving {len(fixture["followers"])} followers of '
+            f'@{fixture["profile"]["username"]} at {server.url}'
+        ))
+        self.stdout.write(f'  Django:  ROCKET_API_BASE_URL={server.url} python manage.py runserver')
+        self.stdout.write(f'  Script:  ROCKETAPI_BASE_URL={server.url} python analyze_dual_location_rocketapi.py')
+        self.stdout.write(f'  Stats:   {server.url}/_stats')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
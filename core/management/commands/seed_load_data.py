@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.synthetic import DEFAULT_PASSWORD, clear, generate
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic influencers, venues, redemptions, achievements and activity logs '
+        'with bulk inserts, for load testing dashboards and leaderboards at production scale'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--influencers', type=int, default=1000, help='Influencers to create')
+        parser.add_argument('--venues', type=int, default=50, help='Venues to create')
+        parser.add_argument(
+            '--redemptions-per-member',
+            type=float,
+            default=8,
+            help='Mean redemptions per influencer (heavy-tailed)',
+        )
+        parser.add_argument('--days', type=int, default=180, help='Days of history to spread activity over')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Influencers written per transaction')
+        parser.add_argument('--prefix', default='load', help='Username prefix marking the generated accounts')
+        parser.add_argument('--seed', type=int, help='Random seed, for repeatable data sets')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete previously generated accounts with this prefix first',
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['clear']:
+            deleted = clear(prefix)
+            self.stdout.write(f'Deleted {deleted} rows from earlier runs.')
+
+        started = time.monotonic()
+
+        def progress(totals):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{totals["users"] - totals["venues"]}/{options["influencers"]} influencers, '
+                f'{totals["redemptions"]} redemptions ({elapsed:.0f}s)'
+            )
+
+        try:
+            totals = generate(
+                influencers=options['influencers'],
+                venues=options['venues'],
+                redemptions_per_member=options['redemptions_per_member'],
+                days=options['days'],
+                batch_size=options['batch_size'],
+                prefix=prefix,
+                seed=options['seed'],
+                progress=progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        summary = ', '.join(f'{value} {key.replace("_", " ")}' for key, value in totals.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {summary} in {time.monotonic() - started:.0f}s. '
+            f'Accounts are {prefix}_influencer_N / {prefix}_venue_N with password "{DEFAULT_PASSWORD}".'
+        ))
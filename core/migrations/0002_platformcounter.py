@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:46
+
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    InfluencerProfile = apps.get_model('core', 'InfluencerProfile')
+    VenueProfile = apps.get_model('core', 'VenueProfile')
+    Redemption = apps.get_model('core', 'Redemption')
+    PlatformCounter = apps.get_model('core', 'PlatformCounter')
+    
+    PlatformCounter.objects.bulk_create([
+        PlatformCounter(key='total_influencers', value=InfluencerProfile.objects.count()),
+        PlatformCounter(key='total_venues', value=VenueProfile.objects.count()),
+        PlatformCounter(key='total_redemptions', value=Redemption.objects.filter(status='confirmed').count()),
+        PlatformCounter(key='elite_members', value=InfluencerProfile.objects.filter(tier='elite').count()),
+    ])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(choices=[('total_influencers', 'Influencers'), ('total_venues', 'Venues'), ('total_redemptions', 'Confirmed Redemptions'), ('elite_members', 'Elite Members')], max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
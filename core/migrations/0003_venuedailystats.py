@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_venue_daily_stats(apps, schema_editor):
+    Redemption = apps.get_model('core', 'Redemption')
+    VenueDailyStats = apps.get_model('core', 'VenueDailyStats')
+    
+    rows = Redemption.objects.filter(status='confirmed').annotate(
+        day=TruncDate('created_at')
+    ).values('venue_id', 'day').annotate(
+        redemption_count=Count('id'),
+        total_amount=Sum('amount')
+    ).order_by()
+    
+    VenueDailyStats.objects.bulk_create([
+        VenueDailyStats(
+            venue_id=row['venue_id'],
+            date=row['day'],
+            redemption_count=row['redemption_count'],
+            total_amount=row['total_amount']
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_platformcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('redemption_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.venueprofile')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('venue', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_venue_daily_stats, migrations.RunPython.noop),
+    ]
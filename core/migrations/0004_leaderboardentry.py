@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_venuedailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('top_xp', 'Top XP'), ('top_spenders', 'Top Spenders This Month'), ('elite_members', 'Elite Members')], max_length=30)),
+                ('period', models.CharField(blank=True, max_length=7)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('influencer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='core.influencerprofile')),
+            ],
+            options={
+                'ordering': ['board', 'period', 'rank'],
+                'unique_together': {('board', 'period', 'influencer'), ('board', 'period', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['influencer', '-earned_at'], name='core_ach_infl_earned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['user', '-created_at'], name='core_log_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['-created_at'], name='core_log_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='influencerprofile',
+            index=models.Index(fields=['tier', '-xp_points'], name='core_infl_tier_xp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='influencerprofile',
+            index=models.Index(fields=['-xp_points'], name='core_infl_xp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='influencerprofile',
+            index=models.Index(fields=['qr_code_active'], name='core_infl_qr_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='redemption',
+            index=models.Index(fields=['venue', 'status', '-created_at'], name='core_red_venue_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='redemption',
+            index=models.Index(fields=['influencer', 'status', '-created_at'], name='core_red_infl_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='redemption',
+            index=models.Index(fields=['status', 'created_at'], name='core_red_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.db import migrations
+
+
+def partition_activity_log(apps, schema_editor):
+    """
+    Convert core_activitylog into a RANGE-partitioned table on PostgreSQL.
+    SQLite keeps the plain table and uses per-month archive tables instead
+    (see core.partitions).
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    schema_editor.execute('ALTER TABLE core_activitylog RENAME TO core_activitylog_legacy')
+    schema_editor.execute("""
+        CREATE TABLE core_activitylog (
+            id bigint GENERATED BY DEFAULT AS IDENTITY,
+            user_id uuid NOT NULL REFERENCES core_user (id) DEFERRABLE INITIALLY DEFERRED,
+            action_type varchar(30) NOT NULL,
+            description text NOT NULL,
+            metadata jsonb NOT NULL,
+            ip_address inet NULL,
+            user_agent text NOT NULL,
+            created_at timestamp with time zone NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    schema_editor.execute('CREATE TABLE core_activitylog_pdefault PARTITION OF core_activitylog DEFAULT')
+    
+    # One partition per UTC month from the oldest row through three months ahead
+    # (params=None keeps the driver from interpreting format()'s %I/%L)
+    schema_editor.execute("""
+        DO $$
+        DECLARE
+            month date;
+            last_month date;
+        BEGIN
+            SELECT date_trunc('month', COALESCE(MIN(created_at), now()) AT TIME ZONE 'UTC')::date
+              INTO month FROM core_activitylog_legacy;
+            last_month := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF core_activitylog FOR VALUES FROM (%L) TO (%L)',
+                    'core_activitylog_p' || to_char(month, 'YYYYMM'),
+                    (month::timestamp AT TIME ZONE 'UTC'),
+                    ((month + interval '1 month')::timestamp AT TIME ZONE 'UTC')
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END $$;
+    """, params=None)
+    
+    schema_editor.execute("""
+        INSERT INTO core_activitylog (id, user_id, action_type, description, metadata, ip_address, user_agent, created_at)
+        OVERRIDING SYSTEM VALUE
+        SELECT id, user_id, action_type, description, metadata, ip_address, user_agent, created_at
+        FROM core_activitylog_legacy
+    """)
+    schema_editor.execute("""
+        SELECT setval(pg_get_serial_sequence('core_activitylog', 'id'), COALESCE(MAX(id), 0) + 1, false)
+        FROM core_activitylog
+    """)
+    schema_editor.execute('DROP TABLE core_activitylog_legacy')
+    
+    # Recreate the indexes dropped with the legacy table (propagated to every partition)
+    schema_editor.execute('CREATE INDEX core_activitylog_user_id_idx ON core_activitylog (user_id)')
+    schema_editor.execute('CREATE INDEX core_log_user_created_idx ON core_activitylog (user_id, created_at DESC)')
+    schema_editor.execute('CREATE INDEX core_log_created_idx ON core_activitylog (created_at DESC)')
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('core', '0006_activitylog_event_time'),
+    ]
+    
+    operations = [
+        migrations.RunPython(partition_activity_log, migrations.RunPython.noop),
+    ]
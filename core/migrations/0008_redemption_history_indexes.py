@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_activitylog_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='redemption',
+            index=models.Index(fields=['influencer', '-created_at', '-id'], name='core_red_infl_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='redemption',
+            index=models.Index(fields=['venue', '-created_at', '-id'], name='core_red_venue_created_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_pendingeventbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('top_xp', 'Top XP'), ('top_spenders', 'Top Spenders This Month'), ('elite_members', 'Elite Members')], max_length=30)),
+                ('period', models.CharField(blank=True, max_length=7)),
+            ],
+            options={
+                'unique_together': {('board', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_leaderboardlock'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='activitylog',
+            name='core_log_user_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='core_log_user_created_idx'),
+        ),
+    ]
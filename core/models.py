@@ -1,16 +1,18 @@
 import uuid
-import secrets
 import qrcode
 from io import BytesIO
 from decimal import Decimal
 from datetime import datetime, timedelta
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.core.files import File
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from PIL import Image
 
+from .qr_tokens import make_qr_token, is_qr_token_valid
+from .events import RedemptionConfirmed, publish, redemption_event
+
 class User(AbstractUser):
     """Enhanced User model with role-based access"""
     ROLE_CHOICES = [
@@ -68,6 +70,13 @@ class InfluencerProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['tier', '-xp_points'], name='core_infl_tier_xp_idx'),
+            models.Index(fields=['-xp_points'], name='core_infl_xp_idx'),
+            models.Index(fields=['qr_code_active'], name='core_infl_qr_active_idx'),
+        ]
+    
     def save(self, *args, **kwargs):
         if not self.qr_code_token:
             self.qr_code_token = self.generate_qr_token()
@@ -78,19 +87,25 @@ class InfluencerProfile(models.Model):
             self.generate_qr_code()
     
     def generate_qr_token(self):
-        """Generate secure unique QR token"""
-        return f"haip_{self.user.id}_{secrets.token_urlsafe(32)}"
+        """Generate signed, self-verifying QR token (see core.qr_tokens)"""
+        return make_qr_token(self.user_id)
+    
+    def qr_token_expired(self):
+        """True if the current token is expired or not in the signed format"""
+        return not is_qr_token_valid(self.qr_code_token)
+    
+    def rotate_qr_code(self):
+        """Issue a fresh token and re-render the QR image"""
+        self.qr_code_token = self.generate_qr_token()
+        self.generate_qr_code()
+        self.save(update_fields=['qr_code_token', 'qr_code_image', 'updated_at'])
     
     def generate_qr_code(self):
         """Generate QR code image"""
+        # Only the signed token is encoded; tier and balance are looked up
+        # at scan time so the printed code never goes stale.
         qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr_data = {
-            'token': self.qr_code_token,
-            'influencer_id': str(self.user.id),
-            'tier': self.tier,
-            'balance': str(self.current_balance)
-        }
-        qr.add_data(str(qr_data))
+        qr.add_data(self.qr_code_token)
         qr.make(fit=True)
         
         img = qr.make_image(fill_color="black", back_color="white")
@@ -100,46 +115,42 @@ class InfluencerProfile(models.Model):
         self.qr_code_image.save(filename, File(buffer), save=False)
     
     def add_xp(self, points, reason=""):
-        """Add XP points and check for tier upgrades"""
-        self.xp_points += points
-        old_tier = self.tier
+        """Add XP points and move to the tier they earn"""
+        from .tiering import retier
+        from .leaderboard import record_xp
         
-        # Tier progression logic
-        if self.xp_points >= 10000:
-            self.tier = 'elite'
-        elif self.xp_points >= 5000:
-            self.tier = 'gold'
-        elif self.xp_points >= 1000:
-            self.tier = 'silver'
-        else:
-            self.tier = 'bronze'
+        # Incremented in the database, so concurrent XP from core.subscribers
+        # is not overwritten by this instance's copy
+        profiles = InfluencerProfile.objects.filter(pk=self.pk)
+        with transaction.atomic():
+            profiles.update(xp_points=models.F('xp_points') + points, updated_at=timezone.now())
+            # Tier upgrade achievements and the elite counter come with it
+            changes = retier(profiles)
+        self.refresh_from_db(fields=['xp_points', 'tier', 'updated_at'])
         
-        self.save()
-        
-        # Create achievement if tier upgraded
-        if old_tier != self.tier:
-            Achievement.objects.create(
-                influencer=self,
-                badge_type='tier_upgrade',
-                title=f"Upgraded to {self.get_tier_display()}",
-                description=f"Congratulations! You've reached {self.get_tier_display()} status.",
-                xp_reward=500
-            )
+        old_tier = changes[self.pk][0] if self.pk in changes else self.tier
+        record_xp(self, old_tier)
     
     def deduct_balance(self, amount):
-        """Deduct amount from balance"""
-        if self.current_balance >= amount:
-            self.current_balance -= amount
-            self.total_spent += amount
-            self.save()
-            return True
-        return False
+        """Deduct amount from balance; False if the balance is too low"""
+        # The check and the arithmetic happen in one UPDATE, against the
+        # balance as it is now rather than as this instance last saw it
+        deducted = InfluencerProfile.objects.filter(pk=self.pk, current_balance__gte=amount).update(
+            current_balance=models.F('current_balance') - amount,
+            total_spent=models.F('total_spent') + amount,
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['current_balance', 'total_spent', 'updated_at'])
+        return bool(deducted)
     
     def reset_monthly_allowance(self):
         """Reset monthly allowance"""
-        self.current_balance = self.monthly_allowance
-        self.last_allowance_reset = timezone.now()
-        self.save()
+        InfluencerProfile.objects.filter(pk=self.pk).update(
+            current_balance=models.F('monthly_allowance'),
+            last_allowance_reset=timezone.now(),
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['current_balance', 'last_allowance_reset', 'updated_at'])
     
     def get_tier_color(self):
         """Get tier color for UI"""
@@ -177,6 +188,40 @@ class VenueProfile(models.Model):
     def __str__(self):
         return self.venue_name
 
+class VenueDailyStats(models.Model):
+    """Per-venue, per-day rollup of confirmed redemptions"""
+    venue = models.ForeignKey(VenueProfile, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    redemption_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['venue', 'date']
+        ordering = ['-date']
+    
+    @classmethod
+    def record(cls, venue, date, amount, count=1):
+        """Atomically add a confirmed (or, with negatives, refunded) redemption"""
+        updated = cls.objects.filter(venue=venue, date=date).update(
+            redemption_count=models.F('redemption_count') + count,
+            total_amount=models.F('total_amount') + amount,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            stats, created = cls.objects.get_or_create(
+                venue=venue, date=date,
+                defaults={'redemption_count': count, 'total_amount': amount}
+            )
+            if not created:
+                cls.objects.filter(pk=stats.pk).update(
+                    redemption_count=models.F('redemption_count') + count,
+                    total_amount=models.F('total_amount') + amount
+                )
+    
+    def __str__(self):
+        return f"{self.venue.venue_name} - {self.date}"
+
 class Achievement(models.Model):
     """Gamification achievements and badges"""
     BADGE_TYPES = [
@@ -200,6 +245,9 @@ class Achievement(models.Model):
     
     class Meta:
         unique_together = ['influencer', 'badge_type']
+        indexes = [
+            models.Index(fields=['influencer', '-earned_at'], name='core_ach_infl_earned_idx'),
+        ]
     
     def __str__(self):
         return f"{self.influencer.user.username} - {self.title}"
@@ -233,38 +281,64 @@ class Redemption(models.Model):
     notes = models.TextField(blank=True)
     receipt_image = models.ImageField(upload_to='receipts/', blank=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['venue', 'status', '-created_at'], name='core_red_venue_status_idx'),
+            models.Index(fields=['influencer', 'status', '-created_at'], name='core_red_infl_status_idx'),
+            models.Index(fields=['status', 'created_at'], name='core_red_status_created_idx'),
+            # Keyset pagination of full history (core.pagination)
+            models.Index(fields=['influencer', '-created_at', '-id'], name='core_red_infl_created_idx'),
+            models.Index(fields=['venue', '-created_at', '-id'], name='core_red_venue_created_idx'),
+        ]
+    
     def save(self, *args, **kwargs):
-        if self.status == 'confirmed' and not self.confirmed_at:
+        newly_confirmed = self.status == 'confirmed' and not self.confirmed_at
+        if newly_confirmed:
             self.confirmed_at = timezone.now()
-            
-            # Award XP for redemption
-            self.influencer.add_xp(50, f"Redemption at {self.venue.venue_name}")
-            
-            # Update venue stats
-            self.venue.total_redemptions += 1
-            self.venue.total_redeemed_amount += self.amount
-            self.venue.save()
-            
-            # Check for first redemption achievement
-            if self.influencer.total_redemptions == 0:
-                Achievement.objects.get_or_create(
-                    influencer=self.influencer,
-                    badge_type='first_redemption',
-                    defaults={
-                        'title': 'First Redemption!',
-                        'description': 'Congratulations on your first redemption at a partner venue!',
-                        'xp_reward': 100
-                    }
-                )
-            
-            self.influencer.total_redemptions += 1
-            self.influencer.save()
         
         super().save(*args, **kwargs)
+        
+        if newly_confirmed:
+            # XP, venue stats, counters and leaderboards are applied by
+            # core.subscribers once the transaction commits
+            publish(redemption_event(RedemptionConfirmed, self))
     
     def __str__(self):
         return f"{self.influencer.user.username} - ${self.amount} at {self.venue.venue_name}"
 
+class LeaderboardEntry(models.Model):
+    """Precomputed leaderboard rank (see core.leaderboard)"""
+    BOARD_CHOICES = [
+        ('top_xp', 'Top XP'),
+        ('top_spenders', 'Top Spenders This Month'),
+        ('elite_members', 'Elite Members'),
+    ]
+    
+    board = models.CharField(max_length=30, choices=BOARD_CHOICES)
+    period = models.CharField(max_length=7, blank=True)  # 'YYYY-MM' for monthly boards
+    rank = models.PositiveIntegerField()
+    influencer = models.ForeignKey(InfluencerProfile, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    score = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['board', 'period', 'rank']
+        unique_together = [['board', 'period', 'rank'], ['board', 'period', 'influencer']]
+    
+    def __str__(self):
+        return f"{self.get_board_display()} #{self.rank} - {self.influencer.instagram_username}"
+
+class LeaderboardLock(models.Model):
+    """One row per board and period, locked while the board is rewritten (see core.leaderboard)"""
+    board = models.CharField(max_length=30, choices=LeaderboardEntry.BOARD_CHOICES)
+    period = models.CharField(max_length=7, blank=True)
+    
+    class Meta:
+        unique_together = [['board', 'period']]
+    
+    def __str__(self):
+        return f"{self.get_board_display()} {self.period}".strip()
+
 class ActivityLog(models.Model):
     """Comprehensive activity logging"""
     ACTION_TYPES = [
@@ -283,10 +357,15 @@ class ActivityLog(models.Model):
     metadata = models.JSONField(default=dict, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the buffered writer flushes it
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='core_log_user_created_idx'),
+            models.Index(fields=['-created_at'], name='core_log_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.get_action_type_display()}"
@@ -301,8 +380,53 @@ class SystemSettings(models.Model):
     def __str__(self):
         return f"{self.key}: {self.value}"
 
+class PlatformCounter(models.Model):
+    """Materialized platform-wide counters shown on the homepage"""
+    COUNTER_KEYS = [
+        ('total_influencers', 'Influencers'),
+        ('total_venues', 'Venues'),
+        ('total_redemptions', 'Confirmed Redemptions'),
+        ('elite_members', 'Elite Members'),
+    ]
+    
+    key = models.CharField(max_length=50, choices=COUNTER_KEYS, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @classmethod
+    def increment(cls, key, delta=1):
+        """Atomically adjust a counter; the row is created on first use"""
+        updated = cls.objects.filter(key=key).update(
+            value=models.F('value') + delta,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            counter, created = cls.objects.get_or_create(key=key, defaults={'value': delta})
+            if not created:
+                cls.objects.filter(key=key).update(value=models.F('value') + delta)
+    
+    def __str__(self):
+        return f"{self.key}: {self.value}"
+
+class PendingEventBatch(models.Model):
+    """
+    Outbox row: events one subscriber has yet to handle (see core.events).
+    Inserted in the transaction that published the events, deleted in the
+    transaction that applies the subscriber's updates.
+    """
+    handler = models.CharField(max_length=200)
+    event_type = models.CharField(max_length=50)
+    events = models.JSONField()
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    next_attempt_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    def __str__(self):
+        return f"{self.handler} ({len(self.events)} {self.event_type})"
+
 # Signal handlers for automatic achievements
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 @receiver(post_save, sender=User)
@@ -325,8 +449,45 @@ def create_user_profile(sender, instance, created, **kwargs):
             VenueProfile.objects.create(user=instance)
         
         # Log signup activity
-        ActivityLog.objects.create(
+        from .activity import log_activity
+        log_activity(
             user=instance,
             action_type='signup',
             description=f'New {instance.role} account created'
         )
+
+@receiver(post_save, sender=InfluencerProfile)
+@receiver(post_save, sender=VenueProfile)
+def count_new_profile(sender, instance, created, **kwargs):
+    """Keep platform counters in step with signups"""
+    if created:
+        key = 'total_influencers' if sender is InfluencerProfile else 'total_venues'
+        PlatformCounter.increment(key)
+
+@receiver(post_save, sender=SystemSettings)
+@receiver(post_delete, sender=SystemSettings)
+def invalidate_system_settings(sender, instance, **kwargs):
+    """Have every process reload SystemSettings once the change is committed"""
+    from .system_settings import bump_settings_version
+    transaction.on_commit(bump_settings_version)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=VenueProfile)
+@receiver(post_delete, sender=VenueProfile)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the copy core.auth_backends serves as request.user"""
+    from .auth_backends import invalidate_cached_user
+    user_id = instance.pk if sender is User else instance.user_id
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+@receiver(post_delete, sender=InfluencerProfile)
+@receiver(post_delete, sender=VenueProfile)
+def uncount_deleted_profile(sender, instance, **kwargs):
+    """Keep platform counters in step with account removal"""
+    if sender is InfluencerProfile:
+        PlatformCounter.increment('total_influencers', -1)
+        if instance.tier == 'elite':
+            PlatformCounter.increment('elite_members', -1)
+    else:
+        PlatformCounter.increment('total_venues', -1)
@@ -0,0 +1,71 @@
+"""
+Keyset (cursor) pagination for the history APIs.
+
+Pages are ordered newest first by (created_at, id) and a cursor records
+the last row of the previous page, so the next page is
+
+    WHERE created_at < :t OR (created_at = :t AND id < :id)
+    ORDER BY created_at DESC, id DESC LIMIT n
+
+which walks an index on (..., created_at, id) and costs the same on
+page 1000 as on page 1, where OFFSET would read and throw away every
+earlier row. Cursors are opaque url-safe strings; rows inserted while a
+client scrolls never shift or repeat what it has already seen.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    payload = json.dumps([created_at.isoformat(), str(pk)], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor, pk_field):
+    """(created_at, pk) from encode_cursor(); InvalidCursor if malformed"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, pk = json.loads(payload)
+        created_at = datetime.fromisoformat(created_at)
+        pk = pk_field.to_python(pk)
+    except (binascii.Error, ValueError, TypeError, ValidationError):
+        raise InvalidCursor(f'Invalid cursor {cursor!r}')
+    if created_at.tzinfo is None:
+        raise InvalidCursor(f'Invalid cursor {cursor!r}')
+    return created_at, pk
+
+
+def parse_page_size(value):
+    """Page size from a ?limit= value, clamped to 1..MAX_PAGE_SIZE"""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE)) if value else DEFAULT_PAGE_SIZE
+    except ValueError:
+        return DEFAULT_PAGE_SIZE
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    (rows, next_cursor) for the page after `cursor`, newest first.
+    next_cursor is None on the last page.
+    """
+    if cursor:
+        created_at, pk = decode_cursor(cursor, queryset.model._meta.pk)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    rows = list(queryset.order_by('-created_at', '-pk')[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].pk)
@@ -0,0 +1,212 @@
+"""
+Monthly ActivityLog partitions.
+
+On PostgreSQL core_activitylog is a native RANGE-partitioned table (see
+migration 0007) with one partition per calendar month (UTC) plus a
+default partition; every partition is read through the parent table.
+
+SQLite has no partitions, and the ORM only reads core_activitylog, so
+every month the database keeps stays in that table. A month is moved
+into its own core_activitylog_pYYYYMM table only when it is archived,
+in the same run (see archive_month()). Tables left behind by a failed
+archive are archived on the next run; any for months still within
+retention are moved back (restore_month()).
+
+archive_activity_logs writes a core_activitylog_pYYYYMM table to a
+gzip-compressed JSONL file and then drops it.
+"""
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from .models import ActivityLog
+
+ACTIVITY_TABLE = ActivityLog._meta.db_table
+PARTITION_RE = re.compile(rf'^{ACTIVITY_TABLE}_p(\d{{4}})(\d{{2}})$')
+DEFAULT_PARTITION = f'{ACTIVITY_TABLE}_pdefault'
+
+
+def month_floor(value):
+    """First day of the (UTC) month containing a date or aware datetime"""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """UTC [start, end) datetimes for a month"""
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end_month = add_months(month, 1)
+    return start, datetime(end_month.year, end_month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f'{ACTIVITY_TABLE}_p{month:%Y%m}'
+
+
+def is_partitioned():
+    """True when the database stores ActivityLog in native partitions"""
+    return connection.vendor == 'postgresql'
+
+
+def list_partitions():
+    """{month: table name} for every monthly partition/table that exists"""
+    if is_partitioned():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                WHERE parent.relname = %s
+                """,
+                [ACTIVITY_TABLE]
+            )
+            names = [row[0] for row in cursor.fetchall()]
+    else:
+        names = connection.introspection.table_names()
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return dict(sorted(partitions.items()))
+
+
+def ensure_partitions(start_month, months_ahead=3):
+    """PostgreSQL: create partitions from start_month through months_ahead"""
+    if not is_partitioned():
+        return []
+    created = []
+    existing = list_partitions()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(start_month, offset)
+            if month in existing:
+                continue
+            start, end = month_bounds(month)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {quote(partition_name(month))} '
+                f"PARTITION OF {quote(ACTIVITY_TABLE)} FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            created.append(month)
+    return created
+
+
+def table_months():
+    """Months that have rows in the main SQLite table"""
+    return sorted({month_floor(value) for value in ActivityLog.objects.datetimes(
+        'created_at', 'month', tzinfo=dt_timezone.utc
+    )})
+
+
+def split_month(month):
+    """
+    SQLite: move a month out of the main table into its own table, where
+    the app no longer sees it; returns rows moved. Only archive_month()
+    should call this.
+    """
+    if is_partitioned():
+        return 0
+    start, end = month_bounds(month)
+    rows = ActivityLog.objects.filter(created_at__gte=start, created_at__lt=end)
+    ids_sql, params = rows.values('pk').query.sql_with_params()
+    quote = connection.ops.quote_name
+    table = quote(partition_name(month))
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM {quote(ACTIVITY_TABLE)} WHERE 0')
+            cursor.execute(
+                f'INSERT INTO {table} SELECT * FROM {quote(ACTIVITY_TABLE)} WHERE id IN ({ids_sql})',
+                params
+            )
+            moved = cursor.rowcount
+        rows.delete()
+    return moved
+
+
+def restore_month(month):
+    """SQLite: move a month's table back into the main table; returns rows moved"""
+    table = list_partitions().get(month)
+    if table is None or is_partitioned():
+        return 0
+    quote = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {quote(ACTIVITY_TABLE)} SELECT * FROM {quote(table)}')
+        moved = cursor.rowcount
+        cursor.execute(f'DROP TABLE {quote(table)}')
+    return moved
+
+
+def get_archive_dir():
+    return Path(settings.HAIPCLUB_SETTINGS.get(
+        'ACTIVITY_LOG_ARCHIVE_DIR', settings.BASE_DIR / 'logs' / 'activity_archive'
+    ))
+
+
+def archive_partition(month, archive_dir=None, chunk_size=2000):
+    """
+    Write a month's partition to <archive_dir>/activitylog-YYYY-MM.jsonl.gz
+    and drop it. Returns (path, rows archived).
+    """
+    table = list_partitions().get(month)
+    if table is None:
+        return None, 0
+
+    archive_dir = Path(archive_dir or get_archive_dir())
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f'activitylog-{month:%Y-%m}.jsonl.gz'
+    if path.exists():
+        # Never overwrite an earlier archive of the same month
+        path = archive_dir / f'activitylog-{month:%Y-%m}-{datetime.now():%Y%m%d%H%M%S}.jsonl.gz'
+
+    quote = connection.ops.quote_name
+    count = 0
+    with open(path, 'wb') as raw:
+        with connection.cursor() as cursor, gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+            cursor.execute(f'SELECT * FROM {quote(table)} ORDER BY id')
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    record = dict(zip(columns, row))
+                    if isinstance(record.get('metadata'), str):
+                        # SQLite hands back JSONField columns as text
+                        record['metadata'] = json.loads(record['metadata'] or '{}')
+                    archive.write((json.dumps(record, cls=DjangoJSONEncoder) + '\n').encode('utf-8'))
+                count += len(rows)
+        raw.flush()
+        os.fsync(raw.fileno())
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned():
+            cursor.execute(f'ALTER TABLE {quote(ACTIVITY_TABLE)} DETACH PARTITION {quote(table)}')
+        cursor.execute(f'DROP TABLE {quote(table)}')
+    return path, count
+
+
+def archive_month(month, archive_dir=None, chunk_size=2000):
+    """
+    Archive and drop a month wherever it is stored (on SQLite, split out of
+    the main table first). Returns (path, rows archived).
+    """
+    split_month(month)
+    return archive_partition(month, archive_dir, chunk_size)
@@ -0,0 +1,180 @@
+"""
+Request profiling.
+
+ProfilingMiddleware samples a fraction of requests
+(HAIPCLUB_SETTINGS['PROFILING_SAMPLE_RATE']) and for each one records the
+number of queries, time spent in the database, template render time and
+the slowest statement. Unsampled requests only pay for one random()
+call.
+
+- With DEBUG on, sampled responses carry X-Query-Count / X-DB-Time-Ms /
+  X-Template-Time-Ms / X-Total-Time-Ms and a Server-Timing header that
+  browser dev tools display.
+- Totals are aggregated per view in-process and served to staff by the
+  profiling_stats view (each worker process reports its own numbers).
+- Statements slower than PROFILING_SLOW_QUERY_MS are logged.
+
+Template time is measured for TemplateResponse (the class-based views);
+views that call render() directly have it counted as view time.
+"""
+import logging
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SQL_PREVIEW_LENGTH = 500
+
+
+def _get_setting(name, default):
+    return settings.HAIPCLUB_SETTINGS.get(name, default)
+
+
+class RequestProfile:
+    """Per-request counters; also the execute_wrapper that times each query"""
+
+    def __init__(self, slow_query_ms):
+        self.slow_query_ms = slow_query_ms
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.slowest_sql = ''
+        self.slowest_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += duration
+            if duration > self.slowest_time:
+                self.slowest_time = duration
+                self.slowest_sql = sql
+            if duration * 1000 >= self.slow_query_ms:
+                logger.warning(f"Slow query ({duration * 1000:.1f} ms): {sql[:SQL_PREVIEW_LENGTH]}")
+
+
+class ProfilingStats:
+    """Per-view totals for the sampled requests of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+            self.since = timezone.now()
+
+    def record(self, view, total_time, profile):
+        with self._lock:
+            entry = self._views.setdefault(view, {
+                'requests': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'db_ms': 0.0,
+                'template_ms': 0.0,
+                'queries': 0,
+                'max_queries': 0,
+                'slowest_sql': '',
+                'slowest_sql_ms': 0.0,
+            })
+            entry['requests'] += 1
+            entry['total_ms'] += total_time * 1000
+            entry['max_ms'] = max(entry['max_ms'], total_time * 1000)
+            entry['db_ms'] += profile.db_time * 1000
+            entry['template_ms'] += profile.template_time * 1000
+            entry['queries'] += profile.queries
+            entry['max_queries'] = max(entry['max_queries'], profile.queries)
+            if profile.slowest_time * 1000 > entry['slowest_sql_ms']:
+                entry['slowest_sql_ms'] = profile.slowest_time * 1000
+                entry['slowest_sql'] = profile.slowest_sql[:SQL_PREVIEW_LENGTH]
+
+    def snapshot(self):
+        """Per-view averages, most total time first"""
+        with self._lock:
+            views = [(view, dict(entry)) for view, entry in self._views.items()]
+
+        rows = []
+        for view, entry in sorted(views, key=lambda item: -item[1]['total_ms']):
+            count = entry['requests']
+            rows.append({
+                'view': view,
+                'requests': count,
+                'avg_ms': round(entry['total_ms'] / count, 2),
+                'max_ms': round(entry['max_ms'], 2),
+                'avg_db_ms': round(entry['db_ms'] / count, 2),
+                'avg_template_ms': round(entry['template_ms'] / count, 2),
+                'avg_queries': round(entry['queries'] / count, 1),
+                'max_queries': entry['max_queries'],
+                'slowest_sql_ms': round(entry['slowest_sql_ms'], 2),
+                'slowest_sql': entry['slowest_sql'],
+            })
+        return {
+            'pid': os.getpid(),
+            'since': self.since.isoformat(),
+            'sample_rate': _get_setting('PROFILING_SAMPLE_RATE', 0),
+            'views': rows,
+        }
+
+
+profiling_stats = ProfilingStats()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or match._func_path
+
+
+class ProfilingMiddleware:
+    """Profile a sample of requests; see the module docstring"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = _get_setting('PROFILING_SAMPLE_RATE', 0)
+        if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+            return self.get_response(request)
+
+        profile = RequestProfile(_get_setting('PROFILING_SLOW_QUERY_MS', 200))
+        request.profile = profile
+        started = time.perf_counter()
+        with connection.execute_wrapper(profile):
+            response = self.get_response(request)
+        total_time = time.perf_counter() - started
+
+        profiling_stats.record(_view_name(request), total_time, profile)
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(profile.queries)
+            response['X-DB-Time-Ms'] = f'{profile.db_time * 1000:.1f}'
+            response['X-Template-Time-Ms'] = f'{profile.template_time * 1000:.1f}'
+            response['X-Total-Time-Ms'] = f'{total_time * 1000:.1f}'
+            response['Server-Timing'] = (
+                f'db;desc="{profile.queries} queries";dur={profile.db_time * 1000:.1f}, '
+                f'tpl;dur={profile.template_time * 1000:.1f}, '
+                f'total;dur={total_time * 1000:.1f}'
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, 'profile', None)
+        if profile is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                profile.template_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,100 @@
+"""
+Signed, self-verifying QR tokens.
+
+A token carries everything needed to reject it without touching the
+database: the influencer's user id, when it was issued, when it expires
+and the format version, all covered by an HMAC keyed on SECRET_KEY.
+
+    haip.<version>.<user id hex>.<issued b36>.<expires b36>.<nonce>.<signature>
+
+Only tokens that pass verify_qr_token() need a database lookup, which is
+still required to make sure the token is the influencer's current one
+(regenerating a QR code revokes the previous token).
+"""
+import secrets
+import time
+import uuid
+from collections import namedtuple
+
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import base36_to_int, int_to_base36, urlsafe_base64_encode
+
+from .system_settings import get_setting
+
+QR_TOKEN_PREFIX = 'haip'
+QR_TOKEN_VERSION = 1
+QR_TOKEN_SALT = 'core.qr_tokens'
+
+QRTokenPayload = namedtuple('QRTokenPayload', ['influencer_id', 'issued_at', 'expires_at', 'version'])
+
+
+class InvalidQRToken(Exception):
+    """Raised when a QR token is malformed, forged or expired"""
+
+
+def get_qr_expiry_seconds():
+    """QR lifetime from the QR_CODE_EXPIRY_HOURS setting"""
+    hours = get_setting('QR_CODE_EXPIRY_HOURS', 24)
+    return int(float(hours) * 3600)
+
+
+def _sign(payload):
+    digest = salted_hmac(QR_TOKEN_SALT, payload, algorithm='sha256').digest()
+    return urlsafe_base64_encode(digest[:16])
+
+
+def make_qr_token(influencer_id, issued_at=None):
+    """Build a signed token for the given influencer (user) id"""
+    issued = int(issued_at if issued_at is not None else time.time())
+    expires = issued + get_qr_expiry_seconds()
+    payload = '.'.join([
+        QR_TOKEN_PREFIX,
+        str(QR_TOKEN_VERSION),
+        uuid.UUID(str(influencer_id)).hex,
+        int_to_base36(issued),
+        int_to_base36(expires),
+        secrets.token_hex(3),
+    ])
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_qr_token(token, now=None):
+    """
+    Validate a token in-process and return its QRTokenPayload.
+    Raises InvalidQRToken for anything malformed, forged or expired.
+    """
+    if not token or not isinstance(token, str) or len(token) > 255:
+        raise InvalidQRToken('Malformed QR token')
+
+    payload, _, signature = token.rpartition('.')
+    parts = payload.split('.')
+    if len(parts) != 6 or parts[0] != QR_TOKEN_PREFIX:
+        raise InvalidQRToken('Malformed QR token')
+
+    if not constant_time_compare(_sign(payload), signature):
+        raise InvalidQRToken('Invalid QR token signature')
+
+    try:
+        version = int(parts[1])
+        influencer_id = uuid.UUID(hex=parts[2])
+        issued_at = base36_to_int(parts[3])
+        expires_at = base36_to_int(parts[4])
+    except ValueError:
+        raise InvalidQRToken('Malformed QR token')
+
+    if version != QR_TOKEN_VERSION:
+        raise InvalidQRToken('Unsupported QR token version')
+
+    if (now if now is not None else time.time()) >= expires_at:
+        raise InvalidQRToken('QR token expired')
+
+    return QRTokenPayload(influencer_id, issued_at, expires_at, version)
+
+
+def is_qr_token_valid(token, now=None):
+    """Boolean convenience wrapper around verify_qr_token()"""
+    try:
+        verify_qr_token(token, now=now)
+    except InvalidQRToken:
+        return False
+    return True
@@ -0,0 +1,95 @@
+"""
+Redeeming credit at a venue.
+
+redeem() is the write path behind process_redemption. The scanned token
+is verified without the database. Then, in one transaction, the
+influencer row is locked (SELECT ... FOR UPDATE), the balance and limits
+are checked against the locked row, and the deduction, the Redemption and
+its activity log entry are written. Two scans of the same code cannot
+both pass the balance check: the second waits for the first's lock and
+then sees the reduced balance. SQLite ignores FOR UPDATE, but
+core.backends.sqlite3 opens the transaction with BEGIN IMMEDIATE, which
+serializes writers the same way.
+
+benchmark_redemptions calls redeem() as well, so it measures what the
+view does.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+
+from .activity import log_activity
+from .models import InfluencerProfile, Redemption
+from .qr_tokens import InvalidQRToken, verify_qr_token
+from .system_settings import get_setting
+
+
+class RedemptionError(Exception):
+    """A redemption was refused; the message is shown to the venue"""
+
+
+def redeem(venue, influencer_id, qr_token, amount, notes='', ip_address=None):
+    """
+    Charge `amount` to the influencer (user) id the token was issued to and
+    record the Redemption; returns (redemption, influencer). Raises
+    RedemptionError if the token, balance or limits do not allow it.
+    """
+    if amount <= 0:
+        raise RedemptionError('Invalid amount')
+
+    # Token must be authentic, unexpired and issued to this influencer
+    try:
+        token_payload = verify_qr_token(qr_token)
+    except InvalidQRToken:
+        raise RedemptionError('Invalid or expired QR code')
+    if str(token_payload.influencer_id) != str(influencer_id):
+        raise RedemptionError('Invalid influencer or venue')
+
+    with transaction.atomic():
+        try:
+            influencer = InfluencerProfile.objects.select_for_update(of=('self',)).select_related('user').get(
+                user__id=influencer_id,
+                qr_code_token=qr_token,
+                qr_code_active=True
+            )
+        except InfluencerProfile.DoesNotExist:
+            raise RedemptionError('Invalid influencer or venue')
+
+        if amount > influencer.current_balance:
+            raise RedemptionError(f'Insufficient balance. Available: ${influencer.current_balance}')
+
+        # Platform-wide and venue max redemption limits
+        platform_limit = Decimal(str(get_setting('MAX_REDEMPTION_AMOUNT')))
+        if amount > platform_limit:
+            raise RedemptionError(f'Amount exceeds the platform limit of ${platform_limit}')
+        if amount > venue.max_redemption_amount:
+            raise RedemptionError(f'Amount exceeds venue limit of ${venue.max_redemption_amount}')
+
+        balance_before = influencer.current_balance
+        if not influencer.deduct_balance(amount):
+            raise RedemptionError('Failed to deduct balance')
+
+        redemption = Redemption.objects.create(
+            influencer=influencer,
+            venue=venue,
+            amount=amount,
+            status='confirmed',
+            qr_token_used=qr_token,
+            balance_before=balance_before,
+            balance_after=influencer.current_balance,
+            notes=notes
+        )
+
+        log_activity(
+            user=influencer.user,
+            action_type='redemption',
+            description=f'Redeemed ${amount} at {venue.venue_name}',
+            metadata={
+                'venue_name': venue.venue_name,
+                'amount': float(amount),
+                'redemption_id': str(redemption.id)
+            },
+            ip_address=ip_address
+        )
+
+    return redemption, influencer
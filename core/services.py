@@ -1,7 +1,7 @@
 import requests
 import openai
 from django.conf import settings
-from django.core.cache import cache
+from django.core.cache import caches
 import logging
 import json
 import time
@@ -12,8 +12,28 @@ logger = logging.getLogger(__name__)
 class InstagramService:
     BASE_URL = "https://instagram-scraper-api2.p.rapidapi.com/v1"
     
+    # Pause between follower pages, to stay under RocketAPI's rate limit
+    FOLLOWER_PAGE_DELAY = 1.0
+    
+    # Gender indicators
+    MALE_INDICATORS = [
+        'john', 'mike', 'david', 'chris', 'alex', 'ryan', 'kevin', 'brian', 'jason', 'daniel',
+        'matthew', 'andrew', 'joshua', 'james', 'robert', 'michael', 'william', 'richard',
+        'joseph', 'thomas', 'charles', 'anthony', 'mark', 'donald', 'steven', 'paul',
+        'boy', 'man', 'guy', 'dude', 'bro', 'mr'
+    ]
+    
+    FEMALE_INDICATORS = [
+        'sarah', 'jennifer', 'lisa', 'karen', 'donna', 'carol', 'ruth', 'sharon', 'michelle',
+        'laura', 'emily', 'kimberly', 'deborah', 'dorothy', 'amy', 'angela', 'ashley',
+        'brenda', 'emma', 'olivia', 'sophia', 'isabella', 'charlotte', 'amelia', 'mia',
+        'harper', 'evelyn', 'abigail', 'emily', 'ella', 'elizabeth', 'camila', 'luna',
+        'girl', 'woman', 'lady', 'gal', 'miss', 'mrs', 'ms'
+    ]
+    
     def __init__(self):
         self.api_key = settings.ROCKET_API_KEY
+        self.BASE_URL = getattr(settings, 'ROCKET_API_BASE_URL', self.BASE_URL)
         self.headers = {
             "X-RapidAPI-Key": self.api_key,
             "X-RapidAPI-Host": "instagram-scraper-api2.p.rapidapi.com"
@@ -179,7 +199,7 @@ class InstagramService:
     def get_profile_info(self, username: str) -> Optional[Dict]:
         """Get basic profile information using RocketAPI"""
         cache_key = f"instagram_profile_{username}"
-        cached_data = cache.get(cache_key)
+        cached_data = caches['profiles'].get(cache_key)
         
         if cached_data:
             logger.info(f"Using cached profile data for {username}")
@@ -225,7 +245,7 @@ class InstagramService:
                     logger.info(f"Profile info extracted for @{username}: {profile_info['follower_count']} followers")
                     
                     # Cache for 1 hour
-                    cache.set(cache_key, profile_info, 3600)
+                    caches['profiles'].set(cache_key, profile_info, 3600)
                     return profile_info
                 else:
                     logger.error(f"No user data found in response for @{username}")
@@ -259,22 +279,6 @@ class InstagramService:
             unknown_count = 0
             total_checked = 0
             
-            # Gender indicators
-            male_indicators = [
-                'john', 'mike', 'david', 'chris', 'alex', 'ryan', 'kevin', 'brian', 'jason', 'daniel',
-                'matthew', 'andrew', 'joshua', 'james', 'robert', 'michael', 'william', 'richard',
-                'joseph', 'thomas', 'charles', 'anthony', 'mark', 'donald', 'steven', 'paul',
-                'boy', 'man', 'guy', 'dude', 'bro', 'mr'
-            ]
-            
-            female_indicators = [
-                'sarah', 'jennifer', 'lisa', 'karen', 'donna', 'carol', 'ruth', 'sharon', 'michelle',
-                'laura', 'emily', 'kimberly', 'deborah', 'dorothy', 'amy', 'angela', 'ashley',
-                'brenda', 'emma', 'olivia', 'sophia', 'isabella', 'charlotte', 'amelia', 'mia',
-                'harper', 'evelyn', 'abigail', 'emily', 'ella', 'elizabeth', 'camila', 'luna',
-                'girl', 'woman', 'lady', 'gal', 'miss', 'mrs', 'ms'
-            ]
-            
             # Get followers using RocketAPI
             max_id = None
             
@@ -331,18 +335,10 @@ class InstagramService:
                         fake_followers += 1
                     
                     # Analyze gender
-                    full_name = user.get("full_name", "").lower()
-                    username_text = user.get("username", "").lower()
-                    biography = user.get("biography", "").lower()
-                    
-                    text_to_analyze = f"{full_name} {username_text} {biography}"
-                    
-                    male_score = sum(1 for indicator in male_indicators if indicator in text_to_analyze)
-                    female_score = sum(1 for indicator in female_indicators if indicator in text_to_analyze)
-                    
-                    if male_score > female_score:
+                    gender = self._infer_gender(user)
+                    if gender == 'male':
                         male_count += 1
-                    elif female_score > male_score:
+                    elif gender == 'female':
                         female_count += 1
                     else:
                         unknown_count += 1
@@ -351,7 +347,7 @@ class InstagramService:
                 if not max_id or total_checked >= sample_size:
                     break
                 
-                time.sleep(1.0)  # Rate limiting
+                time.sleep(self.FOLLOWER_PAGE_DELAY)  # Rate limiting
             
             # Calculate engagement metrics
             engagement_metrics = self._calculate_engagement_metrics(user_id, profile_info['follower_count'])
@@ -410,6 +406,23 @@ class InstagramService:
         
         return False
 
+    def _infer_gender(self, user_data: Dict) -> str:
+        """'male', 'female' or 'unknown' from name indicators in the name, username and bio"""
+        full_name = user_data.get("full_name", "").lower()
+        username_text = user_data.get("username", "").lower()
+        biography = user_data.get("biography", "").lower()
+        
+        text_to_analyze = f"{full_name} {username_text} {biography}"
+        
+        male_score = sum(1 for indicator in self.MALE_INDICATORS if indicator in text_to_analyze)
+        female_score = sum(1 for indicator in self.FEMALE_INDICATORS if indicator in text_to_analyze)
+        
+        if male_score > female_score:
+            return 'male'
+        if female_score > male_score:
+            return 'female'
+        return 'unknown'
+    
     def _is_fake_follower(self, user_data: Dict) -> bool:
         """Detect fake followers using scoring system from analyze_dual_location_rocketapi.py"""
         username = user_data.get("username", "").lower()
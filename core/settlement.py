@@ -0,0 +1,69 @@
+"""
+Bulk redemption settlement for the admin.
+
+Confirming or refunding many redemptions one save() at a time means one
+event batch per row. These helpers flip the status of every selected row
+in a few UPDATEs and publish a single batch of RedemptionConfirmed /
+RedemptionRefunded events, which core.subscribers turns into aggregated
+XP, tier, venue, counter and leaderboard updates after the commit.
+
+Refunded money is not left to a subscriber: balances and total_spent
+change in the same transaction as the status.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .events import RedemptionConfirmed, RedemptionRefunded, publish_many
+from .models import InfluencerProfile, Redemption
+from .subscribers import bulk_increment, chunked
+
+
+def _locked_rows(queryset, status):
+    return list(
+        queryset.filter(status=status).select_for_update().values(
+            'id', 'influencer_id', 'venue_id', 'amount', 'created_at'
+        )
+    )
+
+
+def _events(event_type, rows):
+    return [
+        event_type(row['id'], row['influencer_id'], row['venue_id'], row['amount'], row['created_at'])
+        for row in rows
+    ]
+
+
+def bulk_confirm_redemptions(queryset):
+    """Confirm every pending redemption in queryset; returns the number confirmed"""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = _locked_rows(queryset, 'pending')
+        for chunk in chunked(rows):
+            Redemption.objects.filter(id__in=[row['id'] for row in chunk]).update(
+                status='confirmed', confirmed_at=now
+            )
+        publish_many(_events(RedemptionConfirmed, rows))
+    return len(rows)
+
+
+def bulk_refund_redemptions(queryset):
+    """
+    Refund every confirmed redemption in queryset: the amount goes back to
+    the influencer's balance and comes off total_spent, the redemption
+    counts and the venue totals. XP already earned is kept.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = _locked_rows(queryset, 'confirmed')
+        refunds = defaultdict(lambda: {'current_balance': Decimal('0'), 'total_spent': Decimal('0')})
+        for chunk in chunked(rows):
+            Redemption.objects.filter(id__in=[row['id'] for row in chunk]).update(status='refunded')
+            for row in chunk:
+                refunds[row['influencer_id']]['current_balance'] += row['amount']
+                refunds[row['influencer_id']]['total_spent'] -= row['amount']
+        bulk_increment(InfluencerProfile, refunds, now)
+        publish_many(_events(RedemptionRefunded, rows))
+    return len(rows)
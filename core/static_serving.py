@@ -0,0 +1,80 @@
+"""
+Static file view for deployments where Django serves STATIC_ROOT itself
+(HAIPCLUB_SETTINGS['SERVE_STATIC']).
+
+Serves the variants written by core.storage when the client accepts them:
+brotli or gzip for text assets (Accept-Encoding), AVIF or WebP for
+JPEG/PNG images (Accept). Fingerprinted files are sent with a one-year
+immutable Cache-Control, since their name changes whenever their content
+does; anything else gets a short max-age.
+"""
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .storage import IMAGE_EXTENSIONS
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+IMAGE_TYPES = [('image/avif', '.avif'), ('image/webp', '.webp')]
+
+_fingerprinted = None
+
+
+def _is_fingerprinted(path):
+    global _fingerprinted
+    if _fingerprinted is None:
+        _fingerprinted = frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+    return path in _fingerprinted
+
+
+def _pick_variant(full_path, path, request):
+    """(file to send, Content-Encoding or None, Content-Type, Vary header)"""
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in IMAGE_EXTENSIONS:
+        accept = request.headers.get('Accept', '')
+        for mime_type, suffix in IMAGE_TYPES:
+            if mime_type in accept and os.path.exists(full_path + suffix):
+                return full_path + suffix, None, mime_type, 'Accept'
+        return full_path, None, content_type, 'Accept'
+
+    accept_encoding = request.headers.get('Accept-Encoding', '')
+    for encoding, suffix in ENCODINGS:
+        if encoding in accept_encoding and os.path.exists(full_path + suffix):
+            return full_path + suffix, encoding, content_type, 'Accept-Encoding'
+    return full_path, None, content_type, 'Accept-Encoding'
+
+
+def serve_static(request, path):
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(str(settings.STATIC_ROOT), path)
+    except Exception:
+        raise Http404('Invalid path')
+    if not os.path.isfile(full_path):
+        raise Http404(f'"{path}" does not exist')
+
+    file_path, encoding, content_type, vary = _pick_variant(full_path, path, request)
+    stat = os.stat(file_path)
+    if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(file_path, 'rb'), content_type=content_type)
+        response['Content-Length'] = stat.st_size
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Vary'] = vary
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if _is_fingerprinted(path) else DEFAULT_CACHE_CONTROL
+    return response
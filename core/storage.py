@@ -0,0 +1,146 @@
+"""
+Static file storage for collectstatic.
+
+CompressedManifestStaticFilesStorage fingerprints every file like
+ManifestStaticFilesStorage (styles.css -> styles.3f2a1c.css, with url()
+references rewritten), then writes pre-built variants next to each
+fingerprinted file:
+
+- <name>.gz and <name>.br for text assets (css, js, svg, ...), kept only
+  when they are meaningfully smaller than the original;
+- <name>.webp and <name>.avif for JPEG/PNG images, downscaled to
+  STATIC_IMAGE_MAX_WIDTH, again only when smaller.
+
+core.static_serving picks the best variant per request from Accept /
+Accept-Encoding. A front-end server can do the same with gzip_static /
+brotli_static. Brotli needs the Brotli package and AVIF needs a Pillow
+build with AVIF support (pillow-avif-plugin); without them those variants
+are skipped.
+"""
+import gzip
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from PIL import Image
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import pillow_avif  # noqa: F401  (registers the AVIF codec with Pillow)
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.svg', '.html', '.txt', '.json', '.map', '.xml', '.ico'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+IMAGE_FORMATS = {'.webp': 'WEBP', '.avif': 'AVIF'}
+IMAGE_SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 6},
+    'AVIF': {'quality': 60},
+}
+
+MIN_COMPRESS_SIZE = 512  # bytes; smaller files are not worth a variant
+MIN_SAVING = 0.05  # a variant must be at least 5% smaller to be kept
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+def _encode_image(data, image_format, max_width):
+    with Image.open(BytesIO(data)) as image:
+        image.load()
+        if image.width > max_width:
+            image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        output = BytesIO()
+        image.save(output, format=image_format, **IMAGE_SAVE_OPTIONS[image_format])
+        return output.getvalue()
+
+
+def _image_format_available(image_format):
+    Image.init()
+    return image_format in Image.SAVE
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Fingerprinted static files with pre-compressed and re-encoded variants"""
+    
+    manifest_strict = False
+    
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Templates reference a few assets that are not in static/
+            # (favicon, hero video); keep the plain URL instead of a 500
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run or not hashed_names:
+            return
+
+        workers = os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            written = sum(executor.map(self._write_variants, sorted(hashed_names)))
+        logger.info(f"Wrote {written} compressed/re-encoded static variants")
+
+    def _variant_builders(self, name):
+        extension = os.path.splitext(name)[1].lower()
+        if extension in COMPRESSIBLE_EXTENSIONS:
+            yield '.gz', _gzip
+            if brotli is not None:
+                yield '.br', _brotli
+        elif extension in IMAGE_EXTENSIONS:
+            max_width = settings.HAIPCLUB_SETTINGS.get('STATIC_IMAGE_MAX_WIDTH', 1920)
+            for suffix, image_format in IMAGE_FORMATS.items():
+                if _image_format_available(image_format):
+                    yield suffix, lambda data, fmt=image_format: _encode_image(data, fmt, max_width)
+
+    def _write_variants(self, name):
+        """Create the variants of one fingerprinted file; returns how many were written"""
+        builders = list(self._variant_builders(name))
+        if not builders:
+            return 0
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return 0
+
+        written = 0
+        for suffix, build in builders:
+            variant_path = path + suffix
+            if os.path.exists(variant_path):
+                # Fingerprinted names are content-addressed, so the variant is current
+                continue
+            try:
+                variant = build(data)
+            except Exception as e:
+                logger.warning(f"Could not build {suffix} variant of {name}: {str(e)}")
+                continue
+            if len(variant) > len(data) * (1 - MIN_SAVING):
+                continue
+            with open(variant_path, 'wb') as output:
+                output.write(variant)
+            written += 1
+        return written
@@ -0,0 +1,131 @@
+"""
+Subscribers for redemption events (see core.events).
+
+Each handler receives every event published together and applies its
+effect with a few aggregated UPDATEs, so a single scan at the venue and a
+bulk settlement from the admin go through the same code. Handlers run in
+registration order, each in its own transaction: XP and tiers, venue
+totals and the daily rollup, platform counters, then leaderboards (which
+read the XP written first).
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .events import RedemptionConfirmed, RedemptionRefunded, subscribe
+from .leaderboard import rebuild_leaderboards, record_spend, record_xp
+from .models import InfluencerProfile, VenueProfile, Achievement, PlatformCounter, VenueDailyStats
+from .system_settings import get_setting
+from .tiering import retier
+
+UPDATE_CHUNK_SIZE = 500
+
+# Above this many influencers a batch rebuilds the boards instead of merging
+INCREMENTAL_LEADERBOARD_LIMIT = 20
+
+
+def chunked(items, size=UPDATE_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def bulk_increment(model, increments, now=None):
+    """
+    Apply {pk: {field: delta}} as UPDATE ... SET field = field + CASE pk ...
+    END, one statement per chunk of UPDATE_CHUNK_SIZE rows.
+    """
+    now = now or timezone.now()
+    fields = {field for deltas in increments.values() for field in deltas}
+    for chunk in chunked(increments):
+        updates = {}
+        for field in fields:
+            output_field = model._meta.get_field(field)
+            updates[field] = F(field) + Case(
+                *[When(pk=pk, then=Value(increments[pk].get(field, 0))) for pk in chunk],
+                default=Value(0),
+                output_field=output_field
+            )
+        model.objects.filter(pk__in=chunk).update(updated_at=now, **updates)
+
+
+def _sign(events):
+    return 1 if isinstance(events[0], RedemptionConfirmed) else -1
+
+
+@subscribe(RedemptionConfirmed)
+def award_redemption_xp(events):
+    """XP, redemption counts, tiers and the first_redemption badge"""
+    xp_rewards = get_setting('XP_REWARDS')
+    now = timezone.now()
+    per_influencer = Counter(event.influencer_id for event in events)
+
+    for chunk in chunked(per_influencer):
+        first_timers = list(
+            InfluencerProfile.objects.filter(pk__in=chunk, total_redemptions=0).values_list('pk', flat=True)
+        )
+        bulk_increment(InfluencerProfile, {
+            pk: {'xp_points': per_influencer[pk] * xp_rewards['REDEMPTION'], 'total_redemptions': per_influencer[pk]}
+            for pk in chunk
+        }, now)
+        retier(InfluencerProfile.objects.filter(pk__in=chunk))
+
+        Achievement.objects.bulk_create([
+            Achievement(
+                influencer_id=pk,
+                badge_type='first_redemption',
+                title='First Redemption!',
+                description='Congratulations on your first redemption at a partner venue!',
+                xp_reward=xp_rewards['FIRST_REDEMPTION']
+            )
+            for pk in first_timers
+        ], ignore_conflicts=True)
+
+
+@subscribe(RedemptionRefunded)
+def revoke_redemption_counts(events):
+    """Take refunded redemptions off the influencer counts (XP is kept)"""
+    per_influencer = Counter(event.influencer_id for event in events)
+    bulk_increment(InfluencerProfile, {
+        pk: {'total_redemptions': -count} for pk, count in per_influencer.items()
+    })
+
+
+@subscribe(RedemptionConfirmed, RedemptionRefunded)
+def update_venue_stats(events):
+    """Venue totals and the VenueDailyStats rollup"""
+    sign = _sign(events)
+    totals = defaultdict(lambda: {'total_redemptions': 0, 'total_redeemed_amount': Decimal('0')})
+    daily = defaultdict(lambda: [0, Decimal('0')])
+    for event in events:
+        totals[event.venue_id]['total_redemptions'] += sign
+        totals[event.venue_id]['total_redeemed_amount'] += sign * event.amount
+        key = (event.venue_id, timezone.localdate(event.created_at))
+        daily[key][0] += sign
+        daily[key][1] += sign * event.amount
+
+    bulk_increment(VenueProfile, totals)
+    for (venue_id, date), (count, amount) in daily.items():
+        VenueDailyStats.record(VenueProfile(pk=venue_id), date, amount, count=count)
+
+
+@subscribe(RedemptionConfirmed, RedemptionRefunded)
+def count_redemptions(events):
+    PlatformCounter.increment('total_redemptions', _sign(events) * len(events))
+
+
+@subscribe(RedemptionConfirmed, RedemptionRefunded)
+def update_leaderboards(events):
+    """Merge affected influencers into the boards, or rebuild for big batches"""
+    influencer_ids = {event.influencer_id for event in events}
+    if _sign(events) < 0 or len(influencer_ids) > INCREMENTAL_LEADERBOARD_LIMIT:
+        # Refunds can push someone off a board, which a merge cannot see
+        rebuild_leaderboards()
+        return
+
+    for profile in InfluencerProfile.objects.filter(pk__in=influencer_ids).select_related('user'):
+        record_xp(profile)
+    for influencer_id, date in {(event.influencer_id, timezone.localdate(event.created_at)) for event in events}:
+        record_spend(influencer_id, date)
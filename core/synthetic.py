@@ -0,0 +1,330 @@
+"""
+Synthetic data for load testing.
+
+generate() fills the database with influencers, venues and their
+redemption history at production-like volumes, using bulk_create in
+batches rather than the per-row save() paths. That skips everything the
+signals and save() overrides would do: no QR images, no per-row XP, badge
+or counter updates. Instead each batch is written already consistent
+(balances, totals, XP and tiers match the generated redemptions) and the
+derived tables - platform counters, venue daily stats, leaderboards - are
+rebuilt once at the end.
+
+Distributions aim to look like real traffic rather than uniform noise:
+follower counts are log-normal, redemptions per member are heavy-tailed
+(most members redeem a few times, a few redeem constantly), venue
+popularity follows a Zipf-like curve, amounts cluster around each venue's
+average bill, and visits lean towards evenings and weekends.
+
+Generated accounts share one username prefix (default 'load'), so they
+can be told apart from real ones and removed with clear().
+"""
+import itertools
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .counters import reconcile_platform_counters
+from .leaderboard import rebuild_leaderboards
+from .models import (
+    User, InfluencerProfile, VenueProfile, Achievement, Redemption, ActivityLog, LeaderboardEntry,
+)
+from .qr_tokens import make_qr_token
+from .subscribers import bulk_increment
+from .system_settings import get_setting
+from .tiering import TIER_ORDER, get_tier_thresholds, tier_for_xp
+from .venue_stats import rebuild_venue_daily_stats
+
+DEFAULT_PASSWORD = 'loadtest'
+
+NEIGHBORHOODS = [
+    'Mission', 'SoMa', 'Marina', 'Hayes Valley', 'North Beach', 'Nob Hill',
+    'Castro', 'Pacific Heights', 'Dogpatch', 'Noe Valley', 'Russian Hill',
+    'Financial District', 'Haight-Ashbury', 'Japantown', 'Chinatown',
+]
+CUISINES = [
+    'Californian', 'Italian', 'Japanese', 'Mexican', 'French', 'Thai',
+    'Chinese', 'Korean', 'Mediterranean', 'Seafood', 'Steakhouse', 'Vegan',
+]
+VENUE_WORDS = ['Kitchen', 'Bistro', 'Table', 'House', 'Social', 'Room', 'Bar', 'Cantina', 'Izakaya', 'Trattoria']
+
+# Share of visits per hour of day (local time) and per weekday (Monday=0)
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 0, 1, 2, 2, 3, 5, 9, 8, 4, 3, 4, 7, 12, 14, 13, 9, 5, 2]
+WEEKDAY_WEIGHTS = [8, 9, 10, 12, 17, 19, 15]
+
+STATUSES = ['confirmed', 'refunded', 'failed']
+STATUS_WEIGHTS = [95, 3, 2]
+EXTRA_BADGES = ['streak_7', 'streak_30', 'venue_explorer', 'social_star', 'big_spender']
+
+
+@contextmanager
+def historical_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values it is given"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Generator:
+    """Builds one run's rows; see generate()"""
+
+    def __init__(self, prefix, days, redemptions_per_member, seed=None):
+        self.prefix = prefix
+        self.days = days
+        self.redemptions_per_member = redemptions_per_member
+        self.random = random.Random(seed)
+        self.now = timezone.now()
+        self.month_start = timezone.localtime(self.now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        self.password = make_password(DEFAULT_PASSWORD)
+        self.thresholds = get_tier_thresholds()
+        self.xp_rewards = get_setting('XP_REWARDS')
+        self.allowance = Decimal(str(get_setting('DEFAULT_MONTHLY_ALLOWANCE')))
+        self.venues = []
+        self.venue_cum_weights = []
+
+    def _user(self, username, role, joined):
+        return User(
+            username=username,
+            email=f'{username}@example.com',
+            password=self.password,
+            role=role,
+            is_verified=True,
+            date_joined=joined,
+            created_at=joined,
+            updated_at=joined,
+        )
+
+    def _joined(self):
+        # Sign-ups grow over time: more recent days are more likely
+        return self.now - timedelta(days=self.days * (1 - math.sqrt(self.random.random())), seconds=self.random.randrange(86400))
+
+    def _visit_time(self, after):
+        """A plausible visit between `after` and now"""
+        span = max((self.now - after).days, 0)
+        for _ in range(10):
+            day = after + timedelta(days=self.random.randint(0, span))
+            if self.random.random() * max(WEEKDAY_WEIGHTS) <= WEEKDAY_WEIGHTS[day.weekday()]:
+                break
+        hour = self.random.choices(range(24), HOUR_WEIGHTS)[0]
+        local = timezone.localtime(day).replace(hour=hour, minute=self.random.randrange(60), second=self.random.randrange(60))
+        return min(max(local, after), self.now)
+
+    def create_venues(self, count):
+        users, venues = [], []
+        for n in range(count):
+            joined = self.now - timedelta(days=self.days + self.random.randint(0, 365))
+            user = self._user(f'{self.prefix}_venue_{n}', 'venue', joined)
+            users.append(user)
+            average_bill = Decimal(self.random.choice([25, 35, 45, 60, 80, 120]))
+            venues.append(VenueProfile(
+                user=user,
+                venue_name=f'{self.random.choice(NEIGHBORHOODS)} {self.random.choice(VENUE_WORDS)} {n}',
+                address=f'{self.random.randint(100, 3999)} {self.random.choice(NEIGHBORHOODS)} St, San Francisco, CA',
+                phone=f'415-555-{n % 10000:04d}',
+                cuisine_type=self.random.choice(CUISINES),
+                average_bill=average_bill,
+                max_redemption_amount=min(Decimal('500'), average_bill * 4),
+                created_at=joined,
+                updated_at=joined,
+            ))
+        User.objects.bulk_create(users)
+        VenueProfile.objects.bulk_create(venues)
+
+        self.venues = venues
+        # Zipf-like popularity: a handful of hot spots, a long tail
+        ranks = list(range(1, count + 1))
+        self.random.shuffle(ranks)
+        self.venue_cum_weights = list(itertools.accumulate(1 / rank ** 1.1 for rank in ranks))
+        return venues
+
+    def _redemption_count(self):
+        # A fifth never redeem; the rest follow a Pareto tail. Mean is close
+        # to redemptions_per_member (Pareto(2.2) has mean 1.83)
+        if self.random.random() < 0.2:
+            return 0
+        return min(int(self.random.paretovariate(2.2) * self.redemptions_per_member * 0.68), self.days * 2)
+
+    def _amount(self, venue):
+        amount = round(self.random.lognormvariate(math.log(float(venue.average_bill)), 0.35) * 2) / 2
+        return max(Decimal('5.00'), min(Decimal(str(amount)), venue.max_redemption_amount)).quantize(Decimal('0.01'))
+
+    def create_influencers(self, start, count):
+        """Write influencers start..start+count-1 with their history; returns row counts"""
+        users, profiles, redemptions, achievements, logs = [], [], [], [], []
+        venue_totals = {}
+
+        for n in range(start, start + count):
+            joined = self._joined()
+            user = self._user(f'{self.prefix}_influencer_{n}', 'influencer', joined)
+            users.append(user)
+            profile = InfluencerProfile(
+                user=user,
+                instagram_username=f'{self.prefix}_ig_{n}',
+                follower_count=int(self.random.lognormvariate(math.log(8000), 1.2)),
+                qr_code_token=make_qr_token(user.pk),
+                monthly_allowance=self.allowance,
+                last_allowance_reset=self.month_start,
+                verification_status=self.random.choices(['verified', 'pending'], [85, 15])[0],
+                created_at=joined,
+            )
+            profiles.append(profile)
+            logs.append(ActivityLog(user=user, action_type='signup', description='New influencer account created', created_at=joined))
+            achievements.append(Achievement(
+                influencer=profile, badge_type='first_signup', title='Welcome to hAIpClub!',
+                description='Welcome to the elite SF influencer network!', xp_reward=self.xp_rewards['SIGNUP'],
+                earned_at=joined,
+            ))
+
+            visits = sorted(self._visit_time(joined) for _ in range(self._redemption_count()))
+            balance = self.allowance
+            confirmed = 0
+            spent = Decimal('0')
+            first_confirmed_at = None
+            for created_at in visits:
+                venue = self.random.choices(self.venues, cum_weights=self.venue_cum_weights)[0]
+                amount = self._amount(venue)
+                status = self.random.choices(STATUSES, STATUS_WEIGHTS)[0]
+                if created_at >= self.month_start and status == 'confirmed' and amount > balance:
+                    status = 'failed'
+                balance_before = balance if created_at >= self.month_start else self.allowance
+                # Refunds were confirmed first, so they record the deduction too
+                balance_after = balance_before if status == 'failed' else balance_before - amount
+                if status == 'confirmed':
+                    confirmed += 1
+                    spent += amount
+                    first_confirmed_at = first_confirmed_at or created_at
+                    totals = venue_totals.setdefault(
+                        venue.pk, {'total_redemptions': 0, 'total_redeemed_amount': Decimal('0')}
+                    )
+                    totals['total_redemptions'] += 1
+                    totals['total_redeemed_amount'] += amount
+                    if created_at >= self.month_start:
+                        balance = balance_after
+                redemptions.append(Redemption(
+                    influencer=profile,
+                    venue=venue,
+                    amount=amount,
+                    status=status,
+                    qr_token_used=profile.qr_code_token,
+                    balance_before=balance_before,
+                    balance_after=balance_after,
+                    created_at=created_at,
+                    confirmed_at=created_at + timedelta(seconds=self.random.randint(2, 90)) if status != 'failed' else None,
+                ))
+                if status != 'failed':
+                    logs.append(ActivityLog(
+                        user=user, action_type='redemption', description=f'Redeemed ${amount} at {venue.venue_name}',
+                        metadata={'venue_name': venue.venue_name, 'amount': float(amount)}, created_at=created_at,
+                    ))
+
+            xp = self.xp_rewards['SIGNUP'] + confirmed * self.xp_rewards['REDEMPTION']
+            if first_confirmed_at:
+                xp += self.xp_rewards['FIRST_REDEMPTION']
+                achievements.append(Achievement(
+                    influencer=profile, badge_type='first_redemption', title='First Redemption!',
+                    description='Completed your first venue redemption', xp_reward=self.xp_rewards['FIRST_REDEMPTION'],
+                    earned_at=first_confirmed_at,
+                ))
+            # A few members earn bonus XP from streaks and social badges
+            for badge in EXTRA_BADGES:
+                if confirmed and self.random.random() < 0.03 * math.log1p(confirmed):
+                    achievements.append(Achievement(
+                        influencer=profile, badge_type=badge, title=badge.replace('_', ' ').title(),
+                        description='Synthetic achievement', xp_reward=250, earned_at=visits[-1],
+                    ))
+                    xp += 250
+            tier = tier_for_xp(xp, self.thresholds)
+            if tier != TIER_ORDER[0]:
+                xp += self.xp_rewards['TIER_UPGRADE']
+                tier = tier_for_xp(xp, self.thresholds)
+                achievements.append(Achievement(
+                    influencer=profile, badge_type='tier_upgrade', title=f'Tier Upgrade: {tier.title()}',
+                    description=f'Promoted to {tier}', xp_reward=self.xp_rewards['TIER_UPGRADE'],
+                    earned_at=visits[-1] if visits else joined,
+                ))
+
+            last_seen = visits[-1] if visits else joined
+            profile.xp_points = xp
+            profile.tier = tier
+            profile.total_redemptions = confirmed
+            profile.total_spent = spent
+            profile.current_balance = balance
+            profile.last_activity = last_seen
+            profile.updated_at = last_seen
+
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            InfluencerProfile.objects.bulk_create(profiles)
+            Redemption.objects.bulk_create(redemptions)
+            Achievement.objects.bulk_create(achievements)
+            ActivityLog.objects.bulk_create(logs)
+            bulk_increment(VenueProfile, venue_totals, now=self.now)
+
+        return {
+            'users': len(users),
+            'redemptions': len(redemptions),
+            'achievements': len(achievements),
+            'activity_logs': len(logs),
+        }
+
+
+
+def generate(influencers, venues, redemptions_per_member=8, days=180, batch_size=2000,
+             prefix='load', seed=None, progress=None):
+    """
+    Create `venues` venues and `influencers` influencers with their
+    redemptions, achievements and activity logs, `batch_size` influencers
+    per transaction, then rebuild the derived tables. progress, if given,
+    is called with the running totals after each batch. Returns the totals.
+    """
+    if User.objects.filter(username__startswith=f'{prefix}_').exists():
+        raise ValueError(f'Synthetic data with prefix {prefix!r} already exists; clear it or pick another prefix')
+
+    generator = Generator(prefix, days, redemptions_per_member, seed=seed)
+    totals = {'venues': venues, 'users': venues, 'redemptions': 0, 'achievements': 0, 'activity_logs': 0}
+    with historical_timestamps(User, InfluencerProfile, VenueProfile, Achievement, Redemption):
+        with transaction.atomic():
+            generator.create_venues(venues)
+        for start in range(0, influencers, batch_size):
+            counts = generator.create_influencers(start, min(batch_size, influencers - start))
+            for key, value in counts.items():
+                totals[key] += value
+            if progress:
+                progress(totals)
+
+    reconcile_platform_counters()
+    rebuild_venue_daily_stats()
+    rebuild_leaderboards()
+    return totals
+
+
+def clear(prefix='load'):
+    """Delete every account created by generate() with this prefix"""
+    users = User.objects.filter(username__startswith=f'{prefix}_')
+    # Children first, as plain DELETEs, so the cascade below stays small
+    ActivityLog.objects.filter(user__in=users).delete()
+    Achievement.objects.filter(influencer__user__in=users).delete()
+    LeaderboardEntry.objects.filter(influencer__user__in=users).delete()
+    Redemption.objects.filter(influencer__user__in=users).delete()
+    Redemption.objects.filter(venue__user__in=users).delete()
+    deleted, _ = users.delete()
+
+    reconcile_platform_counters()
+    rebuild_venue_daily_stats()
+    rebuild_leaderboards()
+    return deleted
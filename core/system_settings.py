@@ -0,0 +1,124 @@
+"""
+Runtime-tunable settings.
+
+get_setting(name) returns HAIPCLUB_SETTINGS[name] overlaid with the
+SystemSettings row of the same key, so values such as
+MAX_REDEMPTION_AMOUNT or TIER_THRESHOLDS can be changed from the admin
+without a deploy.
+
+Every SystemSettings row is loaded once per process and kept in memory.
+Saving or deleting a row stores a new version token in the default cache.
+That cache is shared by every worker (file-based or Redis, see
+core.caching). Each lookup compares the token it loaded with against the
+cached one and reloads on mismatch. That costs a cache read, not a query,
+so a change made in one worker reaches all of them on their next lookup.
+A process also reloads once its copy is older than
+HAIPCLUB_SETTINGS['SYSTEM_SETTINGS_MAX_AGE'] seconds. That bounds how long
+a change stays unseen in the cases the token misses: queryset update()s
+that skip the signal, and CACHE_BACKEND=locmem, where each process has
+its own cache.
+
+Values are stored as JSON (500, 2.5, true, {"SILVER": 1500}); anything that
+is not valid JSON is used as a plain string. A value is converted to the
+type of its HAIPCLUB_SETTINGS default, and dict defaults are merged key by
+key (case-insensitively), so a row only needs the keys it changes.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from copy import deepcopy
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_SETTINGS_VERSION_CACHE_KEY = 'core:system_settings_version'
+
+_MISSING = object()
+
+
+def _parse(raw):
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def _overlay(name, default, value):
+    """Merge or coerce a stored value onto its HAIPCLUB_SETTINGS default"""
+    if default is _MISSING or default is None:
+        return value
+    if isinstance(default, dict):
+        if not isinstance(value, dict):
+            raise ValueError(f'{name} must be a JSON object')
+        merged = deepcopy(default)
+        keys = {str(key).lower(): key for key in default}
+        for key, item in value.items():
+            merged[keys.get(str(key).lower(), key)] = item
+        return merged
+    if isinstance(value, type(default)):
+        return value
+    if isinstance(default, (int, float)) and not isinstance(default, bool) and isinstance(value, (int, float)):
+        # Allow 0.5 for an hours setting whose default happens to be an int
+        return value
+    return type(default)(value)
+
+
+class SystemSettingsStore:
+    """In-process copy of HAIPCLUB_SETTINGS merged with SystemSettings rows"""
+
+    def __init__(self):
+        self._values = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_stale(self):
+        if self._values is None:
+            return True
+        max_age = settings.HAIPCLUB_SETTINGS.get('SYSTEM_SETTINGS_MAX_AGE', 60)
+        if time.monotonic() - self._loaded_at > max_age:
+            return True
+        return cache.get(SYSTEM_SETTINGS_VERSION_CACHE_KEY) != self._version
+
+    def _load(self):
+        from .models import SystemSettings
+
+        # Read the version first so a change made during the load triggers another one
+        version = cache.get(SYSTEM_SETTINGS_VERSION_CACHE_KEY)
+        values = deepcopy(settings.HAIPCLUB_SETTINGS)
+        for key, raw in SystemSettings.objects.values_list('key', 'value'):
+            try:
+                values[key] = _overlay(key, values.get(key, _MISSING), _parse(raw))
+            except (TypeError, ValueError, ArithmeticError) as e:
+                logger.error(f"Ignoring invalid system setting {key}={raw!r}: {str(e)}")
+        self._values = values
+        self._version = version
+        self._loaded_at = time.monotonic()
+
+    def get_all(self):
+        if self._is_stale():
+            with self._lock:
+                if self._is_stale():
+                    self._load()
+        return self._values
+
+    def invalidate(self):
+        self._values = None
+
+
+system_settings = SystemSettingsStore()
+
+
+def get_setting(name, default=None):
+    """HAIPCLUB_SETTINGS[name] with any SystemSettings override applied"""
+    return system_settings.get_all().get(name, default)
+
+
+def bump_settings_version():
+    """Make every process reload SystemSettings on its next lookup"""
+    cache.set(SYSTEM_SETTINGS_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+    system_settings.invalidate()
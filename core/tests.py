@@ -1,3 +1,1013 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import activity, events, instagram_lookup, leaderboard
+from .allowances import current_reset_boundary, due_for_reset, reset_allowances
+from .events import dispatch_due
+from .exports import parse_date_range, redemption_rows, redemptions_for_export, settlement_rows, text_cell
+from .partitions import add_months, archive_month, list_partitions, month_floor, split_month
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page, parse_page_size
+from .qr_tokens import InvalidQRToken, is_qr_token_valid, make_qr_token, verify_qr_token
+from .redemptions import RedemptionError, redeem
+from .settlement import bulk_confirm_redemptions, bulk_refund_redemptions
+from .system_settings import bump_settings_version
+from .tiering import get_tier_thresholds, retier, tier_for_xp
+from .models import (
+    User, InfluencerProfile, VenueProfile, Redemption, ActivityLog, Achievement, PendingEventBatch, PlatformCounter,
+    SystemSettings, LeaderboardEntry, LeaderboardLock,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='haipclub-tests-')
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    HAIPCLUB_SETTINGS={**settings.HAIPCLUB_SETTINGS, 'DOMAIN_EVENTS_ASYNC': False, 'ACTIVITY_LOG_ASYNC': False},
+)
+class CoreTestCase(TestCase):
+    """Event subscribers and activity logging run inline; QR images go to a scratch directory"""
+
+    def make_influencer(self, username, **fields):
+        user = User.objects.create_user(username, password='pw', role='influencer')
+        # The signup signal leaves the handle blank, which is unique
+        InfluencerProfile.objects.filter(user=user).update(instagram_username=username, **fields)
+        return InfluencerProfile.objects.get(user=user)
+
+    def make_venue(self, username, **fields):
+        user = User.objects.create_user(username, password='pw', role='venue')
+        VenueProfile.objects.filter(user=user).update(venue_name=username.title(), **fields)
+        return VenueProfile.objects.get(user=user)
+
+    def make_redemption(self, influencer, venue, amount='10.00', status='confirmed', **fields):
+        amount = Decimal(amount)
+        return Redemption.objects.create(
+            influencer=influencer,
+            venue=venue,
+            amount=amount,
+            status=status,
+            qr_token_used=influencer.qr_code_token,
+            balance_before=influencer.current_balance,
+            balance_after=influencer.current_balance - amount,
+            **fields
+        )
+
+
+class DomainEventOutboxTests(CoreTestCase):
+    def setUp(self):
+        self.influencer = self.make_influencer('outbox_influencer')
+        self.venue = self.make_venue('outbox_venue')
+
+    def confirm(self, amount='10.00'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.make_redemption(self.influencer, self.venue, amount)
+
+    def test_confirmed_redemption_is_applied_once_and_leaves_no_pending_batches(self):
+        xp_before = self.influencer.xp_points
+        self.confirm('25.00')
+
+        self.influencer.refresh_from_db()
+        self.venue.refresh_from_db()
+        self.assertEqual(self.influencer.total_redemptions, 1)
+        self.assertGreater(self.influencer.xp_points, xp_before)
+        self.assertEqual(self.venue.total_redemptions, 1)
+        self.assertEqual(self.venue.total_redeemed_amount, Decimal('25.00'))
+        self.assertFalse(PendingEventBatch.objects.exists())
+
+    def test_batches_are_written_in_the_publishing_transaction(self):
+        # Without the commit nothing is dispatched, but the events are recorded
+        self.make_redemption(self.influencer, self.venue)
+        handlers = set(PendingEventBatch.objects.values_list('handler', flat=True))
+        self.assertIn('core.subscribers.award_redemption_xp', handlers)
+        self.assertIn('core.subscribers.update_venue_stats', handlers)
+
+    def test_failed_handler_is_kept_and_retried_without_reapplying_the_others(self):
+        failing = mock.Mock(side_effect=RuntimeError('database went away'))
+        with mock.patch.dict(events._handlers, {'core.subscribers.update_venue_stats': failing}):
+            self.confirm('40.00')
+
+        pending = PendingEventBatch.objects.get()
+        self.assertEqual(pending.handler, 'core.subscribers.update_venue_stats')
+        self.assertEqual(pending.attempts, 1)
+        self.assertIn('database went away', pending.last_error)
+        self.assertGreater(pending.next_attempt_at, timezone.now())
+
+        # Not due yet
+        self.assertEqual(dispatch_due(), (0, 0))
+
+        handled, failed = dispatch_due(now=timezone.now() + timedelta(hours=2))
+        self.assertEqual((handled, failed), (1, 0))
+        self.influencer.refresh_from_db()
+        self.venue.refresh_from_db()
+        self.assertEqual(self.influencer.total_redemptions, 1)
+        self.assertEqual(self.venue.total_redemptions, 1)
+        self.assertEqual(self.venue.total_redeemed_amount, Decimal('40.00'))
+        self.assertEqual(PlatformCounter.objects.get(key='total_redemptions').value, 1)
+        self.assertFalse(PendingEventBatch.objects.exists())
+
+    def test_batches_left_by_a_restart_are_picked_up(self):
+        # The process died after the commit, before its worker ran
+        with mock.patch.object(events, '_schedule'):
+            self.confirm('15.00')
+        self.assertTrue(PendingEventBatch.objects.exists())
+
+        dispatch_due(now=timezone.now() + timedelta(hours=2))
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.total_redeemed_amount, Decimal('15.00'))
+        self.assertFalse(PendingEventBatch.objects.exists())
+
+    def test_dispatching_a_handled_batch_again_is_a_no_op(self):
+        with mock.patch.object(events, '_schedule'):
+            self.confirm()
+        batch_ids = list(PendingEventBatch.objects.order_by('pk').values_list('pk', flat=True))
+
+        events.dispatch(batch_ids)
+        events.dispatch(batch_ids)
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.total_redemptions, 1)
+
+
+class ProfileWriteTests(CoreTestCase):
+    """Profile helpers must not write back stale copies of other fields"""
+
+    def setUp(self):
+        self.influencer = self.make_influencer('writer_influencer', current_balance=Decimal('100.00'))
+        self.venue = self.make_venue('writer_venue')
+        self.stale = InfluencerProfile.objects.get(pk=self.influencer.pk)
+
+    def confirm_elsewhere(self):
+        # Subscribers update XP and counts while self.stale is held
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_redemption(self.influencer, self.venue)
+        return InfluencerProfile.objects.get(pk=self.influencer.pk)
+
+    def test_deduct_balance_keeps_concurrent_xp(self):
+        current = self.confirm_elsewhere()
+
+        self.assertTrue(self.stale.deduct_balance(Decimal('30.00')))
+        self.stale.refresh_from_db()
+        self.assertEqual(self.stale.xp_points, current.xp_points)
+        self.assertEqual(self.stale.total_redemptions, 1)
+        self.assertEqual(self.stale.current_balance, Decimal('70.00'))
+        self.assertEqual(self.stale.total_spent, Decimal('30.00'))
+
+    def test_deduct_balance_checks_the_balance_in_the_database(self):
+        InfluencerProfile.objects.filter(pk=self.influencer.pk).update(current_balance=Decimal('5.00'))
+
+        self.assertFalse(self.stale.deduct_balance(Decimal('30.00')))
+        self.assertEqual(self.stale.current_balance, Decimal('5.00'))
+        self.assertEqual(InfluencerProfile.objects.get(pk=self.influencer.pk).total_spent, Decimal('0'))
+
+    def test_rotate_qr_code_keeps_concurrent_xp(self):
+        current = self.confirm_elsewhere()
+        old_token = self.stale.qr_code_token
+
+        self.stale.rotate_qr_code()
+        self.stale.refresh_from_db()
+        self.assertNotEqual(self.stale.qr_code_token, old_token)
+        self.assertEqual(self.stale.xp_points, current.xp_points)
+        self.assertEqual(self.stale.total_redemptions, 1)
+
+    def test_add_xp_adds_to_the_stored_total_and_retiers(self):
+        current = self.confirm_elsewhere()
+
+        self.stale.add_xp(10000)
+        self.assertEqual(self.stale.xp_points, current.xp_points + 10000)
+        self.assertEqual(self.stale.tier, 'elite')
+        self.assertEqual(InfluencerProfile.objects.get(pk=self.influencer.pk).total_redemptions, 1)
+        self.assertTrue(self.stale.achievements.filter(badge_type='tier_upgrade').exists())
+        self.assertEqual(PlatformCounter.objects.get(key='elite_members').value, 1)
+
+
+class RedeemTests(CoreTestCase):
+    def setUp(self):
+        self.influencer = self.make_influencer('redeem_influencer', current_balance=Decimal('100.00'))
+        self.venue = self.make_venue('redeem_venue')
+
+    def redeem(self, amount, influencer=None):
+        influencer = influencer or self.influencer
+        return redeem(self.venue, influencer.user_id, influencer.qr_code_token, Decimal(amount))
+
+    def test_redeem_deducts_the_balance_and_records_the_redemption(self):
+        redemption, influencer = self.redeem('30.00')
+
+        self.assertEqual(redemption.status, 'confirmed')
+        self.assertEqual(redemption.balance_before, Decimal('100.00'))
+        self.assertEqual(redemption.balance_after, Decimal('70.00'))
+        self.assertEqual(influencer.current_balance, Decimal('70.00'))
+        self.assertEqual(InfluencerProfile.objects.get(pk=self.influencer.pk).total_spent, Decimal('30.00'))
+
+    def test_balance_is_checked_against_the_stored_row(self):
+        # self.influencer still says 100.00 after the first redemption
+        self.redeem('80.00')
+
+        with self.assertRaisesMessage(RedemptionError, 'Insufficient balance. Available: $20.00'):
+            self.redeem('30.00')
+        self.assertEqual(Redemption.objects.count(), 1)
+        self.assertEqual(InfluencerProfile.objects.get(pk=self.influencer.pk).current_balance, Decimal('20.00'))
+
+    def test_token_must_belong_to_the_influencer(self):
+        other = self.make_influencer('redeem_other')
+
+        with self.assertRaisesMessage(RedemptionError, 'Invalid influencer or venue'):
+            redeem(self.venue, other.user_id, self.influencer.qr_code_token, Decimal('10.00'))
+        with self.assertRaisesMessage(RedemptionError, 'Invalid or expired QR code'):
+            redeem(self.venue, self.influencer.user_id, 'haip.1.forged', Decimal('10.00'))
+        self.assertFalse(Redemption.objects.exists())
+
+    def test_venue_limit(self):
+        VenueProfile.objects.filter(pk=self.venue.pk).update(max_redemption_amount=Decimal('25.00'))
+        self.venue.refresh_from_db()
+
+        with self.assertRaisesMessage(RedemptionError, 'Amount exceeds venue limit of $25.00'):
+            self.redeem('30.00')
+
+    def test_process_redemption_view(self):
+        self.client.force_login(self.venue.user)
+        response = self.client.post(
+            reverse('core:process_redemption'),
+            {'influencer_id': str(self.influencer.user_id), 'qr_token': self.influencer.qr_code_token, 'amount': '12.50'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.json()['success'], True)
+        self.assertEqual(response.json()['new_balance'], 87.5)
+
+        response = self.client.post(
+            reverse('core:process_redemption'),
+            {'influencer_id': str(self.influencer.user_id), 'qr_token': self.influencer.qr_code_token, 'amount': '500'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.json(), {'success': False, 'error': 'Insufficient balance. Available: $87.50'})
+
+
+class QRTokenTests(CoreTestCase):
+    def setUp(self):
+        self.influencer = self.make_influencer('token_influencer')
+        self.issued_at = 1700000000
+
+    def test_round_trip(self):
+        token = make_qr_token(self.influencer.user_id, issued_at=self.issued_at)
+
+        payload = verify_qr_token(token, now=self.issued_at + 60)
+        self.assertEqual(payload.influencer_id, self.influencer.user_id)
+        self.assertEqual(payload.issued_at, self.issued_at)
+        self.assertEqual(payload.expires_at, self.issued_at + 24 * 3600)
+        self.assertEqual(payload.version, 1)
+
+    def test_profile_token_is_valid(self):
+        self.assertTrue(is_qr_token_valid(self.influencer.qr_code_token))
+        self.assertEqual(verify_qr_token(self.influencer.qr_code_token).influencer_id, self.influencer.user_id)
+
+    def test_expiry(self):
+        token = make_qr_token(self.influencer.user_id, issued_at=self.issued_at)
+        expires_at = self.issued_at + 24 * 3600
+
+        self.assertTrue(is_qr_token_valid(token, now=expires_at - 1))
+        with self.assertRaisesMessage(InvalidQRToken, 'QR token expired'):
+            verify_qr_token(token, now=expires_at)
+
+    def test_tampered_token_is_rejected(self):
+        token = make_qr_token(self.influencer.user_id, issued_at=self.issued_at)
+        payload, _, signature = token.rpartition('.')
+        other = self.make_influencer('token_other')
+        parts = payload.split('.')
+
+        # Another influencer's id, or a later expiry, under the original signature
+        parts[2] = other.user_id.hex
+        with self.assertRaisesMessage(InvalidQRToken, 'Invalid QR token signature'):
+            verify_qr_token('.'.join(parts + [signature]), now=self.issued_at)
+        parts = payload.split('.')
+        parts[4] = '1' + parts[4]
+        with self.assertRaisesMessage(InvalidQRToken, 'Invalid QR token signature'):
+            verify_qr_token('.'.join(parts + [signature]), now=self.issued_at)
+
+        with self.assertRaisesMessage(InvalidQRToken, 'Invalid QR token signature'):
+            verify_qr_token(f'{payload}.{signature[::-1]}', now=self.issued_at)
+
+    @override_settings(SECRET_KEY='another-secret-key')
+    def test_token_signed_with_another_key_is_rejected(self):
+        with override_settings(SECRET_KEY='the-original-secret-key'):
+            token = make_qr_token(self.influencer.user_id, issued_at=self.issued_at)
+        self.assertFalse(is_qr_token_valid(token, now=self.issued_at))
+
+    def test_malformed_tokens(self):
+        for token in ['', None, 123, 'haip.1.forged', 'x' * 300, 'nope.1.a.b.c.d.sig']:
+            with self.subTest(token=token):
+                with self.assertRaisesMessage(InvalidQRToken, 'Malformed QR token'):
+                    verify_qr_token(token)
+                self.assertFalse(is_qr_token_valid(token))
+
+    def test_unsupported_version_is_rejected(self):
+        with mock.patch('core.qr_tokens.QR_TOKEN_VERSION', 2):
+            token = make_qr_token(self.influencer.user_id, issued_at=self.issued_at)
+        with self.assertRaisesMessage(InvalidQRToken, 'Unsupported QR token version'):
+            verify_qr_token(token, now=self.issued_at)
+
+
+class AllowanceResetTests(CoreTestCase):
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2026, 3, 15, 12, 0))
+        last_month = self.now - timedelta(days=30)
+        self.due = [
+            self.make_influencer(f'allowance_due_{i}', current_balance=Decimal('12.50'),
+                                 monthly_allowance=Decimal('200.00') + i, last_allowance_reset=last_month)
+            for i in range(3)
+        ]
+        self.done = self.make_influencer('allowance_done', current_balance=Decimal('40.00'),
+                                         last_allowance_reset=self.now - timedelta(days=2))
+
+    def test_boundary_is_the_start_of_the_local_month(self):
+        boundary = current_reset_boundary(self.now)
+        self.assertEqual(timezone.localtime(boundary).replace(tzinfo=None), datetime(2026, 3, 1))
+        self.assertEqual(
+            set(due_for_reset(self.now).values_list('pk', flat=True)),
+            {profile.pk for profile in self.due}
+        )
+
+    def test_due_profiles_are_reset_in_chunks(self):
+        self.assertEqual(reset_allowances(chunk_size=2, now=self.now), 3)
+
+        for i, profile in enumerate(self.due):
+            profile.refresh_from_db()
+            self.assertEqual(profile.current_balance, Decimal('200.00') + i)
+            self.assertEqual(profile.last_allowance_reset, self.now)
+        self.done.refresh_from_db()
+        self.assertEqual(self.done.current_balance, Decimal('40.00'))
+
+        logs = ActivityLog.objects.filter(action_type='balance_reset')
+        self.assertEqual(logs.count(), 3)
+        self.assertEqual(set(logs.values_list('description', flat=True)), {'Monthly allowance reset'})
+        self.assertEqual(
+            sorted(log.metadata['monthly_allowance'] for log in logs),
+            [200.0, 201.0, 202.0]
+        )
+
+        # Nothing is due again until next month
+        self.assertEqual(reset_allowances(now=self.now), 0)
+
+    def test_admin_reset_of_a_selection_names_the_actor(self):
+        admin = User.objects.create_user('allowance_admin', password='pw', role='admin')
+        selection = InfluencerProfile.objects.filter(pk__in=[self.due[0].pk, self.done.pk])
+
+        self.assertEqual(reset_allowances(selection, actor=admin, now=self.now), 2)
+
+        self.done.refresh_from_db()
+        self.assertEqual(self.done.current_balance, self.done.monthly_allowance)
+        self.assertEqual(InfluencerProfile.objects.get(pk=self.due[1].pk).current_balance, Decimal('12.50'))
+        self.assertEqual(
+            set(ActivityLog.objects.filter(action_type='balance_reset').values_list('description', flat=True)),
+            {'Monthly allowance reset by allowance_admin'}
+        )
+
+
+class SettlementTests(CoreTestCase):
+    def setUp(self):
+        # Balances as they stand after spending $60 of a $110 allowance
+        self.influencer = self.make_influencer(
+            'settle_influencer', current_balance=Decimal('50.00'), total_spent=Decimal('60.00')
+        )
+        self.other = self.make_influencer(
+            'settle_other', current_balance=Decimal('90.00'), total_spent=Decimal('10.00')
+        )
+        self.venue = self.make_venue('settle_venue')
+
+    def test_bulk_confirm_confirms_only_pending_rows(self):
+        pending = [
+            self.make_redemption(self.influencer, self.venue, '20.00', status='pending'),
+            self.make_redemption(self.other, self.venue, '5.00', status='pending'),
+        ]
+        refunded = self.make_redemption(self.influencer, self.venue, '7.00', status='refunded')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            count = bulk_confirm_redemptions(Redemption.objects.all())
+
+        self.assertEqual(count, 2)
+        for redemption in pending:
+            redemption.refresh_from_db()
+            self.assertEqual(redemption.status, 'confirmed')
+            self.assertIsNotNone(redemption.confirmed_at)
+        refunded.refresh_from_db()
+        self.assertEqual(refunded.status, 'refunded')
+
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.total_redemptions, 2)
+        self.assertEqual(self.venue.total_redeemed_amount, Decimal('25.00'))
+        self.assertEqual(PlatformCounter.objects.get(key='total_redemptions').value, 2)
+        self.assertEqual(InfluencerProfile.objects.get(pk=self.influencer.pk).total_redemptions, 1)
+        self.assertFalse(PendingEventBatch.objects.exists())
+
+        # Already confirmed
+        self.assertEqual(bulk_confirm_redemptions(Redemption.objects.all()), 0)
+
+    def test_bulk_refund_returns_the_money(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_redemption(self.influencer, self.venue, '25.00')
+            self.make_redemption(self.influencer, self.venue, '35.00')
+            self.make_redemption(self.other, self.venue, '10.00')
+        pending = self.make_redemption(self.other, self.venue, '3.00', status='pending')
+        xp_before = InfluencerProfile.objects.get(pk=self.influencer.pk).xp_points
+
+        with self.captureOnCommitCallbacks(execute=True):
+            count = bulk_refund_redemptions(Redemption.objects.all())
+
+        self.assertEqual(count, 3)
+        self.assertEqual(Redemption.objects.filter(status='refunded').count(), 3)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'pending')
+
+        self.influencer.refresh_from_db()
+        self.assertEqual(self.influencer.current_balance, Decimal('110.00'))
+        self.assertEqual(self.influencer.total_spent, Decimal('0.00'))
+        self.assertEqual(self.influencer.total_redemptions, 0)
+        self.assertEqual(self.influencer.xp_points, xp_before)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.current_balance, Decimal('100.00'))
+        self.assertEqual(self.other.total_spent, Decimal('0.00'))
+
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.total_redemptions, 0)
+        self.assertEqual(self.venue.total_redeemed_amount, Decimal('0.00'))
+        self.assertEqual(PlatformCounter.objects.get(key='total_redemptions').value, 0)
+
+        # Refunding again changes nothing
+        self.assertEqual(bulk_refund_redemptions(Redemption.objects.all()), 0)
+        self.assertEqual(InfluencerProfile.objects.get(pk=self.influencer.pk).current_balance, Decimal('110.00'))
+
+    def test_bulk_refund_only_touches_the_selection(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            kept = self.make_redemption(self.influencer, self.venue, '25.00')
+            refunded = self.make_redemption(self.influencer, self.venue, '35.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(bulk_refund_redemptions(Redemption.objects.filter(pk=refunded.pk)), 1)
+
+        kept.refresh_from_db()
+        self.assertEqual(kept.status, 'confirmed')
+        self.influencer.refresh_from_db()
+        self.assertEqual(self.influencer.current_balance, Decimal('85.00'))
+        self.assertEqual(self.influencer.total_spent, Decimal('25.00'))
+        self.assertEqual(self.influencer.total_redemptions, 1)
+
+
+class RetierTests(CoreTestCase):
+    def setUp(self):
+        self.bronze = self.make_influencer('tier_bronze', xp_points=200, tier='bronze')
+        self.elite = self.make_influencer('tier_elite', xp_points=12000, tier='elite')
+        PlatformCounter.objects.update_or_create(key='elite_members', defaults={'value': 1})
+
+    def profiles(self):
+        return InfluencerProfile.objects.filter(pk__in=[self.bronze.pk, self.elite.pk])
+
+    def tier(self, profile):
+        return InfluencerProfile.objects.get(pk=profile.pk).tier
+
+    def elite_members(self):
+        return PlatformCounter.objects.get(key='elite_members').value
+
+    def test_tier_for_xp(self):
+        thresholds = get_tier_thresholds()
+        self.assertEqual(thresholds, {'bronze': 0, 'silver': 1000, 'gold': 5000, 'elite': 10000})
+        self.assertEqual(tier_for_xp(999), 'bronze')
+        self.assertEqual(tier_for_xp(1000), 'silver')
+        self.assertEqual(tier_for_xp(9999), 'gold')
+        self.assertEqual(tier_for_xp(10000), 'elite')
+
+    def test_nothing_to_change(self):
+        self.assertEqual(retier(self.profiles()), {})
+        self.assertEqual(self.elite_members(), 1)
+        self.assertFalse(Achievement.objects.filter(badge_type='tier_upgrade').exists())
+
+    def test_promotion_awards_the_tier_upgrade_achievement(self):
+        InfluencerProfile.objects.filter(pk=self.bronze.pk).update(xp_points=10500)
+
+        changes = retier(self.profiles())
+
+        self.assertEqual(changes, {self.bronze.pk: ('bronze', 'elite')})
+        self.assertEqual(self.tier(self.bronze), 'elite')
+        self.assertEqual(self.elite_members(), 2)
+        achievement = Achievement.objects.get(influencer=self.bronze, badge_type='tier_upgrade')
+        self.assertEqual(achievement.title, 'Upgraded to Elite SF Member')
+        self.assertEqual(achievement.xp_reward, 500)
+
+    def test_later_promotion_updates_the_achievement(self):
+        InfluencerProfile.objects.filter(pk=self.bronze.pk).update(xp_points=1500)
+        retier(self.profiles())
+        InfluencerProfile.objects.filter(pk=self.bronze.pk).update(xp_points=6000)
+        retier(self.profiles())
+
+        self.assertEqual(self.tier(self.bronze), 'gold')
+        achievements = Achievement.objects.filter(influencer=self.bronze, badge_type='tier_upgrade')
+        self.assertEqual(achievements.count(), 1)
+        self.assertEqual(achievements.get().title, 'Upgraded to Gold Member')
+
+    def test_demotion_without_an_achievement(self):
+        InfluencerProfile.objects.filter(pk=self.elite.pk).update(xp_points=3000)
+
+        changes = retier(self.profiles())
+
+        self.assertEqual(changes, {self.elite.pk: ('elite', 'silver')})
+        self.assertEqual(self.tier(self.elite), 'silver')
+        self.assertEqual(self.elite_members(), 0)
+        self.assertFalse(Achievement.objects.filter(badge_type='tier_upgrade').exists())
+
+    def test_only_the_queryset_is_retiered(self):
+        InfluencerProfile.objects.filter(pk__in=[self.bronze.pk, self.elite.pk]).update(xp_points=5000)
+
+        retier(InfluencerProfile.objects.filter(pk=self.bronze.pk))
+
+        self.assertEqual(self.tier(self.bronze), 'gold')
+        self.assertEqual(self.tier(self.elite), 'elite')
+
+    def test_thresholds_setting_override(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            SystemSettings.objects.create(key='TIER_THRESHOLDS', value='{"ELITE": 20000, "silver": 100}')
+        # The rollback does not signal, so have the next test reload the settings
+        self.addCleanup(bump_settings_version)
+        self.assertEqual(get_tier_thresholds(), {'bronze': 0, 'silver': 100, 'gold': 5000, 'elite': 20000})
+
+        changes = retier(self.profiles())
+
+        self.assertEqual(changes, {self.bronze.pk: ('bronze', 'silver'), self.elite.pk: ('elite', 'gold')})
+        self.assertEqual(self.elite_members(), 0)
+        self.assertEqual(
+            list(Achievement.objects.filter(badge_type='tier_upgrade').values_list('influencer_id', flat=True)),
+            [self.bronze.pk]
+        )
+
+
+class KeysetPaginationTests(CoreTestCase):
+    def setUp(self):
+        self.influencer = self.make_influencer('page_influencer')
+        self.venue = self.make_venue('page_venue')
+        self.redemptions = [self.make_redemption(self.influencer, self.venue, '1.00') for _ in range(7)]
+        # Several rows share a timestamp, so the id breaks the tie
+        start = timezone.now() - timedelta(days=1)
+        for i, redemption in enumerate(self.redemptions):
+            Redemption.objects.filter(pk=redemption.pk).update(created_at=start + timedelta(minutes=i // 3))
+        self.newest_first = list(Redemption.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+
+    def test_cursor_round_trip(self):
+        created_at = timezone.now()
+        redemption_id = self.redemptions[0].pk
+        cursor = encode_cursor(created_at, redemption_id)
+
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor, Redemption._meta.pk), (created_at, redemption_id))
+
+    def test_invalid_cursors(self):
+        naive = encode_cursor(datetime(2026, 1, 1), self.redemptions[0].pk)
+        for cursor in ['', '!!!', 'bm90IGpzb24', encode_cursor(timezone.now(), 'not-a-uuid'), naive]:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    decode_cursor(cursor, Redemption._meta.pk)
+
+    def test_pages_cover_every_row_once(self):
+        seen = []
+        cursor = None
+        for _ in range(len(self.newest_first)):
+            rows, cursor = keyset_page(Redemption.objects.all(), cursor=cursor, limit=2)
+            seen.extend(row.pk for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.newest_first)
+
+    def test_rows_added_while_paging_do_not_shift_pages(self):
+        rows, cursor = keyset_page(Redemption.objects.all(), limit=3)
+        self.make_redemption(self.influencer, self.venue, '2.00')
+
+        rows, cursor = keyset_page(Redemption.objects.all(), cursor=cursor, limit=3)
+        self.assertEqual([row.pk for row in rows], self.newest_first[3:6])
+
+    def test_page_size(self):
+        self.assertEqual(parse_page_size(None), 20)
+        self.assertEqual(parse_page_size('5'), 5)
+        self.assertEqual(parse_page_size('0'), 1)
+        self.assertEqual(parse_page_size('1000'), 100)
+        self.assertEqual(parse_page_size('lots'), 20)
+
+    def test_venue_api_pages(self):
+        self.client.force_login(self.venue.user)
+        url = reverse('core:venue_redemptions_api')
+
+        first = self.client.get(url, {'limit': 4}).json()
+        self.assertEqual([row['id'] for row in first['results']], [str(pk) for pk in self.newest_first[:4]])
+        self.assertEqual(first['results'][0]['influencer']['instagram_username'], 'page_influencer')
+
+        second = self.client.get(url, {'limit': 4, 'cursor': first['next_cursor']}).json()
+        self.assertEqual([row['id'] for row in second['results']], [str(pk) for pk in self.newest_first[4:]])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_apis_reject_bad_cursors_and_the_wrong_user(self):
+        urls = [reverse('core:influencer_redemptions_api'), reverse('core:venue_redemptions_api'), reverse('core:activity_log_api')]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.client.force_login(self.influencer.user)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, {'cursor': 'garbage'})
+                if url == urls[1]:
+                    self.assertEqual(response.status_code, 403)
+                else:
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {'success': False, 'error': 'Invalid cursor'})
+
+        response = self.client.get(urls[0], {'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 3)
+
+
+class SettlementExportTests(CoreTestCase):
+    def setUp(self):
+        self.influencer = self.make_influencer('export_influencer')
+        self.venue_a = self.make_venue('export_a')
+        self.venue_b = self.make_venue('export_b')
+        morning = timezone.make_aware(datetime(2026, 3, 10, 10, 0))
+        # Already 12 March in UTC; settled on the local day
+        late = timezone.make_aware(datetime(2026, 3, 11, 23, 30))
+        for venue, amount, status, created_at in [
+            (self.venue_a, '10.50', 'confirmed', morning),
+            (self.venue_a, '33.00', 'confirmed', morning),
+            (self.venue_a, '5.00', 'refunded', morning),
+            (self.venue_a, '7.25', 'pending', late),
+            (self.venue_b, '20.00', 'confirmed', morning),
+        ]:
+            redemption = self.make_redemption(self.influencer, venue, amount, status=status)
+            Redemption.objects.filter(pk=redemption.pk).update(created_at=created_at)
+
+    def rows(self, queryset):
+        return [[str(value) for value in row] for row in settlement_rows(queryset)]
+
+    def test_days_subtotals_and_grand_total(self):
+        a, b = self.venue_a.pk, self.venue_b.pk
+        self.assertEqual(self.rows(Redemption.objects.all()), [
+            [str(a), 'Export_A', '2026-03-10', '2', '43.50', '1', '5.00', '0', '0.00'],
+            [str(a), 'Export_A', '2026-03-11', '0', '0.00', '0', '0.00', '1', '7.25'],
+            [str(a), 'Export_A', 'total', '2', '43.50', '1', '5.00', '1', '7.25'],
+            [str(b), 'Export_B', '2026-03-10', '1', '20.00', '0', '0.00', '0', '0.00'],
+            [str(b), 'Export_B', 'total', '1', '20.00', '0', '0.00', '0', '0.00'],
+            ['', 'TOTAL', '', '3', '63.50', '1', '5.00', '1', '7.25'],
+        ])
+
+    def test_filtered_to_one_venue_and_day(self):
+        queryset = redemptions_for_export(self.venue_a, date(2026, 3, 11), date(2026, 3, 11))
+        self.assertEqual(self.rows(queryset), [
+            [str(self.venue_a.pk), 'Export_A', '2026-03-11', '0', '0.00', '0', '0.00', '1', '7.25'],
+            [str(self.venue_a.pk), 'Export_A', 'total', '0', '0.00', '0', '0.00', '1', '7.25'],
+            ['', 'TOTAL', '', '0', '0.00', '0', '0.00', '1', '7.25'],
+        ])
+
+    def test_empty_export_has_a_zero_total(self):
+        self.assertEqual(self.rows(Redemption.objects.none()), [
+            ['', 'TOTAL', '', '0', '0.00', '0', '0.00', '0', '0.00'],
+        ])
+
+    def test_redemption_rows_by_venue_newest_first(self):
+        rows = list(redemption_rows(Redemption.objects.all()))
+
+        self.assertEqual([row[3] for row in rows], [self.venue_a.pk] * 4 + [self.venue_b.pk])
+        created = [row[1] for row in rows[:4]]
+        self.assertEqual(created, sorted(created, reverse=True))
+        self.assertEqual(rows[0][6], Decimal('7.25'))
+
+    def test_user_entered_cells_cannot_be_formulas(self):
+        VenueProfile.objects.filter(pk=self.venue_b.pk).update(venue_name='=HYPERLINK("http://x","y")')
+        InfluencerProfile.objects.filter(pk=self.influencer.pk).update(instagram_username='@sum')
+        Redemption.objects.filter(venue=self.venue_b).update(notes='+1+cmd|/c calc')
+
+        [row] = redemption_rows(Redemption.objects.filter(venue=self.venue_b))
+        self.assertEqual(row[4:6], ['\'=HYPERLINK("http://x","y")', "'@sum"])
+        self.assertEqual(row[8], "'+1+cmd|/c calc")
+        settlement = list(settlement_rows(Redemption.objects.filter(venue=self.venue_b)))
+        self.assertEqual({row[1] for row in settlement[:-1]}, {'\'=HYPERLINK("http://x","y")'})
+
+        self.assertEqual(text_cell('-5'), "'-5")
+        self.assertEqual(text_cell('\t=1'), "'\t=1")
+        self.assertEqual(text_cell('Joe\'s = best'), "Joe's = best")
+        self.assertEqual(text_cell(Decimal('-5.00')), Decimal('-5.00'))
+
+    def test_parse_date_range(self):
+        self.assertEqual(parse_date_range('2026-03-01', '2026-03-31'), (date(2026, 3, 1), date(2026, 3, 31)))
+        self.assertEqual(parse_date_range('', None), (None, None))
+        with self.assertRaisesMessage(ValueError, "Invalid date '03/01/2026', expected YYYY-MM-DD"):
+            parse_date_range('03/01/2026', '')
+        with self.assertRaisesMessage(ValueError, 'The end date is before the start date'):
+            parse_date_range('2026-03-31', '2026-03-01')
+
+    def test_venue_downloads_its_own_settlement(self):
+        self.client.force_login(self.venue_b.user)
+        response = self.client.get(reverse('core:export_settlement_csv'), {'start': '2026-03-01'})
+
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename="settlement_venue-{self.venue_b.pk}_2026-03-01-to-now.csv"'
+        )
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:5], ['venue_id', 'venue', 'date', 'confirmed_count', 'confirmed_amount'])
+        self.assertEqual(rows[-1], ['', 'TOTAL', '', '1', '20.00', '0', '0.00', '0', '0.00'])
+
+        response = self.client.get(reverse('core:export_settlement_csv'), {'start': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+class LeaderboardMergeTests(CoreTestCase):
+    board, period = 'top_spenders', '2026-01'
+
+    def setUp(self):
+        self.influencers = [self.make_influencer(f'board_{i}') for i in range(12)]
+        self.size = leaderboard.BOARD_SIZES[self.board]
+
+    def merge(self, influencer, score):
+        leaderboard._merge(self.board, self.period, influencer.pk, score)
+
+    def ranking(self):
+        return list(
+            LeaderboardEntry.objects.filter(board=self.board, period=self.period).order_by('rank').values_list(
+                'rank', 'influencer_id', 'score'
+            )
+        )
+
+    def fill(self):
+        for i, influencer in enumerate(self.influencers[:self.size]):
+            self.merge(influencer, 100 * (i + 1))
+
+    def test_merge_into_a_full_board(self):
+        self.fill()
+        newcomer, bottom, top = self.influencers[self.size], self.influencers[0], self.influencers[self.size - 1]
+
+        # Too low to get on
+        self.merge(newcomer, 100)
+        self.assertNotIn(newcomer.pk, [pk for _, pk, _ in self.ranking()])
+
+        # Pushes the bottom entry off
+        self.merge(newcomer, 550)
+        ranking = self.ranking()
+        self.assertEqual([rank for rank, _, _ in ranking], list(range(1, self.size + 1)))
+        self.assertEqual(ranking[0][1], top.pk)
+        self.assertEqual(ranking[5][1:], (newcomer.pk, Decimal('550.00')))
+        self.assertNotIn(bottom.pk, [pk for _, pk, _ in ranking])
+
+        # Moving up and dropping out keep the ranks contiguous
+        self.merge(newcomer, 5000)
+        self.merge(top, None)
+        ranking = self.ranking()
+        self.assertEqual(ranking[0][1], newcomer.pk)
+        self.assertEqual([rank for rank, _, _ in ranking], list(range(1, self.size)))
+        self.assertNotIn(top.pk, [pk for _, pk, _ in ranking])
+
+    def test_a_merge_reads_the_board_after_taking_its_lock(self):
+        first, second = self.influencers[:2]
+        lock_board = leaderboard._lock_board
+
+        def lock_after_another_merge(board, period):
+            # Another worker's merge commits while this one waits for the lock
+            if lock.call_count == 1:
+                self.merge(second, 200)
+            lock_board(board, period)
+
+        with mock.patch.object(leaderboard, '_lock_board', side_effect=lock_after_another_merge) as lock:
+            self.merge(first, 100)
+
+        self.assertEqual(self.ranking(), [(1, second.pk, Decimal('200.00')), (2, first.pk, Decimal('100.00'))])
+
+    def test_merges_of_other_boards_do_not_share_a_lock(self):
+        self.merge(self.influencers[0], 100)
+        leaderboard._merge(self.board, '2026-02', self.influencers[1].pk, 100)
+
+        self.assertEqual(
+            set(LeaderboardLock.objects.filter(board=self.board).values_list('period', flat=True)),
+            {'2026-01', '2026-02'}
+        )
+
+    def test_add_xp_and_rebuild_agree(self):
+        influencer = self.influencers[0]
+        influencer.add_xp(20000)
+        top_xp = LeaderboardEntry.objects.filter(board='top_xp', period='')
+        self.assertEqual(top_xp.get(rank=1).influencer_id, influencer.pk)
+        merged = list(top_xp.values_list('rank', 'influencer_id', 'score'))
+
+        leaderboard.rebuild_leaderboards()
+        self.assertEqual(list(top_xp.values_list('rank', 'influencer_id', 'score')), merged)
+        self.assertEqual(
+            LeaderboardEntry.objects.get(board='elite_members', period='').influencer_id, influencer.pk
+        )
+
+
+class ActivityLogArchiveTests(CoreTestCase):
+    def setUp(self):
+        self.user = self.make_influencer('archive_influencer').user
+        ActivityLog.objects.all().delete()
+        self.current = month_floor(timezone.now())
+        self.archive_dir = tempfile.mkdtemp(dir=MEDIA_ROOT)
+        for months_ago in (0, 5, 11, 12, 14):
+            month = add_months(self.current, -months_ago)
+            ActivityLog.objects.create(
+                user=self.user,
+                action_type='qr_scan',
+                description=f'{months_ago} months ago',
+                metadata={'months_ago': months_ago},
+                created_at=datetime(month.year, month.month, 15, tzinfo=dt_timezone.utc)
+            )
+
+    def run_command(self, **options):
+        out = io.StringIO()
+        call_command('archive_activity_logs', archive_dir=self.archive_dir, stdout=out, **options)
+        return out.getvalue()
+
+    def descriptions(self):
+        return sorted(ActivityLog.objects.values_list('description', flat=True))
+
+    def read_archive(self, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            return [json.loads(line) for line in archive]
+
+    def test_split_and_archive_a_month(self):
+        month = add_months(self.current, -14)
+
+        self.assertEqual(split_month(month), 1)
+        self.assertIn(month, list_partitions())
+        self.assertNotIn('14 months ago', self.descriptions())
+
+        path, count = archive_month(month, self.archive_dir)
+        self.assertEqual(count, 1)
+        self.assertNotIn(month, list_partitions())
+        [record] = self.read_archive(path)
+        self.assertEqual(record['description'], '14 months ago')
+        self.assertEqual(record['metadata'], {'months_ago': 14})
+
+    def test_retained_months_stay_visible(self):
+        output = self.run_command(keep_months=12)
+
+        self.assertIn('(2 months archived)', output)
+        self.assertEqual(self.descriptions(), ['0 months ago', '11 months ago', '5 months ago'])
+        self.assertEqual(list_partitions(), {})
+        archives = sorted(os.listdir(self.archive_dir))
+        self.assertEqual(len(archives), 2)
+        self.assertEqual(
+            sorted(self.read_archive(os.path.join(self.archive_dir, name))[0]['description'] for name in archives),
+            ['12 months ago', '14 months ago']
+        )
+
+        # Still visible to the history API
+        self.client.force_login(self.user)
+        results = self.client.get(reverse('core:activity_log_api'), {'limit': 10}).json()['results']
+        self.assertEqual(len(results), 3)
+
+    def test_tables_within_retention_are_moved_back(self):
+        # Left by an earlier version that split months out early
+        split_month(add_months(self.current, -5))
+        self.assertNotIn('5 months ago', self.descriptions())
+
+        self.run_command(keep_months=12)
+
+        self.assertIn('5 months ago', self.descriptions())
+        self.assertEqual(list_partitions(), {})
+
+    def test_dry_run_changes_nothing(self):
+        output = self.run_command(keep_months=3, dry_run=True)
+
+        self.assertIn(f'Would archive and drop {add_months(self.current, -5):%Y-%m}', output)
+        self.assertEqual(len(self.descriptions()), 5)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+
+class InstagramLookupThrottleTests(CoreTestCase):
+    usernames = ['throttle_first', 'throttle_second', 'throttle_third']
+
+    def setUp(self):
+        for username in self.usernames:
+            instagram_lookup.caches['profiles'].delete(instagram_lookup._cache_key(username))
+        for address in ['203.0.113.7', '198.51.100.1', '10.0.0.2']:
+            instagram_lookup.cache.delete(f'core:ig_lookup:client:{address}')
+        patcher = mock.patch.object(
+            instagram_lookup.instagram_service, 'get_profile_info', return_value={'username': 'someone'}
+        )
+        self.get_profile_info = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def lookup(self, username, remote_addr='203.0.113.7', forwarded_for=None):
+        extra = {'REMOTE_ADDR': remote_addr}
+        if forwarded_for:
+            extra['HTTP_X_FORWARDED_FOR'] = forwarded_for
+        return self.client.get(reverse('core:fetch_instagram_data'), {'username': username}, **extra)
+
+    def test_second_uncached_lookup_is_throttled(self):
+        self.assertEqual(self.lookup('throttle_first').status_code, 200)
+        self.assertEqual(self.lookup('throttle_second').status_code, 429)
+        # Cached answers cost nothing and are not throttled
+        self.assertEqual(self.lookup('throttle_first').status_code, 200)
+        self.assertEqual(self.get_profile_info.call_count, 1)
+
+    def test_forwarded_for_does_not_reset_the_throttle(self):
+        self.assertEqual(self.lookup('throttle_first', forwarded_for='198.51.100.1').status_code, 200)
+        self.assertEqual(self.lookup('throttle_second', forwarded_for='198.51.100.2').status_code, 429)
+        self.assertEqual(self.get_profile_info.call_count, 1)
+
+    def test_trusted_proxy_address(self):
+        haipclub_settings = {**settings.HAIPCLUB_SETTINGS, 'TRUSTED_PROXY_COUNT': 1}
+        with self.settings(HAIPCLUB_SETTINGS=haipclub_settings):
+            # The proxy appends the address it saw; the first entry is the client's own claim
+            self.assertEqual(self.lookup('throttle_first', '10.0.0.2', 'spoofed, 198.51.100.1').status_code, 200)
+            self.assertEqual(self.lookup('throttle_second', '10.0.0.2', 'other, 198.51.100.1').status_code, 429)
+            self.assertEqual(self.lookup('throttle_third', '10.0.0.2', '203.0.113.7').status_code, 200)
+
+
+class ActivitySpoolTests(CoreTestCase):
+    def setUp(self):
+        self.user = self.make_influencer('spool_influencer').user
+        ActivityLog.objects.all().delete()
+        self.spool_dir = Path(tempfile.mkdtemp(dir=MEDIA_ROOT))
+
+    def entry(self, description):
+        return {
+            'user_id': self.user.pk,
+            'action_type': 'qr_scan',
+            'description': description,
+            'metadata': {},
+            'ip_address': None,
+            'user_agent': '',
+            'created_at': timezone.now(),
+        }
+
+    def spool(self, name, *descriptions, extra=''):
+        path = self.spool_dir / name
+        with open(path, 'w', encoding='utf-8') as spool:
+            for description in descriptions:
+                spool.write(activity._serialize(self.entry(description)) + '\n')
+            spool.write(extra)
+        return path
+
+    def descriptions(self):
+        return sorted(ActivityLog.objects.values_list('description', flat=True))
+
+    def test_replay_writes_and_removes_spool_files(self):
+        activity.spool_entries([self.entry('one'), self.entry('two')], self.spool_dir)
+
+        self.assertEqual(activity.replay_spool(self.spool_dir), (2, 0, 0))
+        self.assertEqual(self.descriptions(), ['one', 'two'])
+        self.assertEqual(list(self.spool_dir.iterdir()), [])
+
+    def test_unreadable_lines_are_quarantined(self):
+        self.spool('activity-1.jsonl', 'one', 'two', extra='{"user_id": "1", "descr\n[]\n')
+
+        self.assertEqual(activity.replay_spool(self.spool_dir), (2, 0, 2))
+        self.assertEqual(self.descriptions(), ['one', 'two'])
+        self.assertEqual([path.name for path in self.spool_dir.iterdir()], [activity.QUARANTINE_FILE])
+        self.assertEqual(
+            (self.spool_dir / activity.QUARANTINE_FILE).read_text().splitlines(),
+            ['{"user_id": "1", "descr', '[]']
+        )
+
+    def test_rows_that_fail_stay_spooled(self):
+        self.spool('activity-1.jsonl', 'one')
+        with mock.patch.object(activity, 'write_entries', side_effect=RuntimeError('database went away')):
+            self.assertEqual(activity.replay_spool(self.spool_dir), (0, 1, 0))
+
+        [path] = self.spool_dir.iterdir()
+        self.assertRegex(path.name, r'^activity-\d+\.jsonl$')
+        self.assertEqual(activity.replay_spool(self.spool_dir), (1, 0, 0))
+        self.assertEqual(self.descriptions(), ['one'])
+
+    def test_stale_claims_are_replayed_and_live_ones_left_alone(self):
+        stale = self.spool('activity-1.replaying', 'stale')
+        old = time.time() - activity.SPOOL_CLAIM_TIMEOUT - 60
+        os.utime(stale, (old, old))
+        live = self.spool('activity-2-0a1b2c3d.replaying', 'live')
+
+        self.assertEqual(activity.replay_spool(self.spool_dir), (1, 0, 0))
+        self.assertEqual(self.descriptions(), ['stale'])
+        self.assertEqual(list(self.spool_dir.iterdir()), [live])
+
+    def test_file_claimed_by_another_replay_is_skipped(self):
+        path = self.spool('activity-1.jsonl', 'one')
+        claim = activity._claim
+
+        def claimed_elsewhere_first(path):
+            # Another replay renames the file between our glob and our rename
+            path.rename(path.with_name('activity-9-ffffffff.replaying'))
+            return claim(path)
+
+        with mock.patch.object(activity, '_claim', side_effect=claimed_elsewhere_first):
+            self.assertEqual(activity.replay_spool(self.spool_dir), (0, 0, 0))
+        self.assertFalse(path.exists())
+        self.assertFalse(ActivityLog.objects.exists())
@@ -0,0 +1,113 @@
+"""
+Tier computation driven by the TIER_THRESHOLDS setting.
+
+A SystemSettings row with key TIER_THRESHOLDS and a JSON object value
+(e.g. {"SILVER": 1500}) overrides individual thresholds at runtime (see
+core.system_settings). retier() applies the thresholds to any set of
+profiles with a single UPDATE ... SET tier = CASE ... statement, so
+changing them never means saving profiles one by one.
+"""
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from .system_settings import get_setting
+
+TIER_ORDER = ['bronze', 'silver', 'gold', 'elite']
+
+
+def get_tier_thresholds():
+    """{tier: minimum XP}, e.g. {'bronze': 0, 'silver': 1000, ...}"""
+    configured = get_setting('TIER_THRESHOLDS')
+    return {tier: int(configured[tier.upper()]) for tier in TIER_ORDER}
+
+
+def tier_for_xp(xp_points, thresholds=None):
+    """Highest tier whose threshold the XP total reaches"""
+    thresholds = thresholds or get_tier_thresholds()
+    for tier in reversed(TIER_ORDER):
+        if xp_points >= thresholds[tier]:
+            return tier
+    return TIER_ORDER[0]
+
+
+def tier_case(field='xp_points', thresholds=None):
+    """SQL CASE expression computing the tier from an XP column"""
+    thresholds = thresholds or get_tier_thresholds()
+    return Case(
+        *[When(**{f'{field}__gte': thresholds[tier]}, then=Value(tier)) for tier in reversed(TIER_ORDER[1:])],
+        default=Value(TIER_ORDER[0])
+    )
+
+
+def is_promotion(old_tier, new_tier):
+    return TIER_ORDER.index(new_tier) > TIER_ORDER.index(old_tier)
+
+
+def award_tier_upgrades(promotions):
+    """
+    Record the tier_upgrade achievement for {influencer_id: new_tier}.
+    Achievements are unique per badge, so an existing tier_upgrade row is
+    updated to the latest tier instead of being duplicated.
+    """
+    from .models import Achievement, InfluencerProfile
+
+    if not promotions:
+        return
+    tier_names = dict(InfluencerProfile.TIER_CHOICES)
+    reward = get_setting('XP_REWARDS')['TIER_UPGRADE']
+    Achievement.objects.bulk_create(
+        [
+            Achievement(
+                influencer_id=pk,
+                badge_type='tier_upgrade',
+                title=f"Upgraded to {tier_names[tier]}",
+                description=f"Congratulations! You've reached {tier_names[tier]} status.",
+                xp_reward=reward
+            )
+            for pk, tier in promotions.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['influencer', 'badge_type'],
+        update_fields=['title', 'description', 'xp_reward', 'earned_at']
+    )
+
+
+def pending_tier_changes(queryset=None, thresholds=None):
+    """{influencer_id: (current tier, computed tier)} for profiles in the wrong tier"""
+    from .models import InfluencerProfile
+
+    queryset = InfluencerProfile.objects.all() if queryset is None else queryset
+    case = tier_case(thresholds=thresholds)
+    return {
+        pk: (old_tier, new_tier)
+        for pk, old_tier, new_tier in queryset.annotate(computed_tier=case).exclude(
+            tier=case
+        ).values_list('pk', 'tier', 'computed_tier')
+    }
+
+
+def retier(queryset=None, thresholds=None):
+    """
+    Move every profile in queryset to the tier its XP earns, award
+    tier_upgrade achievements to promoted members and keep the
+    elite_members counter in step. Returns pending_tier_changes() as it
+    was before the update.
+    """
+    from .models import InfluencerProfile, PlatformCounter
+
+    queryset = InfluencerProfile.objects.all() if queryset is None else queryset
+    thresholds = thresholds or get_tier_thresholds()
+    with transaction.atomic():
+        changes = pending_tier_changes(queryset.select_for_update(), thresholds)
+        if not changes:
+            return changes
+
+        case = tier_case(thresholds=thresholds)
+        queryset.exclude(tier=case).update(tier=case, updated_at=timezone.now())
+
+        elite_delta = sum((new == 'elite') - (old == 'elite') for old, new in changes.values())
+        if elite_delta:
+            PlatformCounter.increment('elite_members', elite_delta)
+        award_tier_upgrades({pk: new for pk, (old, new) in changes.items() if is_promotion(old, new)})
+    return changes
@@ -16,6 +16,18 @@ urlpatterns = [
     path('api/process-redemption/', views.process_redemption, name='process_redemption'),
     path('api/regenerate-qr/', views.regenerate_qr_code, name='regenerate_qr_code'),
     
+    # History APIs (cursor-paginated)
+    path('api/influencer/redemptions/', views.influencer_redemptions_api, name='influencer_redemptions_api'),
+    path('api/venue/redemptions/', views.venue_redemptions_api, name='venue_redemptions_api'),
+    path('api/activity/', views.activity_log_api, name='activity_log_api'),
+    
+    # CSV exports (streamed)
+    path('export/redemptions.csv', views.export_redemptions_csv, name='export_redemptions_csv'),
+    path('export/settlement.csv', views.export_settlement_csv, name='export_settlement_csv'),
+    
+    # Signup form helpers
+    path('ajax/fetch-instagram-data/', views.fetch_instagram_data, name='fetch_instagram_data'),
+    
     # Gamification
     path('achievements/', views.AchievementsView.as_view(), name='achievements'),
     path('leaderboard/', views.LeaderboardView.as_view(), name='leaderboard'),
@@ -29,4 +41,8 @@ urlpatterns = [
     path('admin/waitlist/<int:pk>/', views.AdminWaitlistDetailView.as_view(), name='admin_waitlist_detail'),
     path('admin/waitlist/<int:pk>/approve/', views.approve_waitlist, name='approve_waitlist'),
     path('admin/waitlist/<int:pk>/reject/', views.reject_waitlist, name='reject_waitlist'),
+    
+    # Request profiling (staff only)
+    path('admin/profiling/', views.profiling_stats, name='profiling_stats'),
+    path('admin/caches/', views.cache_stats, name='cache_stats'),
 ] 
\ No newline at end of file
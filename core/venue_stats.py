@@ -0,0 +1,100 @@
+"""
+Venue daily statistics.
+
+Confirmed redemptions are rolled up into VenueDailyStats as they happen
+(see Redemption.save), so a venue dashboard reads one row for "today"
+instead of loading every redemption of the day into Python.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Redemption, VenueDailyStats
+
+REBUILD_BATCH_SIZE = 500
+
+
+def local_day_bounds(date):
+    """Aware [start, end) datetimes for a local day, so created_at indexes apply"""
+    start = timezone.make_aware(datetime.combine(date, time.min))
+    return start, timezone.make_aware(datetime.combine(date + timedelta(days=1), time.min))
+
+
+def get_venue_daily_stats(venue, date=None):
+    """Return {'redemption_count', 'total_amount'} for one venue-day in one query"""
+    date = date or timezone.localdate()
+    row = VenueDailyStats.objects.filter(venue=venue, date=date).values_list(
+        'redemption_count', 'total_amount'
+    ).first()
+    count, total = row or (0, Decimal('0'))
+    return {'redemption_count': count, 'total_amount': total}
+
+
+def compute_venue_daily_stats(venue, date=None):
+    """Aggregate a venue-day straight from Redemption (Count + Sum in one query)"""
+    start, end = local_day_bounds(date or timezone.localdate())
+    totals = Redemption.objects.filter(
+        venue=venue,
+        status='confirmed',
+        created_at__gte=start,
+        created_at__lt=end
+    ).aggregate(redemption_count=Count('id'), total_amount=Sum('amount'))
+    return {
+        'redemption_count': totals['redemption_count'],
+        'total_amount': totals['total_amount'] or Decimal('0'),
+    }
+
+
+def _upsert(stats):
+    VenueDailyStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=['venue', 'date'],
+        update_fields=['redemption_count', 'total_amount', 'updated_at']
+    )
+
+
+def rebuild_venue_daily_stats(since=None):
+    """
+    Recompute the rollup from Redemption, grouped by venue and local day.
+    Only days on or after `since` are touched when given. Returns the
+    number of venue-day rows written.
+    """
+    redemptions = Redemption.objects.filter(status='confirmed')
+    existing = VenueDailyStats.objects.all()
+    if since:
+        redemptions = redemptions.filter(created_at__gte=local_day_bounds(since)[0])
+        existing = existing.filter(date__gte=since)
+
+    rows = redemptions.annotate(day=TruncDate('created_at')).values('venue_id', 'day').annotate(
+        redemption_count=Count('id'),
+        total_amount=Sum('amount')
+    ).order_by()
+
+    written = set()
+    batch = []
+    now = timezone.now()
+    for row in rows.iterator():
+        batch.append(VenueDailyStats(
+            venue_id=row['venue_id'],
+            date=row['day'],
+            redemption_count=row['redemption_count'],
+            total_amount=row['total_amount'],
+            updated_at=now
+        ))
+        written.add((row['venue_id'], row['day']))
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            _upsert(batch)
+            batch = []
+    _upsert(batch)
+
+    # Days whose redemptions were all refunded or removed
+    stale = [
+        pk for pk, venue_id, day in existing.values_list('pk', 'venue_id', 'date')
+        if (venue_id, day) not in written
+    ]
+    VenueDailyStats.objects.filter(pk__in=stale).delete()
+    return len(written)
@@ -4,11 +4,10 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth import login
 from django.contrib import messages
 from django.views.generic import TemplateView, CreateView, ListView, DetailView
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.urls import reverse_lazy
-from django.utils import timezone
-from django.db import transaction
-from django.conf import settings
+from django.utils.http import parse_etags
+from django.core.exceptions import ValidationError
 import json
 import secrets
 from decimal import Decimal
@@ -17,6 +16,18 @@ from .models import (
     User, InfluencerProfile, VenueProfile, Achievement, 
     Redemption, ActivityLog, SystemSettings
 )
+from .qr_tokens import verify_qr_token, InvalidQRToken
+from .redemptions import RedemptionError, redeem
+from .counters import get_platform_counters
+from .venue_stats import get_venue_daily_stats
+from .leaderboard import get_leaderboards
+from .activity import log_activity
+from .dashboard import get_dashboard_context
+from .instagram_lookup import allow_client_lookup, client_address, get_cached_lookup, lookup_profile, normalize_username
+from .profiling import profiling_stats as profiling_stats_store
+from .caching import cache_metrics
+from .pagination import InvalidCursor, keyset_page, parse_page_size
+from .exports import export_csv, export_filename, parse_date_range, redemptions_for_export
 
 class HomeView(TemplateView):
     """Beautiful homepage with OTH Network styling"""
@@ -24,12 +35,7 @@ class HomeView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context.update({
-            'total_influencers': InfluencerProfile.objects.count(),
-            'total_venues': VenueProfile.objects.count(),
-            'total_redemptions': Redemption.objects.filter(status='confirmed').count(),
-            'elite_members': InfluencerProfile.objects.filter(tier='elite').count(),
-        })
+        context.update(get_platform_counters())
         return context
 
 class InfluencerSignUpView(CreateView):
@@ -55,7 +61,7 @@ class InfluencerSignUpView(CreateView):
             )
             
             # Log activity
-            ActivityLog.objects.create(
+            log_activity(
                 user=user,
                 action_type='signup',
                 description=f'New influencer signed up: @{instagram_username}',
@@ -124,36 +130,12 @@ class InfluencerDashboardView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         profile = self.request.user.influencer_profile
         
-        # Recent redemptions
-        recent_redemptions = profile.redemptions.filter(
-            status='confirmed'
-        ).order_by('-created_at')[:5]
+        # Signed QR tokens expire, so hand out a fresh one when needed
+        if profile.qr_code_active and profile.qr_token_expired():
+            profile.rotate_qr_code()
         
-        # Recent achievements
-        recent_achievements = profile.achievements.order_by('-earned_at')[:5]
-        
-        # Progress to next tier
-        tier_thresholds = settings.HAIPCLUB_SETTINGS['TIER_THRESHOLDS']
-        current_xp = profile.xp_points
-        
-        if profile.tier == 'elite':
-            next_tier_xp = None
-            progress_percentage = 100
-        else:
-            tier_order = ['bronze', 'silver', 'gold', 'elite']
-            current_index = tier_order.index(profile.tier)
-            next_tier = tier_order[current_index + 1]
-            next_tier_xp = tier_thresholds[next_tier.upper()]
-            progress_percentage = (current_xp / next_tier_xp) * 100 if next_tier_xp > 0 else 0
-        
-        context.update({
-            'profile': profile,
-            'recent_redemptions': recent_redemptions,
-            'recent_achievements': recent_achievements,
-            'next_tier_xp': next_tier_xp,
-            'progress_percentage': min(progress_percentage, 100),
-            'tier_color': profile.get_tier_color(),
-        })
+        # Recent activity is cached until the profile next changes
+        context.update(get_dashboard_context(profile))
         return context
 
 class VenueDashboardView(LoginRequiredMixin, TemplateView):
@@ -175,18 +157,14 @@ class VenueDashboardView(LoginRequiredMixin, TemplateView):
             status='confirmed'
         ).order_by('-created_at')[:10]
         
-        # Today's stats
-        today = timezone.now().date()
-        today_redemptions = venue.redemptions.filter(
-            created_at__date=today,
-            status='confirmed'
-        )
+        # Today's stats (from the per-day rollup)
+        today_stats = get_venue_daily_stats(venue)
         
         context.update({
             'venue': venue,
             'recent_redemptions': recent_redemptions,
-            'today_redemptions_count': today_redemptions.count(),
-            'today_total_amount': sum(r.amount for r in today_redemptions),
+            'today_redemptions_count': today_stats['redemption_count'],
+            'today_total_amount': today_stats['total_amount'],
         })
         return context
 
@@ -208,9 +186,19 @@ def scan_qr_code(request):
         data = json.loads(request.body)
         qr_token = data.get('qr_token', '')
         
+        # Reject forged or expired tokens before touching the database
+        try:
+            token_payload = verify_qr_token(qr_token)
+        except InvalidQRToken:
+            return JsonResponse({
+                'success': False,
+                'error': 'Invalid or expired QR code'
+            })
+        
         # Find influencer by QR token
         try:
-            profile = InfluencerProfile.objects.get(
+            profile = InfluencerProfile.objects.select_related('user').get(
+                user_id=token_payload.influencer_id,
                 qr_code_token=qr_token,
                 qr_code_active=True
             )
@@ -247,83 +235,34 @@ def process_redemption(request):
     
     try:
         data = json.loads(request.body)
-        influencer_id = data.get('influencer_id', '')
-        amount = Decimal(str(data.get('amount', 0)))
-        qr_token = data.get('qr_token', '')
-        
-        if amount <= 0:
-            return JsonResponse({
-                'success': False,
-                'error': 'Invalid amount'
-            })
         
-        # Get influencer and venue profiles
         try:
-            influencer = InfluencerProfile.objects.get(
-                user__id=influencer_id,
-                qr_code_token=qr_token,
-                qr_code_active=True
-            )
             venue = request.user.venue_profile
-        except (InfluencerProfile.DoesNotExist, AttributeError):
+        except AttributeError:
             return JsonResponse({
                 'success': False,
                 'error': 'Invalid influencer or venue'
             })
         
-        # Check if amount exceeds balance
-        if amount > influencer.current_balance:
-            return JsonResponse({
-                'success': False,
-                'error': f'Insufficient balance. Available: ${influencer.current_balance}'
-            })
-        
-        # Check venue max redemption limit
-        if amount > venue.max_redemption_amount:
+        # Checks, balance deduction and the Redemption row (see core.redemptions)
+        try:
+            redemption, influencer = redeem(
+                venue,
+                data.get('influencer_id', ''),
+                data.get('qr_token', ''),
+                Decimal(str(data.get('amount', 0))),
+                notes=data.get('notes', ''),
+                ip_address=get_client_ip(request)
+            )
+        except RedemptionError as e:
             return JsonResponse({
                 'success': False,
-                'error': f'Amount exceeds venue limit of ${venue.max_redemption_amount}'
+                'error': str(e)
             })
         
-        # Process the redemption
-        with transaction.atomic():
-            balance_before = influencer.current_balance
-            
-            # Deduct from influencer balance
-            if not influencer.deduct_balance(amount):
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Failed to deduct balance'
-                })
-            
-            # Create redemption record
-            redemption = Redemption.objects.create(
-                influencer=influencer,
-                venue=venue,
-                amount=amount,
-                status='confirmed',
-                qr_token_used=qr_token,
-                balance_before=balance_before,
-                balance_after=influencer.current_balance,
-                notes=data.get('notes', '')
-            )
-            
-            # Log activity
-            ActivityLog.objects.create(
-                user=influencer.user,
-                action_type='redemption',
-                description=f'Redeemed ${amount} at {venue.venue_name}',
-                metadata={
-                    'venue_name': venue.venue_name,
-                    'amount': float(amount),
-                    'redemption_id': str(redemption.id)
-                },
-                ip_address=get_client_ip(request)
-            )
-        
         return JsonResponse({
             'success': True,
-            'message': f'${amount} redeemed successfully!',
+            'message': f'${redemption.amount} redeemed successfully!',
             'redemption_id': str(redemption.id),
             'new_balance': float(influencer.current_balance)
         })
@@ -352,29 +291,11 @@ class LeaderboardView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Top influencers by XP
-        top_xp = InfluencerProfile.objects.filter(
-            user__is_active=True
-        ).order_by('-xp_points')[:10]
-        
-        # Top spenders this month
-        current_month = timezone.now().replace(day=1)
-        top_spenders = InfluencerProfile.objects.filter(
-            user__is_active=True,
-            redemptions__created_at__gte=current_month,
-            redemptions__status='confirmed'
-        ).order_by('-total_spent')[:10]
-        
-        # Elite members
-        elite_members = InfluencerProfile.objects.filter(
-            tier='elite',
-            user__is_active=True
-        ).order_by('-xp_points')[:20]
-        
+        boards = get_leaderboards()
         context.update({
-            'top_xp': top_xp,
-            'top_spenders': top_spenders,
-            'elite_members': elite_members,
+            'top_xp': boards['top_xp'],
+            'top_spenders': boards['top_spenders'],
+            'elite_members': boards['elite_members'],
         })
         return context
 
@@ -390,12 +311,10 @@ def regenerate_qr_code(request):
         profile = request.user.influencer_profile
         
         # Generate new QR token and image
-        profile.qr_code_token = profile.generate_qr_token()
-        profile.generate_qr_code()
-        profile.save()
+        profile.rotate_qr_code()
         
         # Log activity
-        ActivityLog.objects.create(
+        log_activity(
             user=request.user,
             action_type='qr_scan',
             description='QR code regenerated',
@@ -411,7 +330,195 @@ def regenerate_qr_code(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': 'Failed to regenerate QR code'})
 
+# History APIs (keyset-paginated, see core.pagination)
+def _history_page(request, queryset, serialize):
+    """JSON page of `queryset` after ?cursor=, ?limit= rows at a time"""
+    try:
+        rows, next_cursor = keyset_page(
+            queryset,
+            cursor=request.GET.get('cursor'),
+            limit=parse_page_size(request.GET.get('limit'))
+        )
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'results': [serialize(row) for row in rows],
+        'next_cursor': next_cursor,
+    })
+
+def _filter_status(queryset, request):
+    status = request.GET.get('status')
+    if status and status in dict(Redemption.STATUS_CHOICES):
+        return queryset.filter(status=status)
+    return queryset
+
+def _redemption_json(redemption):
+    return {
+        'id': str(redemption.id),
+        'amount': str(redemption.amount),
+        'status': redemption.status,
+        'created_at': redemption.created_at.isoformat(),
+        'confirmed_at': redemption.confirmed_at.isoformat() if redemption.confirmed_at else None,
+    }
+
+def influencer_redemptions_api(request):
+    """The signed-in influencer's redemptions, newest first (?status=, ?cursor=, ?limit=)"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Unauthorized'}, status=401)
+    if not hasattr(request.user, 'influencer_profile'):
+        return JsonResponse({'success': False, 'error': 'No influencer profile'}, status=403)
+    
+    redemptions = _filter_status(
+        Redemption.objects.filter(influencer=request.user.influencer_profile).select_related('venue'),
+        request
+    )
+    
+    def serialize(redemption):
+        return {
+            **_redemption_json(redemption),
+            'venue': {'id': redemption.venue_id, 'name': redemption.venue.venue_name},
+            'balance_after': str(redemption.balance_after),
+        }
+    
+    return _history_page(request, redemptions, serialize)
+
+def venue_redemptions_api(request):
+    """The signed-in venue's redemptions, newest first (?status=, ?cursor=, ?limit=)"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Unauthorized'}, status=401)
+    if not hasattr(request.user, 'venue_profile'):
+        return JsonResponse({'success': False, 'error': 'No venue profile'}, status=403)
+    
+    redemptions = _filter_status(
+        Redemption.objects.filter(venue=request.user.venue_profile).select_related('influencer'),
+        request
+    )
+    
+    def serialize(redemption):
+        return {
+            **_redemption_json(redemption),
+            'influencer': {
+                'id': str(redemption.influencer.user_id),
+                'instagram_username': redemption.influencer.instagram_username,
+            },
+        }
+    
+    return _history_page(request, redemptions, serialize)
+
+def activity_log_api(request):
+    """
+    The signed-in user's activity log, newest first (?action_type=,
+    ?cursor=, ?limit=). Staff may pass ?user=<id> for another user's log.
+    Covers every month the database keeps (on PostgreSQL the partitions
+    are read through the parent table); months past
+    ACTIVITY_LOG_RETENTION_MONTHS live only in archive_activity_logs'
+    .jsonl.gz files. Pages walk the (user, -created_at, -id) index.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Unauthorized'}, status=401)
+    
+    user_id = request.user.pk
+    if request.GET.get('user') and request.user.is_staff:
+        try:
+            user_id = User._meta.pk.to_python(request.GET['user'])
+        except ValidationError:
+            return JsonResponse({'success': False, 'error': 'Invalid user'}, status=400)
+    
+    logs = ActivityLog.objects.filter(user_id=user_id)
+    action_type = request.GET.get('action_type')
+    if action_type and action_type in dict(ActivityLog.ACTION_TYPES):
+        logs = logs.filter(action_type=action_type)
+    
+    def serialize(log):
+        return {
+            'id': log.pk,
+            'action_type': log.action_type,
+            'description': log.description,
+            'metadata': log.metadata,
+            'created_at': log.created_at.isoformat(),
+        }
+    
+    return _history_page(request, logs, serialize)
+
+# CSV exports (streamed, see core.exports)
+def _export_response(request, report):
+    """
+    Streamed CSV of a core.exports report for ?start=, ?end= (YYYY-MM-DD,
+    inclusive) and ?status=. Venues get their own redemptions; staff get
+    every venue's, or one with ?venue=<id>.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Unauthorized'}, status=401)
+    
+    if request.user.is_staff:
+        venue = None
+        if request.GET.get('venue'):
+            try:
+                venue = VenueProfile.objects.get(pk=request.GET['venue'])
+            except (VenueProfile.DoesNotExist, ValueError):
+                return JsonResponse({'success': False, 'error': 'Venue not found'}, status=404)
+    elif hasattr(request.user, 'venue_profile'):
+        venue = request.user.venue_profile
+    else:
+        return JsonResponse({'success': False, 'error': 'No venue profile'}, status=403)
+    
+    try:
+        start, end = parse_date_range(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    status = request.GET.get('status')
+    if status not in dict(Redemption.STATUS_CHOICES):
+        status = None
+    
+    response = StreamingHttpResponse(
+        export_csv(report, redemptions_for_export(venue, start, end, status)),
+        content_type='text/csv'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(report, venue, start, end)}"'
+    return response
+
+def export_redemptions_csv(request):
+    """One CSV row per redemption"""
+    return _export_response(request, 'redemptions')
+
+def export_settlement_csv(request):
+    """Confirmed/refunded/pending totals per venue and day, with subtotals"""
+    return _export_response(request, 'settlement')
+
 # Utility functions
+def fetch_instagram_data(request):
+    """Instagram profile preview for the signup forms (GET ?username= or JSON POST)"""
+    if request.method == 'GET':
+        username = request.GET.get('username', '')
+    elif request.method == 'POST':
+        try:
+            username = json.loads(request.body or b'{}').get('username', '')
+        except (ValueError, AttributeError):
+            username = ''
+    else:
+        return JsonResponse({'success': False, 'message': 'Invalid request'}, status=405)
+    
+    username = normalize_username(username)
+    if not username:
+        return JsonResponse({'success': False, 'message': 'Please enter a valid Instagram username'}, status=400)
+    
+    entry = get_cached_lookup(username)
+    if entry is None:
+        if not allow_client_lookup(client_address(request)):
+            return JsonResponse({'success': False, 'message': 'Too many lookups, please try again in a moment'}, status=429)
+        entry = lookup_profile(username)
+    
+    if entry['etag'] in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry['content'], content_type='application/json')
+    response['ETag'] = entry['etag']
+    response['Cache-Control'] = 'private, max-age=60'
+    return response
+
 def get_client_ip(request):
     """Get client IP address"""
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -527,3 +634,26 @@ def reject_waitlist(request, pk):
         return redirect('core:admin_waitlist')
     
     return redirect('core:admin_waitlist_detail', pk=pk)
+
+@login_required
+def profiling_stats(request):
+    """Per-view request profiling totals for this worker process (staff only)"""
+    if not request.user.is_staff:
+        return HttpResponseForbidden("Access denied.")
+    
+    if request.method == 'POST':
+        profiling_stats_store.reset()
+    
+    return JsonResponse(profiling_stats_store.snapshot())
+
+@login_required
+def cache_stats(request):
+    """Hit/miss counts per named cache for this worker process (staff only)"""
+    if not request.user.is_staff:
+        return HttpResponseForbidden("Access denied.")
+    
+    if request.method == 'POST':
+        cache_metrics.reset()
+    
+    return JsonResponse(cache_metrics.snapshot())
+
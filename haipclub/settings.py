@@ -13,6 +13,9 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 import os
 
+from core.caching import cache_config
+from core.db import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -31,6 +34,12 @@ ALLOWED_HOSTS = ['*']
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
 
+# External API keys (core.services)
+ROCKET_API_KEY = os.environ.get('ROCKET_API_KEY', '')
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
+# Point at a local stand-in (manage.py run_fake_rocketapi) for offline testing
+ROCKET_API_BASE_URL = os.environ.get('ROCKET_API_BASE_URL', 'https://instagram-scraper-api2.p.rapidapi.com/v1')
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -55,6 +64,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,13 +99,17 @@ WSGI_APPLICATION = 'haipclub.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Built from DB_* environment variables (see core/db.py): SQLite by
+# default, PostgreSQL with DB_ENGINE=postgresql
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
 }
 
+# Named caches ('default', 'profiles', 'sessions', 'leaderboard',
+# 'fragments'), file-backed and shared by all workers unless CACHE_BACKEND
+# says otherwise (see core/caching.py)
+CACHES = cache_config(BASE_DIR)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -137,6 +151,17 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic fingerprints files and writes .gz/.br and .webp/.avif
+# variants next to them (core.storage)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -149,11 +174,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django Allauth settings
 SITE_ID = 1
 
+# Django's and allauth's backends, with request.user served from the
+# 'sessions' cache (core/auth_backends.py)
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'core.auth_backends.CachedModelBackend',
+    'core.auth_backends.CachedAuthenticationBackend',
 ]
 
+# Sessions are read from the 'sessions' cache and written through to the
+# database. Deployments serving only venue scanner devices can set
+# SESSION_STORE=signed_cookies to keep no server-side session state.
+SESSION_STORE = os.environ.get('SESSION_STORE', 'cached_db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_STORE}'
+SESSION_CACHE_ALIAS = 'sessions'
+
 # Allauth configuration
 ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_EMAIL_VERIFICATION = 'optional'
@@ -185,6 +219,40 @@ HAIPCLUB_SETTINGS = {
     },
     'QR_CODE_EXPIRY_HOURS': 24,
     'MAX_REDEMPTION_AMOUNT': 500.00,
+    
+    # Buffered ActivityLog writer (core.activity)
+    'ACTIVITY_LOG_ASYNC': True,
+    'ACTIVITY_LOG_BATCH_SIZE': 100,
+    'ACTIVITY_LOG_FLUSH_SECONDS': 2.0,
+    'ACTIVITY_LOG_SPOOL_DIR': BASE_DIR / 'logs' / 'activity_spool',
+    
+    # ActivityLog partition rotation (archive_activity_logs)
+    'ACTIVITY_LOG_RETENTION_MONTHS': 12,
+    'ACTIVITY_LOG_ARCHIVE_DIR': BASE_DIR / 'logs' / 'activity_archive',
+    
+    # Longest a process keeps its copy of SystemSettings (core.system_settings)
+    'SYSTEM_SETTINGS_MAX_AGE': 60,
+    
+    # Serve STATIC_ROOT from Django when DEBUG is off (core.static_serving);
+    # turn off when a front-end server or CDN serves /static/
+    'SERVE_STATIC': True,
+    'STATIC_IMAGE_MAX_WIDTH': 1920,
+    
+    # Request profiling (core.profiling): share of requests sampled, and the
+    # threshold above which a statement is logged as slow
+    'PROFILING_SAMPLE_RATE': 1.0 if DEBUG else 0.01,
+    'PROFILING_SLOW_QUERY_MS': 200,
+    
+    # Run redemption event subscribers (core.events) on a background thread;
+    # failed batches are retried by process_domain_events after this many
+    # seconds, doubling per attempt
+    'DOMAIN_EVENTS_ASYNC': True,
+    'DOMAIN_EVENTS_RETRY_SECONDS': 60,
+    
+    # Reverse proxies in front of the app that append to X-Forwarded-For.
+    # The Instagram lookup throttle (core.instagram_lookup) trusts only the
+    # entries they added; with 0 it keys on REMOTE_ADDR
+    'TRUSTED_PROXY_COUNT': int(os.environ.get('TRUSTED_PROXY_COUNT', '0')),
 }
 
 # Security settings for production
@@ -193,14 +261,31 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = 'DENY'
 
 # Logging
+# Records are queued in memory and written as JSON lines by a background
+# thread (core.log_handlers). The per-request RocketAPI INFO lines from
+# core.services are sampled; its warnings and errors are always kept.
+# All workers append to one file; rotate it with logrotate, e.g.
+#   /srv/haipclub/logs/haipclub.log { size 10M  rotate 5  compress  missingok }
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'core.log_handlers.JSONFormatter',
+        },
+    },
+    'filters': {
+        'sample_rocketapi': {
+            '()': 'core.log_handlers.SamplingFilter',
+            'rate': 0.1,
+        },
+    },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'core.log_handlers.QueuedWatchedFileHandler',
             'filename': BASE_DIR / 'logs' / 'haipclub.log',
+            'formatter': 'json',
         },
     },
     'loggers': {
@@ -209,6 +294,9 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'core.services': {
+            'filters': ['sample_rocketapi'],
+        },
     },
 }
 
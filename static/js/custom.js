@@ -44,7 +44,7 @@ document.addEventListener('DOMContentLoaded', function() {
             clearTimeout(timeout);
             timeout = setTimeout(() => {
                 const username = this.value.trim();
-                if (username.length >= 3) {
+                if (username.length >= 3 && username !== lastFetchedUsername) {
                     fetchInstagramData(username);
                 }
             }, 1500);
@@ -97,22 +97,22 @@ document.addEventListener('DOMContentLoaded', function() {
 });
 
 // Fetch Instagram data via AJAX
+// Last username looked up, so pauses without edits do not refetch
+let lastFetchedUsername = '';
+
 function fetchInstagramData(username) {
+    lastFetchedUsername = username;
     const loadingSpinner = document.getElementById('instagram-loading');
     const fetchButton = document.getElementById('fetch-instagram-data');
     
     if (loadingSpinner) loadingSpinner.style.display = 'block';
     if (fetchButton) fetchButton.disabled = true;
     
-    fetch('/dashboard/ajax/fetch-instagram-data/', {
-        method: 'POST',
+    // GET so the browser cache can revalidate repeat lookups with the ETag
+    fetch('/dashboard/ajax/fetch-instagram-data/?username=' + encodeURIComponent(username), {
         headers: {
-            'Content-Type': 'application/json',
-            'X-CSRFToken': getCookie('csrftoken')
-        },
-        body: JSON.stringify({
-            username: username
-        })
+            'Accept': 'application/json'
+        }
     })
     .then(response => response.json())
     .then(data => {